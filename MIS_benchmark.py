@@ -4,9 +4,14 @@ to solve the MIS problem
 """
 import os, sys, argparse, glob
 import numpy as np
+import networkx as nx
 import mis
 import pickle, random
 from utils.graph_funcs import graph_from_file, is_indset
+from utils.warm_start import WarmStartStore
+from utils.classical_mis import warm_start_state, mis_bitsets
+from utils.canonical_cache import CanonicalCache
+from utils.graph_store import find_stored_mis_size
 
 def get_hw_1_strs(nq):
     bitstrs = []
@@ -56,6 +61,17 @@ def parse_args():
                         help='Integer repetition label')
     parser.add_argument('--threads', type=int, default=1,
                         help='Number of parallel threads passed to Aer')
+    parser.add_argument('--optimizer', type=str, default='COBYLA',
+                        help='scipy.minimize method or adam')
+    parser.add_argument('--paramstore', type=str, default=None,
+                        help='JSON file of warm-start angles shared across runs')
+    parser.add_argument('--warmstart', type=float, default=0,
+                        help='Seconds of classical local search for the initial state (0 = off)')
+    parser.add_argument('--warmfree', type=int, default=2,
+                        help='Nodes removed from the warm-start set to leave room for the dqva')
+    parser.add_argument('--canoncache', type=str, default=None,
+                        help='File used to share the ground truth between isomorphic graphs '
+                             '(default benchmark_results/canonical_cache.pickle)')
     args = parser.parse_args()
     return args
 
@@ -72,10 +88,23 @@ def main():
                         'qaoaHotStart', 'dqvaHotStart', 'qlsHotStart',
                         'qaoaWStart']:
         raise Exception('Unknown algorithm:', args.alg)
-    if args.sim not in ['qasm', 'statevector', 'cloud']:
+    if args.sim not in ['qasm', 'statevector', 'cloud', 'native']:
         raise Exception('Unknown backend:', args.sim)
+    # the native statevector simulator supplies adjoint gradients
+    run_sim = 'native' if args.sim == 'native' else 'aer'
 
     all_graphs = glob.glob(DQVAROOT + args.graph)
+
+    # seed the optimizations with angles learned on earlier rounds and graphs
+    warm_start = None
+    if args.paramstore is not None:
+        warm_start = WarmStartStore(args.paramstore)
+    # the ground truth MIS size, computed once per isomorphism class and kept
+    # across runs
+    canoncache = args.canoncache
+    if canoncache is None:
+        canoncache = DQVAROOT + 'benchmark_results/canonical_cache.pickle'
+    canonical_cache = CanonicalCache(canoncache)
     graph_type = all_graphs[0].split('/')[-2]
 
     savepath = DQVAROOT+'benchmark_results/{}_P{}_{}/'.format(args.alg, args.P, args.sim)
@@ -95,6 +124,14 @@ def main():
         G = graph_from_file(graphfn)
         print(G.edges())
         nq = len(G.nodes)
+        # look the ground truth up before running the exact solver
+        opt_mis = canonical_cache.get(G, 'mis_size')
+        if opt_mis is None:
+            opt_mis = find_stored_mis_size(graphfn)
+            if opt_mis is None:
+                opt_mis = mis_bitsets(nx.convert_node_labels_to_integers(G))[0]
+            canonical_cache.put(G, 'mis_size', opt_mis)
+        print('Optimal MIS size:', opt_mis)
         if 'HotStart' in args.alg:
             # Randomly select 3 bitstrings
             if nq < 8:
@@ -121,6 +158,10 @@ def main():
             print('init states:', init_states)
         elif 'WStart' in args.alg:
             init_state = 'W'
+        elif args.warmstart > 0:
+            init_state = warm_start_state(G, time_budget=args.warmstart,
+                                          num_free=args.warmfree)
+            print('Warm start init state:', init_state)
         else:
             init_state = '0'*nq
 
@@ -142,17 +183,22 @@ def main():
         for rep in rep_range:
             if args.alg == 'qaoa' or args.alg == 'qaoaWStart':
                 out = mis.solve_mis_qaoa(init_state, G, P=args.P, m=args.m,
-                                          sim='aer', shots=args.shots,
-                                          verbose=args.v, threads=args.threads)
+                                          sim=run_sim, shots=args.shots,
+                                          verbose=args.v, threads=args.threads,
+                                          optimizer=args.optimizer,
+                                          warm_start=warm_start)
             elif args.alg == 'dqva':
                 out = mis.solve_mis_dqva(init_state, G, P=args.P, m=args.m,
-                                         sim='aer', shots=args.shots,
-                                         verbose=args.v, threads=args.threads)
+                                         sim=run_sim, shots=args.shots,
+                                         verbose=args.v, threads=args.threads,
+                                         optimizer=args.optimizer,
+                                         warm_start=warm_start)
             elif args.alg == 'qls':
                 out = mis.solve_mis_qls(init_state, G, P=args.P, m=args.m,
-                                          sim='aer', shots=args.shots,
+                                          sim=run_sim, shots=args.shots,
                                           verbose=args.v, param_lim=args.plim,
-                                          threads=args.threads)
+                                          threads=args.threads, optimizer=args.optimizer,
+                                          warm_start=warm_start)
             elif args.alg == 'cut_dqva':
                 out = mis.solve_mis_cut_dqva()
 
@@ -194,7 +240,7 @@ def main():
                                                  args.sim, result[0], rep)
 
                     with open(cur_savepath+savename, 'ab') as pf:
-                        pickle.dump({'graph':graphfn, 'out':result[1]}, pf)
+                        pickle.dump({'graph':graphfn, 'out':result[1], 'opt_mis':opt_mis}, pf)
 
             else:
                 if args.plim is None:
@@ -205,7 +251,7 @@ def main():
                                              args.alg, args.plim, args.sim, rep)
 
                 with open(cur_savepath+savename, 'ab') as pf:
-                    pickle.dump({'graph':graphfn, 'out':out}, pf)
+                    pickle.dump({'graph':graphfn, 'out':out, 'opt_mis':opt_mis}, pf)
 
 if __name__ == '__main__':
     main()
@@ -164,7 +164,7 @@ def simple_choose_nodes(graph: nx.Graph, partition: List[List[int]],
 
     return cut_nodes, list(hot_nodes)
 
-def sort_mixers(G, subgraph_dict):
+def sort_mixers(G, subgraph_dict, subgraph_order=None):
     cur_mixer_order = list(G.nodes)
 
     # Group the nodes by subgraph
@@ -172,10 +172,14 @@ def sort_mixers(G, subgraph_dict):
     for node in cur_mixer_order:
         subgraph_nodes[subgraph_dict[node]].append(node)
 
+    # Order the subgraphs, e.g. by a ranking from cutting_funcs.rank_mixer_orders
+    if subgraph_order is None:
+        subgraph_order = range(len(subgraph_nodes))
+
     # Order mixers sequentially in each subgraph
     new_mixer_order = []
-    for sublist in subgraph_nodes:
-        new_mixer_order.extend(sorted(sublist))
+    for subgraph_idx in subgraph_order:
+        new_mixer_order.extend(sorted(subgraph_nodes[subgraph_idx]))
 
     return new_mixer_order
 
@@ -17,6 +17,7 @@ from qiskit.transpiler.passes import Unroller
 from qiskit.transpiler import PassManager
 from utils.graph_funcs import *
 from utils.helper_funcs import *
+from utils.graph_context import get_subgraph_dict
 
 def apply_mixer(circ, alpha, init_state, G, barriers,
                 decompose_toffoli, mixer_order, subgraph_dict,
@@ -257,13 +258,9 @@ def gen_dqva(G, partition, cut_nodes, hot_nodes, mixer_order, P=1, params=[], in
     if P != 1:
         raise Exception("P != 1 currently unsupported")
 
+    # identify the subgraph of every node, both cached on a GraphContext
     subgraphs, _ = get_subgraphs(G, partition)
-
-    # identify the subgraph of every node
-    subgraph_dict = {}
-    for i, subgraph in enumerate(subgraphs):
-        for qubit in subgraph:
-            subgraph_dict[qubit] = i
+    subgraph_dict = get_subgraph_dict(G, partition)
 
     # Step 1: Jump Start
     # Run an efficient classical approximation algorithm to warm-start the optimization
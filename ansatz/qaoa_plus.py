@@ -1,6 +1,7 @@
 from qiskit import QuantumCircuit, Aer, execute
 from utils.helper_funcs import *
 from utils.graph_funcs import *
+from utils.classical_mis import exact_mis
 import scipy
 import numpy as np
 
@@ -83,7 +84,7 @@ def get_ranked_probs(P, G, params, shots=8192):
 
 
 def get_approximation_ratio(out, P, G, shots=8192):
-    opt_mis = brute_force_search(G)[1]
+    opt_mis = exact_mis(G, all_solutions=False)[1]
 
     circ = construct_qaoa_plus(P, G, params=out['x'], measure=True)
     result = execute(circ, backend=Aer.get_backend('qasm_simulator'), shots=shots).result()
@@ -107,7 +108,7 @@ def top_strs(counts, G, top=5):
     total_shots = sum(counts.values())
     probs = [(bitstr, counts[bitstr] / total_shots) for bitstr in counts.keys()]
     probs = sorted(probs, key=lambda p: p[1], reverse=True)
-    opt_mis = brute_force_search(G)[1]
+    opt_mis = exact_mis(G, all_solutions=False)[1]
 
     for i in range(top):
         ratio = hamming_weight(probs[i][0]) * probs[i][1] / opt_mis
@@ -9,6 +9,7 @@ from qiskit.quantum_info import Statevector
 import mis
 
 from utils.graph_funcs import *
+from utils.classical_mis import exact_mis
 from utils.helper_funcs import *
 
 from ansatz import qaoa, qv_ansatz, dqv_ansatz, dqv_cut_ansatz
@@ -23,7 +24,7 @@ def get_data(sample_graphs):
         print(graph_name)
         G = graph_from_file(graph_name)
         nq = len(G.nodes())
-        opt_mis = brute_force_search(G)[1]
+        opt_mis = exact_mis(G, all_solutions=False)[1]
 
         init_state = '0'*nq
         mixer_order = list(range(nq))
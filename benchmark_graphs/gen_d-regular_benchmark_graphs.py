@@ -1,6 +1,20 @@
 #!/usr/bin/env python
-import glob
-import networkx as nx
+import argparse, glob, os, sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.graph_gen import generate_family, write_family
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--seed', type=int, default=None,
+                        help='Seed of the generated families')
+    parser.add_argument('--processes', type=int, default=None,
+                        help='Number of worker processes')
+    args = parser.parse_args()
+    return args
+
+args = parse_args()
 
 dirs = []
 for n in [18, 26]:
@@ -13,12 +27,7 @@ for folder in dirs:
     d = int(folder.split('_')[1][1:])
     print('Nodes: {}, degree: {}'.format(n, d))
 
-    for j in range(50, 60):
-        G = nx.random_regular_graph(d, n)
-        edges = list(G.edges())
-
-        with open(folder+'/G{}.txt'.format(j+1), 'w') as fn:
-            edgestr = ''.join(['{}, '.format(e) for e in edges])
-            edgestr = edgestr.strip(', ')
-            fn.write(edgestr)
-
+    # mix the family parameters into the seed so every family gets its own stream
+    seed = None if args.seed is None else [args.seed, n, d]
+    graphs = generate_family('regular', n, 10, seed=seed, processes=args.processes, d=d)
+    write_family(folder, graphs, start=51)
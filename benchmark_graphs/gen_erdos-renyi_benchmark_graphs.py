@@ -1,40 +1,35 @@
-import glob
-import networkx as nx
+#!/usr/bin/env python
+import argparse, glob, os, sys
 
-import sys
-sys.path.append('../')
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from utils.graph_funcs import graph_from_file
+from utils.graph_gen import generate_family, write_family
 
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--seed', type=int, default=None,
+                        help='Seed of the generated families')
+    parser.add_argument('--processes', type=int, default=None,
+                        help='Number of worker processes')
+    args = parser.parse_args()
+    return args
 
-def is_unique(folder, G):
-    all_graphs = glob.glob(folder+'/*')
-
-    for graph in all_graphs:
-        cur_G = graph_from_file(graph)
-        if nx.is_isomorphic(G, cur_G):
-            return False
-
-    return True
+args = parse_args()
 
 dirs = glob.glob('N14_p*')
 
 for folder in dirs:
     print(folder)
     n = int(folder.split('_')[0][1:])
-    p = int(folder.split('_')[1][1:]) / 100
+    p_percent = int(folder.split('_')[1][1:])
+    p = p_percent / 100
     print('Nodes: {}, probability: {}'.format(n, p))
 
-    count = 0
-    while count < 25:
-        G = nx.generators.random_graphs.erdos_renyi_graph(n, p)
-        if nx.is_connected(G) and is_unique(folder, G):
-            count += 1
-            edges = list(G.edges())
-
-            with open(folder+'/G{}.txt'.format(count), 'w') as fn:
-                edgestr = ''.join(['{}, '.format(e) for e in edges])
-                edgestr = edgestr.strip(', ')
-                fn.write(edgestr)
-
-
+    # the new graphs are not isomorphic to each other or to those already in folder
+    known = [graph_from_file(graph) for graph in glob.glob(folder+'/G*.txt')]
+    # mix the family parameters into the seed so every family gets its own stream
+    seed = None if args.seed is None else [args.seed, n, p_percent]
+    graphs = generate_family('erdos_renyi', n, 25, seed=seed, processes=args.processes,
+                             unique=True, known=known, p=p)
+    write_family(folder, graphs, start=1)
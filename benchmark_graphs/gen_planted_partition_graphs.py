@@ -1,7 +1,20 @@
 #!/usr/bin/env python
-import os
-import glob
-import networkx as nx
+import argparse, os, sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.graph_gen import generate_family, write_family
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--seed', type=int, default=None,
+                        help='Seed of the generated families')
+    parser.add_argument('--processes', type=int, default=None,
+                        help='Number of worker processes')
+    args = parser.parse_args()
+    return args
+
+args = parse_args()
 
 graph_params = [
                 (9, 2, 0.20, 0.02),
@@ -12,22 +25,8 @@ for commSize, numComm, p_in, p_out in graph_params:
     print(f'{commSize * numComm} nodes, {numComm} communities, p_in = {p_in}, p_out = {p_out}')
 
     folder = f'N{commSize * numComm}_com{numComm}_pin{int(p_in*100)}_pout{int(p_out*100)}_graphs/'
-    if not os.path.isdir(folder):
-        os.mkdir(folder)
-
-    count = 31
-    while count <= 60:
-        G = nx.generators.planted_partition_graph(l=numComm, k=commSize,
-                                                  p_in=p_in, p_out=p_out)
-        if nx.is_connected(G):
-            print('|', end='')
-            edges = list(G.edges())
-
-            with open(folder+'G{}.txt'.format(count), 'w') as fn:
-                edgestr = ''.join(['{}, '.format(e) for e in edges])
-                edgestr = edgestr.strip(', ')
-                fn.write(edgestr)
-
-            count += 1
-    print('\nDONE')
 
+    graphs = generate_family('planted_partition', commSize * numComm, 30, seed=args.seed,
+                             processes=args.processes, num_comms=numComm, p_in=p_in, p_out=p_out)
+    write_family(folder, graphs, start=31)
+    print('DONE')
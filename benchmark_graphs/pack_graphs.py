@@ -0,0 +1,36 @@
+#!/usr/bin/env python
+"""
+Pack benchmark graph directories into graph stores (see utils/graph_store.py),
+e.g. from this directory:
+
+    python pack_graphs.py 'N*_graphs'
+"""
+import argparse, glob, os, sys, time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.graph_store import convert_family, GraphStore
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('dirs', type=str, nargs='?', default='*_graphs',
+                        help='glob path to the benchmark graph directories')
+    parser.add_argument('--nomis', action='store_true',
+                        help='skip computing the MIS size of every graph')
+    args = parser.parse_args()
+    return args
+
+def main():
+    args = parse_args()
+
+    for graph_dir in sorted(glob.glob(args.dirs)):
+        if not os.path.isdir(graph_dir):
+            continue
+        start = time.time()
+        path = convert_family(graph_dir, compute_mis=not args.nomis)
+        store = GraphStore(path)
+        print('{}: {} graphs, {} bytes, {:.2f} s'.format(path, len(store),
+              os.path.getsize(path), time.time() - start))
+
+if __name__ == '__main__':
+    main()
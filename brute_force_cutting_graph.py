@@ -1,7 +1,9 @@
 #!/usr/bin/env python
 import argparse, glob, sys, time
 from pathlib import Path
-from utils import helper_funcs, graph_funcs
+from utils import graph_funcs
+from utils.classical_mis import exact_mis
+from utils.canonical_cache import CanonicalCache
 
 def parse_args():
     parser = argparse.ArgumentParser()
@@ -9,6 +11,8 @@ def parse_args():
     #                    help='path to DQVA directory')
     parser.add_argument('-g', type=str, default=None,
                         help='Graph file name')
+    parser.add_argument('--cache', type=str, default=None,
+                        help='File used to share results between isomorphic graphs')
     args = parser.parse_args()
     return args
 
@@ -16,6 +20,7 @@ def main():
     args = parse_args()
 
     graphfiles = glob.glob(args.g)
+    canonical_cache = CanonicalCache(args.cache)
     for gfile in graphfiles:
         graphtype = gfile.split('/')[-2]
         graphname = gfile.split('/')[-1].strip('.txt')
@@ -25,9 +30,12 @@ def main():
         print('Loaded graph with {} nodes'.format(len(G.nodes)))
 
         start = time.time()
-        opt_strs, opt_mis = helper_funcs.brute_force_search_memory_efficient(G)
+        # the optimal sets are shared by every graph isomorphic to G
+        opt_strs = sorted(canonical_cache.get_or_compute(G, 'exact_mis', lambda: exact_mis(G)[0],
+                                                         remap='bitstrings'))
+        opt_mis = opt_strs[0].count('1')
         end = time.time()
-        print('Finished brute force search in {:.3f} min'.format((end - start) / 60))
+        print('Finished exact search in {:.3f} min'.format((end - start) / 60))
 
         outdir = 'benchmark_graphs/brute_force_outputs/{}/'.format(graphtype)
         Path(outdir).mkdir(parents=True, exist_ok=True)
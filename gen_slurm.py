@@ -11,6 +11,8 @@ nfrags = 2
 shots = 60000
 partition_alg = 'klb'
 optimizer = 'COBYLA'
+# number of rounds run speculatively in parallel, 0 runs them one at a time
+speculative = 4
 
 for graph_num in range(1, 61):
     if planted:
@@ -32,7 +34,7 @@ for graph_num in range(1, 61):
             sf.write("#SBATCH -p defq\n")
             sf.write("#SBATCH --nodes=1\n")
             sf.write("#SBATCH --ntasks=1\n")
-            sf.write("#SBATCH --cpus-per-task=4\n")
+            sf.write(f"#SBATCH --cpus-per-task={max(4, speculative)}\n")
             sf.write("#SBATCH -t 48:00:00\n")
             sf.write("#SBATCH --mail-type=end\n")
             sf.write("#SBATCH --mem=8000M\n")
@@ -40,8 +42,11 @@ for graph_num in range(1, 61):
             sf.write("source /n/fs/qcteague/dqva-and-circuit-cutting/cutEnv/bin/activate\n")
 
             if planted:
-                pythoncommand = f"python /n/fs/qcteague/dqva-and-circuit-cutting/run_dqva_and_cutting.py -p /n/fs/qcteague/dqva-and-circuit-cutting/ --graph \"benchmark_graphs/N{N}_com{ncom}_pin{pin}_pout{pout}_graphs/G{graph_num}.txt\" --numcuts {ncuts} --shots {shots} --rounds 10 --rep {rep} --numfrags {nfrags} --optimizer {optimizer} --graphalg klb --resultdir MICRO_results"
+                pythoncommand = f"python /n/fs/qcteague/dqva-and-circuit-cutting/run_dqva_and_cutting.py -p /n/fs/qcteague/dqva-and-circuit-cutting/ --graph \"benchmark_graphs/N{N}_com{ncom}_pin{pin}_pout{pout}_graphs/G{graph_num}.txt\" --numcuts {ncuts} --shots {shots} --rounds 10 --rep {rep} --numfrags {nfrags} --optimizer {optimizer} --graphalg klb --checkpoint 1 --resultdir MICRO_results"
             else:
-                pythoncommand = f"python /n/fs/qcteague/dqva-and-circuit-cutting/run_dqva_and_cutting.py -p /n/fs/qcteague/dqva-and-circuit-cutting/ --graph \"benchmark_graphs/N{N}_d3_graphs/G{graph_num}.txt\" --numcuts {ncuts} --shots {shots} --rounds 10 --rep {rep} --numfrags {nfrags} --optimizer {optimizer} --graphalg klb --resultdir MICRO_results"
+                pythoncommand = f"python /n/fs/qcteague/dqva-and-circuit-cutting/run_dqva_and_cutting.py -p /n/fs/qcteague/dqva-and-circuit-cutting/ --graph \"benchmark_graphs/N{N}_d3_graphs/G{graph_num}.txt\" --numcuts {ncuts} --shots {shots} --rounds 10 --rep {rep} --numfrags {nfrags} --optimizer {optimizer} --graphalg klb --checkpoint 1 --resultdir MICRO_results"
+
+            if speculative > 0:
+                pythoncommand += f" --speculative {speculative} --seed {rep}"
 
             sf.write(pythoncommand)
@@ -4,10 +4,16 @@ import numpy as np
 from pathlib import Path
 import argparse
 
+from utils.graph_gen import generate_family
+
 def parse_args():
     parser = argparse.ArgumentParser()
     parser.add_argument('-n', type=int, default=None,
                         help='Graph size')
+    parser.add_argument('--seed', type=int, default=None,
+                        help='Seed of the generated graphs')
+    parser.add_argument('--processes', type=int, default=None,
+                        help='Number of worker processes generating the graphs')
     args = parser.parse_args()
     return args
 
@@ -20,23 +26,27 @@ def main():
         print(graph_type)
         graph_size = args.n
         total_edges, cut_edges, relative_sizes = [], [], []
-        count = 1
-        while count <= 1000:
-            # Generate a connected graph
-            if i == 0:
-                G = nx.generators.random_graphs.random_regular_graph(3, graph_size)
-            elif i == 1:
-                G = nx.erdos_renyi_graph(graph_size, 0.1)
-                while not nx.is_connected(G):
-                    G = nx.erdos_renyi_graph(graph_size, 0.1)
-            elif i == 2:
-                G = nx.generators.planted_partition_graph(l=2, k=int(graph_size/2), p_in=0.2, p_out=0.02)
-                while not nx.is_connected(G):
-                    G = nx.generators.planted_partition_graph(l=2, k=int(graph_size/2), p_in=0.2, p_out=0.02)
-            elif i == 3:
-                G = nx.generators.planted_partition_graph(l=5, k=int(graph_size/5), p_in=0.2, p_out=0.02)
-                while not nx.is_connected(G):
-                    G = nx.generators.planted_partition_graph(l=5, k=int(graph_size/5), p_in=0.2, p_out=0.02)
+        # every graph type gets its own seed stream
+        seed = None if args.seed is None else [args.seed, i]
+        # Generate the connected graphs in parallel
+        if i == 0:
+            graphs = generate_family('regular', graph_size, 1000, seed=seed,
+                                     processes=args.processes, compute_mis=False, d=3)
+        elif i == 1:
+            graphs = generate_family('erdos_renyi', graph_size, 1000, seed=seed,
+                                     processes=args.processes, compute_mis=False, p=0.1)
+        elif i == 2:
+            graphs = generate_family('planted_partition', graph_size, 1000, seed=seed,
+                                     processes=args.processes, compute_mis=False,
+                                     num_comms=2, p_in=0.2, p_out=0.02)
+        elif i == 3:
+            graphs = generate_family('planted_partition', graph_size, 1000, seed=seed,
+                                     processes=args.processes, compute_mis=False,
+                                     num_comms=5, p_in=0.2, p_out=0.02)
+
+        for edges, _ in graphs:
+            G = nx.Graph()
+            G.add_edges_from(edges)
 
             total_edges.append(len(G.edges))
             # Partition graph
@@ -54,8 +64,6 @@ def main():
                                                        or (edge[0] in setB and edge[1] in setA)]
             cut_edges.append(len(cutedges))
 
-            count += 1
-
         # Average results
         print(f'\tAveraged over 1000 random {graph_size}-node graphs: {np.mean(total_edges):.2f} total edges per graph,\n'
               f'\twith {np.mean(cut_edges):.2f} cut edges in the bisection,\n'
@@ -8,17 +8,15 @@ Each ansatz (qaoa, dqva, qlsa, dqva+cutting) has its own function which
 implements the variational algorithm used to find the MIS.
 """
 import time, random, queue, copy, itertools
+import os, concurrent.futures, inspect
 import numpy as np
 import networkx as nx
-import metis
 
-from networkx.algorithms.community.kernighan_lin import kernighan_lin_bisection
 from scipy.optimize import minimize
 
 #from cutqc.main import CutQC
 import qiskit
 from qiskit import *
-from qiskit.quantum_info import Statevector
 
 from ansatz import qaoa, dqv_ansatz, qls_ansatz, dqv_cut_ansatz
 
@@ -28,16 +26,65 @@ import qsplit.qsplit_mlrecon_methods as qmm
 from utils.graph_funcs import *
 from utils.helper_funcs import *
 from utils.cutting_funcs import *
+from utils.checkpoint import LoopCheckpoint
+from utils.cut_cache import CutPlanCache
+from utils.history import CutDQVARound, FragmentTable, compact_cuts
+from utils.shot_schedule import ShotScheduler, hamming_weight_variance
+from utils.native_sim import NativeAnsatz
+from utils.execution import get_backend, template_seed, CircuitTemplate
+from utils.gradients import ParameterShiftGradient, minimize_cost, uses_gradient
+from utils.graph_context import as_graph_context
+from utils.partition_funcs import select_partition
 
 
 def solve_mis_cut_dqva(init_state, graph, P=1, m=4, threshold=1e-5, cutoff=1,
                        sim='aer', shots=8192, verbose=0, max_cuts=1, num_frags=2,
-                       optimizer='COBYLA', partition_alg='metis'):
+                       optimizer='COBYLA', partition_alg='metis',
+                       hot_node_selection='random', cut_cache=None,
+                       mixer_order_search=False, max_frag_qubits=None,
+                       fragment_table=None, checkpoint=None, shot_schedule=False,
+                       canonical_cache=None, partition=None):
     """
     Find the MIS of G using the dqva and circuit cutting
+
+    hot_node_selection is passed to simple_choose_nodes: 'random', 'cheapest'
+    or 'weighted' by the predicted fragment simulation cost. 'kway' uses
+    choose_nodes instead, which avoids enumerating every hot node set and so
+    scales to more fragments and larger graphs.
+
+    cut_cache is an optional utils.cut_cache.CutPlanCache which is used to
+    skip building and cutting circuits that have been seen before.
+
+    If mixer_order_search is set, the m mixer rounds use the subgraph orders
+    ranked cheapest by rank_mixer_orders instead of random permutations.
+
+    partition_alg is one of 'klb', 'metis', 'spectral' (see
+    utils.partition_funcs.partition_graph) or 'best', which keeps the candidate
+    partition with the lowest predicted cutting cost. 'capped' ignores
+    num_frags and uses the fewest fragments of at most max_frag_qubits qubits.
+    For any partition_alg, max_frag_qubits (if given) also bounds the width of
+    the fragments of every hot node selection.
+    If canonical_cache (a utils.canonical_cache.CanonicalCache) is given, the
+    'best' and 'capped' partitions are shared between isomorphic graphs.
+    If partition is given, it is used as is and partition_alg is ignored.
+
+    Each inner round is recorded in the history as a utils.history.CutDQVARound.
+    If fragment_table (a utils.history.FragmentTable) is given, the fragments
+    and wire path map of every cut plan are stored there under the round's
+    plan_id.
+
+    If checkpoint is a path, the state of the outer loop is written there
+    atomically after every inner round, and a run started with the same path
+    resumes from the last checkpoint instead of starting over.
+
+    If shot_schedule is set, the shots of every cost function evaluation are
+    chosen by a utils.shot_schedule.ShotScheduler, growing from few shots up
+    to shots, and divided among the fragment variants as usual.
     """
 
-    if max_cuts < num_frags-1:
+    if partition is not None:
+        num_frags = len(partition)
+    if (partition is not None or partition_alg != 'capped') and max_cuts < num_frags-1:
         raise ValueError(f'Number of cuts {max_cuts} is too few for {num_frags} fragments')
 
     def _sort_mixers(G, cur_mixer_order, subgraph_dict):
@@ -57,6 +104,17 @@ def solve_mis_cut_dqva(init_state, graph, P=1, m=4, threshold=1e-5, cutoff=1,
         return new_mixer_order
 
 
+    def _check_cuts(cuts, fragments):
+        # applied to cached plans too, which may have been cut under looser budgets
+        if len(cuts) > max_cuts:
+            raise Exception('TOO MANY CUTS!')
+        if len(cuts) == 0:
+            raise Exception('DIDNT FIND ANY CUTS!')
+        if len(fragments) != len(partition):
+            raise Exception('WRONG NUMBER OF FRAGMENTS!')
+        if max_frag_qubits is not None and max(f.num_qubits for f in fragments) > max_frag_qubits:
+            raise Exception('FRAGMENTS TOO WIDE!')
+
     def _get_circuit_and_cuts():
         """
         Select the hot nodes, build the circuit, locate the cuts, and collect the stitching data
@@ -64,9 +122,17 @@ def solve_mis_cut_dqva(init_state, graph, P=1, m=4, threshold=1e-5, cutoff=1,
         params = [qiskit.circuit.Parameter('var_{}'.format(num)) for num in range(num_params)]
         kwargs = dict(params=params, init_state=cur_init_state, verbose=1, P=P)
 
-        # Default choose_nodes is hard coded to 2 sugraphs
-        #cut_nodes, hot_nodes = choose_nodes(graph, subgraphs, cut_edges, max_cuts)
-        cut_nodes, hot_nodes = simple_choose_nodes(graph, partition, cut_edges, max_cuts)
+        if hot_node_selection == 'kway':
+            # choose_nodes scores toss choices with a DP over the subgraph tree
+            cut_nodes, hot_nodes = choose_nodes(graph, subgraphs, cut_edges, max_cuts,
+                                                max_frag_qubits=max_frag_qubits)
+            cut_nodes = list(set(cut_nodes))
+        else:
+            cut_nodes, hot_nodes = simple_choose_nodes(graph, partition, cut_edges, max_cuts,
+                                                       index=partition_index,
+                                                       selection=hot_node_selection,
+                                                       mixer_order=cur_permutation,
+                                                       max_frag_qubits=max_frag_qubits)
         print(f'Out of cut nodes {cut_nodes}, selected hot nodes {hot_nodes}')
 
         if len(hot_nodes) == 0:
@@ -75,6 +141,22 @@ def solve_mis_cut_dqva(init_state, graph, P=1, m=4, threshold=1e-5, cutoff=1,
           #continue
           raise Exception('No hot nodes selected!')
 
+        if cut_cache is not None:
+            cache_key = cut_cache.make_key(graph, partition, hot_nodes, cur_permutation,
+                                           cur_init_state, P)
+            cached = cut_cache.get(cache_key)
+            if cached is not None:
+                fragments, wire_path_map, cuts, num_circ_params = cached
+                if verbose:
+                    print(f'Loaded {len(cuts)} cuts and {len(fragments)} fragments from the cut cache')
+                _check_cuts(cuts, fragments)
+                return fragments, wire_path_map, cuts, num_circ_params, cut_nodes, hot_nodes
+
+        if verbose:
+            plan = predict_cut_plan(partition, hot_nodes, partition_index, cur_permutation)
+            print(f'Predicted {plan.num_cuts} cuts, fragments with {plan.frag_qubits}-qubits',
+                  f'and {plan.num_variants} variants')
+
         circuit, cuts = dqv_cut_ansatz.gen_dqva(graph, partition, cut_nodes, hot_nodes,
                                                 cur_permutation, **kwargs)
 
@@ -84,12 +166,11 @@ def solve_mis_cut_dqva(init_state, graph, P=1, m=4, threshold=1e-5, cutoff=1,
             print(f'Found {len(cuts)} cut locations: {cuts}')
             print(f'Cut {circuit.num_qubits}-qubit circuit into {len(fragments)}',
                   f'fragments with ({[f.num_qubits for f in fragments]})-qubits')
-        if len(cuts) > max_cuts:
-            raise Exception('TOO MANY CUTS!')
-        if len(cuts) == 0:
-            raise Exception('DIDNT FIND ANY CUTS!')
-        if len(fragments) != len(partition):
-            raise Exception('WRONG NUMBER OF FRAGMENTS!')
+        _check_cuts(cuts, fragments)
+
+        if cut_cache is not None:
+            cut_cache.put(cache_key, circuit, fragments, wire_path_map, cuts,
+                          len(circuit.parameters))
 
         return fragments, wire_path_map, cuts, len(circuit.parameters), cut_nodes, hot_nodes
 
@@ -114,10 +195,13 @@ def solve_mis_cut_dqva(init_state, graph, P=1, m=4, threshold=1e-5, cutoff=1,
         return strip_ancillas(recombined_dist, num_anc=len(var_fragments))
 
     # This function will be what scipy.minimize optimizes
-    def avg_cost(params, *args):
+    def avg_cost(params, var_fragments, wire_path_map, frag_shots):
+        if scheduler is not None:
+            frag_shots = max(1, scheduler.shots // num_variants)
+
         # get output probability distribution for the circuit
         start = time.time()
-        probs = _get_circuit_output(params, *args)
+        probs = _get_circuit_output(params, var_fragments, wire_path_map, frag_shots)
 
         # Compute the average Hamming weight.
         # Have to check each string to ensure it is a valid IS because of the
@@ -130,6 +214,10 @@ def solve_mis_cut_dqva(init_state, graph, P=1, m=4, threshold=1e-5, cutoff=1,
         #    print('\t\t\tTotal time = {:.3f}, avg weight = {:.4f}'.format(
         #                                                 end-start, avg_weight))
 
+        if scheduler is not None:
+            scheduler.record(params, -avg_weight, hamming_weight_variance(probs),
+                             frag_shots * num_variants)
+
         # we want to maximize avg_weight <--> minimize -avg_weight
         return -avg_weight
 
@@ -137,23 +225,27 @@ def solve_mis_cut_dqva(init_state, graph, P=1, m=4, threshold=1e-5, cutoff=1,
     # NOTE: the backend to use is very version dependent.
     # Qiskit 0.23.2 does not support the newer Aer_simulators that
     # are available in Qiskit 0.26.0.
-    #backend = Aer.get_backend(name='aer_simulator', method='statevector')
-    backend = Aer.get_backend('qasm_simulator')
+    backend = get_backend('qasm')
 
     history = []
-
-    if partition_alg == 'klb':
-        # Kernighan-Lin partitions a graph into two relatively equal subgraphs
-        partition = kernighan_lin_bisection(graph)
-    elif partition_alg == 'metis':
-        # For generalizing to >2 subgraphs, we'll use the METIS graph partitioning software
-        #    https://metis.readthedocs.io/en/latest/
-        partition_assignment = metis.part_graph(graph, nparts=num_frags)[1]
-        partition = [[] for _ in set(partition_assignment)]
-        for node, assignment in zip(list(graph), partition_assignment):
-            partition[assignment].append(node)
-    else:
-        raise ValueError(f"Unknown graph partitioning algorithm: {partition_alg}")
+    scheduler = None
+
+    # A resumed run must keep the partition and mixer ranking of the checkpointed run
+    ckpt = LoopCheckpoint(checkpoint,
+                          lambda: (best_indset, best_init_state, cur_init_state, best_params,
+                                   best_perm, cur_permutation, history),
+                          extra_state=lambda: dict(partition=partition, cut_nodes=cut_nodes,
+                                                   ranked_permutations=ranked_permutations))
+    if ckpt.resumed is not None:
+        partition = ckpt.resumed['partition']
+        num_frags = len(partition)
+    elif partition is None:
+        partition = select_partition(graph, partition_alg, num_frags, max_cuts,
+                                     max_frag_qubits=max_frag_qubits,
+                                     canonical_cache=canonical_cache, verbose=verbose)
+        num_frags = len(partition)
+    # precompute the adjacency and partition lookups once for the whole solve
+    graph = as_graph_context(graph, partition)
     subgraphs, cut_edges = get_subgraphs(graph, partition)
     print('='*30)
     print('GRAPH PARTITIONING')
@@ -161,13 +253,31 @@ def solve_mis_cut_dqva(init_state, graph, P=1, m=4, threshold=1e-5, cutoff=1,
     print(f'with cut edges = {cut_edges}')
 
     # identify the subgraph of every node
-    subgraph_dict = {}
-    for i, subgraph in enumerate(subgraphs):
-        for qubit in subgraph:
-            subgraph_dict[qubit] = i
-
-    # Randomly permute the order of the partial mixers, sort mixers by subgraph
-    cur_permutation = _sort_mixers(graph, list(np.random.permutation(list(graph.nodes))), subgraph_dict)
+    subgraph_dict = graph.subgraph_dict
+
+    # cross-partition adjacency, reused by every hot node selection below
+    partition_index = PartitionIndex(graph, partition)
+
+    ranked_permutations = None
+    if mixer_order_search and ckpt.resumed is not None:
+        # the ranking breaks ties at random, so reuse the checkpointed one
+        ranked_permutations = ckpt.resumed.get('ranked_permutations')
+    if mixer_order_search and ranked_permutations is None:
+        # Rank the subgraph orders by predicted cutting cost, one per mixer round
+        if hot_node_selection == 'kway':
+            hot_node_sets = [tuple(choose_nodes(graph, subgraphs, cut_edges, max_cuts,
+                                                max_frag_qubits=max_frag_qubits)[1])]
+        else:
+            hot_node_sets = None
+        ranked_permutations = rank_mixer_orders(graph, partition, cut_edges, max_cuts, m,
+                                                index=partition_index,
+                                                hot_node_sets=hot_node_sets,
+                                                max_frag_qubits=max_frag_qubits)
+    if mixer_order_search:
+        cur_permutation = ranked_permutations[0]
+    else:
+        # Randomly permute the order of the partial mixers, sort mixers by subgraph
+        cur_permutation = _sort_mixers(graph, list(np.random.permutation(list(graph.nodes))), subgraph_dict)
 
     # Begin outer optimization loop
     best_indset = init_state
@@ -176,11 +286,16 @@ def solve_mis_cut_dqva(init_state, graph, P=1, m=4, threshold=1e-5, cutoff=1,
     best_params = None
     best_perm = copy.copy(cur_permutation)
 
-    # Randomly permute the order of mixer unitaries m times
-    for mixer_round in range(1, m+1):
+    # Resume from the last checkpoint, if there is one
+    if ckpt.resumed is not None:
+        (best_indset, best_init_state, cur_init_state, best_params, best_perm,
+         cur_permutation, history) = ckpt.resume()
+        cut_nodes = ckpt.resumed['cut_nodes']
+        new_hamming_weight = hamming_weight(best_indset)
 
-        mixer_history = []
-        inner_round = 1
+    # Randomly permute the order of mixer unitaries m times
+    for mixer_round in range(ckpt.start_round, m+1):
+        mixer_history, inner_round = ckpt.round_state(mixer_round)
         new_hamming_weight = hamming_weight(cur_init_state)
 
         # Attempt to improve the Hamming weight until no further improvements can be made
@@ -203,7 +318,8 @@ def solve_mis_cut_dqva(init_state, graph, P=1, m=4, threshold=1e-5, cutoff=1,
                 print('Attempting to locate viable cuts...')
             fragments, wire_path_map, found_cuts, num_used_params, cut_nodes, hot_nodes = _get_circuit_and_cuts()
 
-            frag_shots = shots // qmm.fragment_variants(wire_path_map)
+            num_variants = qmm.fragment_variants(wire_path_map)
+            frag_shots = shots // num_variants
             cut_end_time = time.time()
 
             if verbose:
@@ -218,7 +334,18 @@ def solve_mis_cut_dqva(init_state, graph, P=1, m=4, threshold=1e-5, cutoff=1,
 
             init_params = np.random.uniform(low=0.0, high=2*np.pi, size=num_used_params)
             args = (fragments, wire_path_map, frag_shots)
+            if shot_schedule:
+                scheduler = ShotScheduler(shots, min_shots=min(shots, max(shots // 16, num_variants)))
+            opt_start_time = time.time()
             out = minimize(avg_cost, init_params, args=args, method=optimizer)
+            opt_end_time = time.time()
+            if scheduler is not None:
+                total_shots = scheduler.total_shots
+                if verbose:
+                    print('\tShot schedule ended at {} shots, {} total shots'.format(
+                          scheduler.shots, total_shots))
+            else:
+                total_shots = out['nfev'] * frag_shots * num_variants
             opt_params = out['x']
             opt_cost = out['fun']
             if verbose:
@@ -242,14 +369,20 @@ def solve_mis_cut_dqva(init_state, graph, P=1, m=4, threshold=1e-5, cutoff=1,
             better_strs = sorted(better_strs, key=lambda t: t[1], reverse=True)
 
             # Save current results to history
-            inner_history = {'mixer_round':mixer_round, 'inner_round':inner_round,
-                    'cost':opt_cost, 'function_evals':out['nfev'],
-                    'init_state':cur_init_state,
-                    'mixer_order':copy.copy(cur_permutation),
-                    'num_params':num_used_params, 'frag_shots':frag_shots,
-                    'frag_qubits':[f.num_qubits for f in fragments],
-                    'cuts':found_cuts, 'hot_nodes':hot_nodes, 'better_strs':better_strs,
-                    'cur_params':out['x'], 'cur_args':args}
+            plan_id = CutPlanCache.make_key(graph, partition, hot_nodes, cur_permutation,
+                                            cur_init_state, P)
+            if fragment_table is not None:
+                fragment_table.add(plan_id, fragments, wire_path_map)
+            inner_history = CutDQVARound(mixer_round=mixer_round, inner_round=inner_round,
+                    cost=opt_cost, function_evals=out['nfev'],
+                    init_state=cur_init_state,
+                    mixer_order=copy.copy(cur_permutation),
+                    num_params=num_used_params, frag_shots=frag_shots,
+                    frag_qubits=[f.num_qubits for f in fragments],
+                    cuts=compact_cuts(found_cuts), hot_nodes=list(hot_nodes),
+                    better_strs=better_strs, cur_params=np.asarray(out['x']),
+                    plan_id=plan_id, cut_time=cut_end_time - cut_start_time,
+                    opt_time=opt_end_time - opt_start_time, total_shots=total_shots)
             mixer_history.append(inner_history)
 
             # If no improvement was made, break and go to next mixer round
@@ -266,12 +399,18 @@ def solve_mis_cut_dqva(init_state, graph, P=1, m=4, threshold=1e-5, cutoff=1,
             print('\tFound new independent set: {}, Hamming weight = {}'.format(
                                                best_indset, new_hamming_weight))
             inner_round += 1
+            ckpt.save(mixer_round, inner_round, mixer_history)
 
         # Save the history of the current mixer round
         history.append(mixer_history)
 
         # Choose a new permutation of the mixer unitaries
-        cur_permutation = _sort_mixers(graph, list(np.random.permutation(list(graph.nodes))), subgraph_dict)
+        if mixer_order_search:
+            cur_permutation = ranked_permutations[mixer_round % m]
+        else:
+            cur_permutation = _sort_mixers(graph, list(np.random.permutation(list(graph.nodes))), subgraph_dict)
+
+        ckpt.save(mixer_round+1, 1, [])
 
     print('\tRETURNING, best hamming weight:', new_hamming_weight)
     return best_indset, best_params, best_init_state, best_perm, partition, cut_nodes, history
@@ -279,7 +418,8 @@ def solve_mis_cut_dqva(init_state, graph, P=1, m=4, threshold=1e-5, cutoff=1,
 
 def solve_mis_qls(init_state, G, P=1, m=1, mixer_order=None, threshold=1e-5,
                    cutoff=1, sim='aer', shots=8192, verbose=0,
-                   param_lim=None, threads=0):
+                   param_lim=None, threads=0, checkpoint=None, shot_schedule=False,
+                   optimizer='COBYLA', warm_start=None, seed_simulator=None):
     """
     Find the MIS of G using Quantum Local Search (QLS), this
     ansatz is composed of two types of unitaries: the cost unitary U_C and the
@@ -290,18 +430,33 @@ def solve_mis_qls(init_state, G, P=1, m=1, mixer_order=None, threshold=1e-5,
     partial mixers that are applied at any one time, and its dynamic reuse of
     quantum resources (i.e. the partial mixers for qubits which are in the MIS
     are turned off and applied to other qubits not currently in the set)
+
+    checkpoint is an optional path used to save and resume the outer loop
+    (see solve_mis_cut_dqva). If shot_schedule is set, the sampled cost
+    function uses a utils.shot_schedule.ShotScheduler, growing from few shots
+    up to shots.
+
+    optimizer is a scipy.optimize.minimize method or 'adam'. Methods which
+    take a gradient get it from the adjoint method when sim='native' (see
+    utils.native_sim) and from the parameter shift rule otherwise.
+
+    warm_start is an optional utils.warm_start.WarmStartStore which seeds
+    each optimization from angles found for similar nodes, and is updated
+    with the optimized angles.
+
+    seed_simulator, if given, seeds the shots of the sampling simulators, with
+    a seed derived for every mixer and inner round (see
+    utils.execution.template_seed).
     """
 
+    # precompute the adjacency lookups once for the whole solve
+    G = as_graph_context(G)
+
     # Initialization
-    if sim == 'statevector' or sim == 'qasm':
-        backend = Aer.get_backend(sim+'_simulator', max_parallel_threads=threads)
-    elif sim == 'aer':
-        backend = Aer.get_backend(name='aer_simulator', method='statevector',
-                                      max_parallel_threads=threads)
-    elif sim == 'cloud':
-        raise Exception('NOT YET IMPLEMENTED')
+    if sim == 'native':
+        backend = None
     else:
-        raise Exception('Unknown simulator:', sim)
+        backend = get_backend(sim, threads)
 
     # Select an ordering for the partial mixers
     if mixer_order == None:
@@ -310,31 +465,22 @@ def solve_mis_qls(init_state, G, P=1, m=1, mixer_order=None, threshold=1e-5,
         cur_permutation = mixer_order
 
     history = []
+    scheduler = None
+    native = None
+    template = None
 
     # This function will be what scipy.minimize optimizes
     def f(params):
-        # Generate a circuit
-        circ = qls_ansatz.gen_qlsa(G, P=P, params=params,
-                     init_state=cur_init_state, barriers=0, decompose_toffoli=1,
-                    mixer_order=cur_permutation, verbose=0, param_lim=param_lim)
-
-        if sim == 'qasm' or sim == 'aer':
-            circ.measure_all()
+        if sim == 'native':
+            return native.cost(params)
 
         # Compute the cost function
-        result = execute(circ, backend=backend, shots=shots).result()
-        if sim == 'statevector':
-            statevector = Statevector(result.get_statevector(circ))
-            probs = strip_ancillas(statevector.probabilities_dict(decimals=5), circ)
-        elif sim == 'qasm' or sim == 'aer':
-            counts = result.get_counts(circ)
-            probs = strip_ancillas({key: val/shots for key, val in counts.items()}, circ)
-
-        avg_cost = 0
-        for sample in probs.keys():
-            x = [int(bit) for bit in list(sample)]
-            # Cost function is Hamming weight
-            avg_cost += probs[sample] * sum(x)
+        cur_shots = shots if scheduler is None else scheduler.shots
+        # Cost function is Hamming weight
+        avg_cost, variance = template.hamming_weight_moments([params], cur_shots)[0]
+
+        if scheduler is not None:
+            scheduler.record(params, -avg_cost, variance, cur_shots)
 
         # Return the negative of the cost for minimization
         #print('Expectation value:', avg_cost)
@@ -347,10 +493,17 @@ def solve_mis_qls(init_state, G, P=1, m=1, mixer_order=None, threshold=1e-5,
     best_params = None
     best_perm = copy.copy(cur_permutation)
 
+    # Resume from the last checkpoint, if there is one
+    ckpt = LoopCheckpoint(checkpoint, lambda: (best_indset, best_init_state, cur_init_state,
+                                               best_params, best_perm, cur_permutation, history))
+    if ckpt.resumed is not None:
+        (best_indset, best_init_state, cur_init_state, best_params, best_perm,
+         cur_permutation, history) = ckpt.resume()
+        new_hamming_weight = hamming_weight(best_indset)
+
     # Randomly permute the order of mixer unitaries m times
-    for mixer_round in range(1, m+1):
-        mixer_history = []
-        inner_round = 1
+    for mixer_round in range(ckpt.start_round, m+1):
+        mixer_history, inner_round = ckpt.round_state(mixer_round)
         new_hamming_weight = hamming_weight(cur_init_state)
 
         # Attempt to improve the Hamming weight until no further improvements can be made
@@ -367,32 +520,52 @@ def solve_mis_qls(init_state, G, P=1, m=1, mixer_order=None, threshold=1e-5,
             print('\tNum params =', num_params)
             # Important to start from random initial points
             #init_params = np.zeros(num_params)
-            init_params = np.random.uniform(low=0.0, high=2*np.pi, size=num_params)
+            if warm_start is not None:
+                init_params = warm_start.suggest(G, 'qls', P, cur_init_state,
+                                                 cur_permutation, param_lim=param_lim)
+            else:
+                init_params = np.random.uniform(low=0.0, high=2*np.pi, size=num_params)
             print('\tCurrent Mixer Order:', cur_permutation)
 
-            out = minimize(f, x0=init_params, method='COBYLA')
+            if shot_schedule and sim not in ('statevector', 'native'):
+                scheduler = ShotScheduler(shots)
+            if sim == 'native':
+                native = NativeAnsatz(G, 'qls', P, init_state=cur_init_state,
+                                      mixer_order=cur_permutation, param_lim=param_lim)
+                if uses_gradient(optimizer):
+                    out = minimize_cost(native.cost_and_gradient, init_params, optimizer, jac=True)
+                else:
+                    out = minimize_cost(native.cost, init_params, optimizer)
+            else:
+                circuit_fn = lambda params: qls_ansatz.gen_qlsa(
+                    G, P=P, params=params, init_state=cur_init_state, barriers=0,
+                    decompose_toffoli=1, mixer_order=cur_permutation, verbose=0,
+                    param_lim=param_lim)
+                template = CircuitTemplate(
+                    circuit_fn, num_params, backend,
+                    seed_simulator=template_seed(seed_simulator, mixer_round, inner_round, 0))
+                jac = None
+                if uses_gradient(optimizer):
+                    jac = ParameterShiftGradient(
+                        circuit_fn, num_params, backend, shots,
+                        seed_simulator=template_seed(seed_simulator, mixer_round, inner_round,
+                                                     1)).gradient
+                out = minimize_cost(f, init_params, optimizer, jac=jac)
+            total_shots = scheduler.total_shots if scheduler is not None else out['nfev'] * shots
 
             opt_params = out['x']
+            if warm_start is not None:
+                warm_start.update(G, 'qls', P, cur_init_state, cur_permutation,
+                                  opt_params, param_lim=param_lim)
             opt_cost = out['fun']
             #print('\tOptimal Parameters:', opt_params)
             print('\tOptimal cost:', opt_cost)
 
             # Get the results of the optimized circuit
-            opt_circ = qls_ansatz.gen_qlsa(G, P=P, params=opt_params,
-                               init_state=cur_init_state, barriers=0,
-                               decompose_toffoli=1, mixer_order=cur_permutation,
-                               verbose=0, param_lim=param_lim)
-
-            if sim == 'qasm' or sim == 'aer':
-                opt_circ.measure_all()
-
-            result = execute(opt_circ, backend=backend, shots=shots).result()
-            if sim == 'statevector':
-                statevector = Statevector(result.get_statevector(opt_circ))
-                probs = strip_ancillas(statevector.probabilities_dict(decimals=5), opt_circ)
-            elif sim == 'qasm' or sim == 'aer':
-                counts = result.get_counts(opt_circ)
-                probs = strip_ancillas({key: val/shots for key, val in counts.items()}, opt_circ)
+            if sim == 'native':
+                probs = native.probabilities(opt_params, threshold=threshold)
+            else:
+                probs = template.probabilities([opt_params], shots)[0]
 
             # Select the top [cutoff] counts
             top_counts = sorted([(key, val) for key, val in probs.items() if val > threshold],
@@ -410,7 +583,9 @@ def solve_mis_qls(init_state, G, P=1, m=1, mixer_order=None, threshold=1e-5,
             # Save current results to history
             inner_history = {'mixer_round':mixer_round, 'inner_round':inner_round,
                              'cost':opt_cost, 'init_state':cur_init_state,
-                             'mixer_order':copy.copy(cur_permutation), 'num_params':num_params}
+                             'mixer_order':copy.copy(cur_permutation), 'num_params':num_params,
+                             'total_shots':total_shots,
+                             'timing':template.timing() if template is not None else None}
             mixer_history.append(inner_history)
 
             # If no improvement was made, break and go to next mixer round
@@ -430,6 +605,7 @@ def solve_mis_qls(init_state, G, P=1, m=1, mixer_order=None, threshold=1e-5,
             # Go through another execution of this While loop, with the same
             # mixer order
             inner_round += 1
+            ckpt.save(mixer_round, inner_round, mixer_history)
 
         # Save the history of the current mixer round
         history.append(mixer_history)
@@ -447,31 +623,49 @@ def solve_mis_qls(init_state, G, P=1, m=1, mixer_order=None, threshold=1e-5,
             else:
                 cur_permutation[i] = perm_queue.get()
 
+        ckpt.save(mixer_round+1, 1, [])
+
     print('\tRETURNING, best hamming weight:', new_hamming_weight)
     return best_indset, best_params, best_init_state, best_perm, history
 
 
 def solve_mis_qaoa(init_state, G, P=1, m=1, mixer_order=None, threshold=1e-5,
                    cutoff=1, sim='aer', shots=8192, verbose=0,
-                   threads=0):
+                   threads=0, checkpoint=None, shot_schedule=False,
+                   optimizer='COBYLA', warm_start=None, seed_simulator=None):
     """
     Find the MIS of G using a Quantum Alternating Operator Ansatz (QAOA), the
     structure of the driver and mixer unitaries is the same as that used by
     DQVA and QLS, but each unitary is parameterized by a single angle:
 
         U_C_P(gamma_P) * U_M_P(beta_P) * ... * U_C_1(gamma_1) * U_M_1(beta_1)|0>
+
+    checkpoint is an optional path used to save and resume the outer loop
+    (see solve_mis_cut_dqva). If shot_schedule is set, the sampled cost
+    function uses a utils.shot_schedule.ShotScheduler, growing from few shots
+    up to shots.
+
+    optimizer is a scipy.optimize.minimize method or 'adam'. Methods which
+    take a gradient get it from the adjoint method when sim='native' (see
+    utils.native_sim) and from the parameter shift rule otherwise.
+
+    warm_start is an optional utils.warm_start.WarmStartStore which seeds
+    each optimization from angles found for similar nodes, and is updated
+    with the optimized angles.
+
+    seed_simulator, if given, seeds the shots of the sampling simulators, with
+    a seed derived for every mixer and inner round (see
+    utils.execution.template_seed).
     """
 
+    # precompute the adjacency lookups once for the whole solve
+    G = as_graph_context(G)
+
     # Initialization
-    if sim == 'statevector' or sim == 'qasm':
-        backend = Aer.get_backend(sim+'_simulator', max_parallel_threads=threads)
-    elif sim == 'aer':
-        backend = Aer.get_backend(name='aer_simulator', method='statevector',
-                                      max_parallel_threads=threads)
-    elif sim == 'cloud':
-        raise Exception('NOT YET IMPLEMENTED!')
+    if sim == 'native':
+        backend = None
     else:
-        raise Exception('Unknown simulator:', sim)
+        backend = get_backend(sim, threads)
 
     # Select an ordering for the partial mixers
     if mixer_order == None:
@@ -480,31 +674,22 @@ def solve_mis_qaoa(init_state, G, P=1, m=1, mixer_order=None, threshold=1e-5,
         cur_permutation = mixer_order
 
     history = []
+    scheduler = None
+    native = None
+    template = None
 
     # This function will be what scipy.minimize optimizes
     def f(params):
-        # Generate a QAOA circuit
-        circ = qaoa.gen_qaoa(G, P, params=params, init_state=cur_init_state,
-                             barriers=0, decompose_toffoli=1,
-                             mixer_order=cur_permutation, verbose=0)
-
-        if sim == 'qasm' or sim == 'aer':
-            circ.measure_all()
+        if sim == 'native':
+            return native.cost(params)
 
         # Compute the cost function
-        result = execute(circ, backend=backend, shots=shots).result()
-        if sim == 'statevector':
-            statevector = Statevector(result.get_statevector(circ))
-            probs = strip_ancillas(statevector.probabilities_dict(decimals=5), circ)
-        elif sim == 'qasm' or sim == 'aer':
-            counts = result.get_counts(circ)
-            probs = strip_ancillas({key: val/shots for key, val in counts.items()}, circ)
-
-        avg_cost = 0
-        for sample in probs.keys():
-            x = [int(bit) for bit in list(sample)]
-            # Cost function is Hamming weight
-            avg_cost += probs[sample] * sum(x)
+        cur_shots = shots if scheduler is None else scheduler.shots
+        # Cost function is Hamming weight
+        avg_cost, variance = template.hamming_weight_moments([params], cur_shots)[0]
+
+        if scheduler is not None:
+            scheduler.record(params, -avg_cost, variance, cur_shots)
 
         # Return the negative of the cost for minimization
         #print('Expectation value:', avg_cost)
@@ -517,10 +702,17 @@ def solve_mis_qaoa(init_state, G, P=1, m=1, mixer_order=None, threshold=1e-5,
     best_params = None
     best_perm = copy.copy(cur_permutation)
 
+    # Resume from the last checkpoint, if there is one
+    ckpt = LoopCheckpoint(checkpoint, lambda: (best_indset, best_init_state, cur_init_state,
+                                               best_params, best_perm, cur_permutation, history))
+    if ckpt.resumed is not None:
+        (best_indset, best_init_state, cur_init_state, best_params, best_perm,
+         cur_permutation, history) = ckpt.resume()
+        new_hamming_weight = hamming_weight(best_indset)
+
     # Randomly permute the order of mixer unitaries m times
-    for mixer_round in range(1, m+1):
-        mixer_history = []
-        inner_round = 1
+    for mixer_round in range(ckpt.start_round, m+1):
+        mixer_history, inner_round = ckpt.round_state(mixer_round)
         new_hamming_weight = hamming_weight(cur_init_state)
 
         # Attempt to improve the Hamming weight until no further improvements can be made
@@ -535,33 +727,51 @@ def solve_mis_qaoa(init_state, G, P=1, m=1, mixer_order=None, threshold=1e-5,
             print('\tNum params =', num_params)
             # Important to start from random initial points
             #init_params = np.zeros(num_params)
-            init_params = np.random.uniform(low=0.0, high=2*np.pi, size=num_params)
+            if warm_start is not None:
+                init_params = warm_start.suggest(G, 'qaoa', P, cur_init_state,
+                                                 cur_permutation)
+            else:
+                init_params = np.random.uniform(low=0.0, high=2*np.pi, size=num_params)
             print('\tCurrent Mixer Order:', cur_permutation)
 
-            out = minimize(f, x0=init_params, method='COBYLA')
+            if shot_schedule and sim not in ('statevector', 'native'):
+                scheduler = ShotScheduler(shots)
+            if sim == 'native':
+                native = NativeAnsatz(G, 'qaoa', P, init_state=cur_init_state,
+                                      mixer_order=cur_permutation)
+                if uses_gradient(optimizer):
+                    out = minimize_cost(native.cost_and_gradient, init_params, optimizer, jac=True)
+                else:
+                    out = minimize_cost(native.cost, init_params, optimizer)
+            else:
+                circuit_fn = lambda params: qaoa.gen_qaoa(
+                    G, P, params=params, init_state=cur_init_state, barriers=0,
+                    decompose_toffoli=1, mixer_order=cur_permutation, verbose=0)
+                template = CircuitTemplate(
+                    circuit_fn, num_params, backend,
+                    seed_simulator=template_seed(seed_simulator, mixer_round, inner_round, 0))
+                jac = None
+                if uses_gradient(optimizer):
+                    jac = ParameterShiftGradient(
+                        circuit_fn, num_params, backend, shots,
+                        seed_simulator=template_seed(seed_simulator, mixer_round, inner_round,
+                                                     1)).gradient
+                out = minimize_cost(f, init_params, optimizer, jac=jac)
+            total_shots = scheduler.total_shots if scheduler is not None else out['nfev'] * shots
 
             opt_params = out['x']
+            if warm_start is not None:
+                warm_start.update(G, 'qaoa', P, cur_init_state, cur_permutation,
+                                  opt_params)
             opt_cost = out['fun']
             #print('\tOptimal Parameters:', opt_params)
             print('\tOptimal cost:', opt_cost)
 
             # Get the results of the optimized circuit
-            opt_circ = qaoa.gen_qaoa(G, P, params=opt_params,
-                                     init_state=cur_init_state, barriers=0,
-                                     decompose_toffoli=1,
-                                     mixer_order=cur_permutation,
-                                     verbose=0)
-
-            if sim == 'qasm' or sim == 'aer':
-                opt_circ.measure_all()
-
-            result = execute(opt_circ, backend=backend, shots=shots).result()
-            if sim == 'statevector':
-                statevector = Statevector(result.get_statevector(opt_circ))
-                probs = strip_ancillas(statevector.probabilities_dict(decimals=5), opt_circ)
-            elif sim == 'qasm' or sim == 'aer':
-                counts = result.get_counts(opt_circ)
-                probs = strip_ancillas({key: val/shots for key, val in counts.items()}, opt_circ)
+            if sim == 'native':
+                probs = native.probabilities(opt_params, threshold=threshold)
+            else:
+                probs = template.probabilities([opt_params], shots)[0]
 
             # Select the top [cutoff] bitstrings
             top_counts = sorted([(key, val) for key, val in probs.items() if val > threshold],
@@ -580,7 +790,9 @@ def solve_mis_qaoa(init_state, G, P=1, m=1, mixer_order=None, threshold=1e-5,
             # Save current results to history
             inner_history = {'mixer_round':mixer_round, 'inner_round':inner_round,
                              'cost':opt_cost, 'init_state':cur_init_state,
-                             'mixer_order':copy.copy(cur_permutation), 'num_params':num_params}
+                             'mixer_order':copy.copy(cur_permutation), 'num_params':num_params,
+                             'total_shots':total_shots,
+                             'timing':template.timing() if template is not None else None}
             mixer_history.append(inner_history)
 
             # If no improvement was made, break and go to next mixer round
@@ -597,6 +809,7 @@ def solve_mis_qaoa(init_state, G, P=1, m=1, mixer_order=None, threshold=1e-5,
             print('\tFound new independent set: {}, Hamming weight = {}'.format(
                                                best_indset, new_hamming_weight))
             inner_round += 1
+            ckpt.save(mixer_round, inner_round, mixer_history)
 
         # Save the history of the current mixer round
         history.append(mixer_history)
@@ -604,28 +817,47 @@ def solve_mis_qaoa(init_state, G, P=1, m=1, mixer_order=None, threshold=1e-5,
         # Choose a new permutation of the mixer unitaries
         cur_permutation = list(np.random.permutation(list(G.nodes)))
 
+        ckpt.save(mixer_round+1, 1, [])
+
     print('\tRETURNING, best hamming weight:', new_hamming_weight)
     return best_indset, best_params, best_init_state, best_perm, history
 
 
 def solve_mis_dqva(init_state, G, P=1, m=1, mixer_order=None, threshold=1e-5,
-                   cutoff=1, sim='aer', shots=8192, verbose=0, threads=0):
+                   cutoff=1, sim='aer', shots=8192, verbose=0, threads=0,
+                   checkpoint=None, shot_schedule=False,
+                   optimizer='COBYLA', warm_start=None, seed_simulator=None):
     """
     Find the MIS of G using the dynamic quantum variational ansatz (DQVA),
     this ansatz has the same structure as QLS but does not include QLS's
     parameter limit
+
+    checkpoint is an optional path used to save and resume the outer loop
+    (see solve_mis_cut_dqva). If shot_schedule is set, the sampled cost
+    function uses a utils.shot_schedule.ShotScheduler, growing from few shots
+    up to shots.
+
+    optimizer is a scipy.optimize.minimize method or 'adam'. Methods which
+    take a gradient get it from the adjoint method when sim='native' (see
+    utils.native_sim) and from the parameter shift rule otherwise.
+
+    warm_start is an optional utils.warm_start.WarmStartStore which seeds
+    each optimization from angles found for similar nodes, and is updated
+    with the optimized angles.
+
+    seed_simulator, if given, seeds the shots of the sampling simulators, with
+    a seed derived for every mixer and inner round (see
+    utils.execution.template_seed).
     """
 
+    # precompute the adjacency lookups once for the whole solve
+    G = as_graph_context(G)
+
     # Initialization
-    if sim == 'statevector' or sim == 'qasm':
-        backend = Aer.get_backend(sim+'_simulator', max_parallel_threads=threads)
-    elif sim == 'aer':
-        backend = Aer.get_backend(name='aer_simulator', method='statevector',
-                                      max_parallel_threads=threads)
-    elif sim == 'cloud':
-        raise Exception('NOT YET IMPLEMENTED!')
+    if sim == 'native':
+        backend = None
     else:
-        raise Exception('Unknown simulator:', sim)
+        backend = get_backend(sim, threads)
 
     # Select and order for the partial mixers
     if mixer_order == None:
@@ -634,31 +866,22 @@ def solve_mis_dqva(init_state, G, P=1, m=1, mixer_order=None, threshold=1e-5,
         cur_permutation = mixer_order
 
     history = []
+    scheduler = None
+    native = None
+    template = None
 
     # This is the function which scipy.minimize will optimize
     def f(params):
-        # Generate a QAOA circuit
-        circ = dqv_ansatz.gen_dqva(G, P, params=params,
-                     init_state=cur_init_state, barriers=0, decompose_toffoli=1,
-                     mixer_order=cur_permutation, verbose=0)
-
-        if sim == 'qasm' or sim == 'aer':
-            circ.measure_all()
+        if sim == 'native':
+            return native.cost(params)
 
         # Compute the cost function
-        result = execute(circ, backend=backend, shots=shots).result()
-        if sim == 'statevector':
-            statevector = Statevector(result.get_statevector(circ))
-            probs = strip_ancillas(statevector.probabilities_dict(decimals=5), circ)
-        elif sim == 'qasm' or sim == 'aer':
-            counts = result.get_counts(circ)
-            probs = strip_ancillas({key: val/shots for key, val in counts.items()}, circ)
-
-        avg_cost = 0
-        for sample in probs.keys():
-            x = [int(bit) for bit in list(sample)]
-            # Cost function is Hamming weight
-            avg_cost += probs[sample] * sum(x)
+        cur_shots = shots if scheduler is None else scheduler.shots
+        # Cost function is Hamming weight
+        avg_cost, variance = template.hamming_weight_moments([params], cur_shots)[0]
+
+        if scheduler is not None:
+            scheduler.record(params, -avg_cost, variance, cur_shots)
 
         # Return the negative of the cost for minimization
         #print('Expectation value:', avg_cost)
@@ -671,10 +894,17 @@ def solve_mis_dqva(init_state, G, P=1, m=1, mixer_order=None, threshold=1e-5,
     best_params = None
     best_perm = copy.copy(cur_permutation)
 
+    # Resume from the last checkpoint, if there is one
+    ckpt = LoopCheckpoint(checkpoint, lambda: (best_indset, best_init_state, cur_init_state,
+                                               best_params, best_perm, cur_permutation, history))
+    if ckpt.resumed is not None:
+        (best_indset, best_init_state, cur_init_state, best_params, best_perm,
+         cur_permutation, history) = ckpt.resume()
+        new_hamming_weight = hamming_weight(best_indset)
+
     # Randomly permute the order of mixer unitaries m times
-    for mixer_round in range(1, m+1):
-        mixer_history = []
-        inner_round = 1
+    for mixer_round in range(ckpt.start_round, m+1):
+        mixer_history, inner_round = ckpt.round_state(mixer_round)
         new_hamming_weight = hamming_weight(cur_init_state)
 
         # Attempt to improve the Hamming weight until no further improvements can be made
@@ -688,32 +918,51 @@ def solve_mis_dqva(init_state, G, P=1, m=1, mixer_order=None, threshold=1e-5,
             print('\tNum params =', num_params)
             # Important to start from random initial points
             #init_params = np.zeros(num_params)
-            init_params = np.random.uniform(low=0.0, high=2*np.pi, size=num_params)
+            if warm_start is not None:
+                init_params = warm_start.suggest(G, 'dqva', P, cur_init_state,
+                                                 cur_permutation)
+            else:
+                init_params = np.random.uniform(low=0.0, high=2*np.pi, size=num_params)
             print('\tCurrent Mixer Order:', cur_permutation)
 
-            out = minimize(f, x0=init_params, method='COBYLA')
+            if shot_schedule and sim not in ('statevector', 'native'):
+                scheduler = ShotScheduler(shots)
+            if sim == 'native':
+                native = NativeAnsatz(G, 'dqva', P, init_state=cur_init_state,
+                                      mixer_order=cur_permutation)
+                if uses_gradient(optimizer):
+                    out = minimize_cost(native.cost_and_gradient, init_params, optimizer, jac=True)
+                else:
+                    out = minimize_cost(native.cost, init_params, optimizer)
+            else:
+                circuit_fn = lambda params: dqv_ansatz.gen_dqva(
+                    G, P, params=params, init_state=cur_init_state, barriers=0,
+                    decompose_toffoli=1, mixer_order=cur_permutation, verbose=0)
+                template = CircuitTemplate(
+                    circuit_fn, num_params, backend,
+                    seed_simulator=template_seed(seed_simulator, mixer_round, inner_round, 0))
+                jac = None
+                if uses_gradient(optimizer):
+                    jac = ParameterShiftGradient(
+                        circuit_fn, num_params, backend, shots,
+                        seed_simulator=template_seed(seed_simulator, mixer_round, inner_round,
+                                                     1)).gradient
+                out = minimize_cost(f, init_params, optimizer, jac=jac)
+            total_shots = scheduler.total_shots if scheduler is not None else out['nfev'] * shots
 
             opt_params = out['x']
+            if warm_start is not None:
+                warm_start.update(G, 'dqva', P, cur_init_state, cur_permutation,
+                                  opt_params)
             opt_cost = out['fun']
             #print('\tOptimal Parameters:', opt_params)
             print('\tOptimal cost:', opt_cost)
 
             # Get the results of the optimized circuit
-            opt_circ = dqv_ansatz.gen_dqva(G, P, params=opt_params,
-                               init_state=cur_init_state, barriers=0,
-                               decompose_toffoli=1, mixer_order=cur_permutation,
-                               verbose=0)
-
-            if sim == 'qasm' or sim == 'aer':
-                opt_circ.measure_all()
-
-            result = execute(opt_circ, backend=backend, shots=shots).result()
-            if sim == 'statevector':
-                statevector = Statevector(result.get_statevector(opt_circ))
-                probs = strip_ancillas(statevector.probabilities_dict(decimals=5), opt_circ)
-            elif sim == 'qasm' or sim == 'aer':
-                counts = result.get_counts(opt_circ)
-                probs = strip_ancillas({key: val/shots for key, val in counts.items()}, opt_circ)
+            if sim == 'native':
+                probs = native.probabilities(opt_params, threshold=threshold)
+            else:
+                probs = template.probabilities([opt_params], shots)[0]
 
             # Select the top [cutoff] bitstrings
             top_counts = sorted([(key, val) for key, val in probs.items() if val > threshold],
@@ -731,7 +980,9 @@ def solve_mis_dqva(init_state, G, P=1, m=1, mixer_order=None, threshold=1e-5,
             # Save current results to history
             inner_history = {'mixer_round':mixer_round, 'inner_round':inner_round,
                              'cost':opt_cost, 'init_state':cur_init_state,
-                             'mixer_order':copy.copy(cur_permutation), 'num_params':num_params}
+                             'mixer_order':copy.copy(cur_permutation), 'num_params':num_params,
+                             'total_shots':total_shots,
+                             'timing':template.timing() if template is not None else None}
             mixer_history.append(inner_history)
 
             # If no improvement was made, break and go to next mixer round
@@ -748,6 +999,7 @@ def solve_mis_dqva(init_state, G, P=1, m=1, mixer_order=None, threshold=1e-5,
             print('\tFound new independent set: {}, Hamming weight = {}'.format(
                                                best_indset, new_hamming_weight))
             inner_round += 1
+            ckpt.save(mixer_round, inner_round, mixer_history)
 
         # Save the history of the current mixer round
         history.append(mixer_history)
@@ -755,9 +1007,122 @@ def solve_mis_dqva(init_state, G, P=1, m=1, mixer_order=None, threshold=1e-5,
         # Choose a new permutation of the mixer unitaries
         cur_permutation = list(np.random.permutation(list(G.nodes)))
 
+        ckpt.save(mixer_round+1, 1, [])
+
     print('\tRETURNING, best hamming weight:', new_hamming_weight)
     return best_indset, best_params, best_init_state, best_perm, history
 
+
+def _speculative_round(solver, init_state, graph, seed_seq, kwargs):
+    """
+    Run a single mixer round of solver in a worker process, and return its
+    output along with the fragments it stored, if any
+    """
+    round_seed, sim_seed = (int(seed) for seed in seed_seq.generate_state(2))
+    np.random.seed(round_seed)
+    random.seed(round_seed)
+    if 'seed_simulator' in inspect.signature(solver).parameters:
+        kwargs = dict(kwargs, seed_simulator=sim_seed)
+    out = solver(init_state, graph, m=1, **kwargs)
+    fragment_table = kwargs.get('fragment_table')
+    return out, fragment_table.state() if fragment_table is not None else None
+
+
+def solve_mis_speculative(solver, init_state, G, m=4, workers=None, seed=None,
+                          start_round=1, callback=None, **kwargs):
+    """
+    Run the m mixer rounds of one of the solve_mis_* functions speculatively
+    in a process pool.
+
+    Up to workers rounds, each with its own random mixer permutation, are
+    started from the incumbent independent set at once. Results are committed
+    in round order: the first round which improves the incumbent is accepted,
+    and every later round which was started from the old incumbent is
+    cancelled, or ignored if it is already running, and restarted from the new
+    one. Round i is always seeded from the i-th child of SeedSequence(seed),
+    which seeds the numpy and python generators and, for the solvers which
+    take a seed_simulator, the shots of the simulator. So the result and
+    history are the same as running the rounds one after another and do not
+    depend on workers. The fragment tomography of solve_mis_cut_dqva is not
+    seeded, so with it this only holds for the partitions, hot nodes and mixer
+    orders, not for the sampled cost. Rounds before start_round are
+    skipped, e.g. when resuming with the same seed. Rounds still pending when
+    the solve ends, or fails, are cancelled.
+
+    Any other keyword arguments are passed on to solver. Pass the partition
+    (for solvers which take one) to keep every round on the same partition;
+    otherwise each round partitions the graph anew. A fragment_table is
+    filled with the fragments of every committed round. solver must not be
+    given a checkpoint, since all rounds would share it.
+
+    If callback is given, callback(round, out, incumbent) is called as every
+    round is committed, with the output of that round alone and the
+    incumbent after it. Returns the output of solver for the round which
+    found the best independent set, with its history replaced by the history
+    of all rounds.
+    """
+    if kwargs.get('checkpoint') is not None:
+        raise ValueError('The speculative rounds cannot share a checkpoint')
+    fragment_table = kwargs.pop('fragment_table', None)
+    if fragment_table is not None:
+        kwargs['fragment_table'] = FragmentTable()
+
+    round_seeds = np.random.SeedSequence(seed).spawn(m)
+    max_workers = workers if workers is not None else (os.cpu_count() or 1)
+
+    best_out = None
+    incumbent = init_state
+    history = []
+    executor = concurrent.futures.ProcessPoolExecutor(max_workers=max_workers)
+    try:
+        # map round number -> future, always started from the current incumbent
+        running = {}
+        next_round = start_round
+        for cur_round in range(start_round, m+1):
+            # keep the pool full with rounds started from the incumbent
+            while next_round <= m and len(running) < max_workers:
+                running[next_round] = executor.submit(_speculative_round, solver, incumbent,
+                                                      G, round_seeds[next_round-1], kwargs)
+                next_round += 1
+
+            out, table_state = running.pop(cur_round).result()
+            if table_state is not None:
+                fragment_table.fragments.update(table_state['fragments'])
+                fragment_table.plans.update(table_state['plans'])
+
+            round_history = []
+            for inner_history in out[-1][0]:
+                if isinstance(inner_history, dict):
+                    inner_history['mixer_round'] = cur_round
+                else:
+                    inner_history = inner_history._replace(mixer_round=cur_round)
+                round_history.append(inner_history)
+            history.append(round_history)
+
+            if best_out is None:
+                best_out = out
+            if hamming_weight(out[0]) > hamming_weight(incumbent):
+                best_out = out
+                incumbent = out[0]
+                print('\tRound {} committed new independent set: {}, Hamming weight = {}'.format(
+                      cur_round, incumbent, hamming_weight(incumbent)))
+                # restart the later rounds from the new incumbent
+                for later_round, later_future in list(running.items()):
+                    later_future.cancel()
+                    running[later_round] = executor.submit(_speculative_round, solver,
+                                                           incumbent, G,
+                                                           round_seeds[later_round-1], kwargs)
+
+            if callback is not None:
+                callback(cur_round, tuple(out[:-1]) + ([round_history],), incumbent)
+    finally:
+        # drop the rounds which have not started, e.g. after an exception
+        executor.shutdown(wait=True, cancel_futures=True)
+
+    print('\tRETURNING, best hamming weight:', hamming_weight(incumbent))
+    return tuple(best_out[:-1]) + (history,)
+
+
 def main():
     G = nx.Graph()
     G.add_edges_from([(0, 1), (0, 3), (1, 2), (2, 3), (3, 4), (4, 5), (4, 6), (5, 7), (6, 7)])
@@ -1,9 +1,8 @@
 import time, random, queue, copy, itertools
+import os, concurrent.futures
 import numpy as np
 import networkx as nx
-import metis
 
-from networkx.algorithms.community.kernighan_lin import kernighan_lin_bisection
 from scipy.optimize import minimize
 
 #from cutqc.main import CutQC
@@ -19,36 +18,104 @@ import qsplit.qsplit_mlrecon_methods as qmm
 from utils.graph_funcs import *
 from utils.helper_funcs import *
 from utils.cutting_funcs import *
+from utils.graph_context import as_graph_context
+from utils.execution import get_backend, CircuitTemplate
+from utils.partition_funcs import select_partition
+
+
+def _subgraph_cost(params, template, shots):
+    # Compute the average Hamming weight.
+    avg_weight = template.hamming_weight_moments([params], shots)[0][0]
+
+    # we want to maximize avg_weight <--> minimize -avg_weight
+    return -avg_weight
+
+
+def _optimize_subgraph(args):
+    """
+    Optimize the dqva of a single subgraph and return its most likely
+    bitstring. Runs in a worker process with its own seed and backend.
+    """
+    (sub_idx, subgraph, cut_nodes, init_state, mixer_order, P, shots, threshold,
+     cutoff, seed_seq, threads, verbose) = args
+
+    sub_seed = int(seed_seq.generate_state(1)[0])
+    np.random.seed(sub_seed)
+    random.seed(sub_seed)
+    backend = get_backend('qasm', threads)
+
+    # Set the correct parameters for the subgraph dqva
+    num_params = P * (subgraph.number_of_nodes() + 1)
+    init_params = np.random.uniform(low=0.0, high=2*np.pi, size=num_params)
+
+    # Map between Graph nodes and qubits
+    nodes_to_qubits = [n for n in subgraph.nodes]
+    print('START SUBGRAPH', sub_idx)
+
+    # Form the corresponding initial state
+    rev_init_state = list(reversed(init_state))
+    sub_init_state = ''.join([rev_init_state[n] for n in reversed(nodes_to_qubits)])
+
+    if verbose:
+        print('\tNum params =', num_params)
+
+    circuit_fn = lambda params: subgraph_dqva.gen_dqva(subgraph, cut_nodes, nodes_to_qubits,
+                                                       params=params, init_state=sub_init_state,
+                                                       barriers=0, full_mixer_order=mixer_order,
+                                                       verbose=0)
+    template = CircuitTemplate(circuit_fn, num_params, backend)
+    out = minimize(_subgraph_cost, init_params, args=(template, shots), method='COBYLA')
+    opt_params = out['x']
+    opt_cost = out['fun']
+    if verbose:
+        print('\tSubgraph {} optimal cost: {}, {} function evaluations'.format(
+              sub_idx, opt_cost, out['nfev']))
+
+    # Get the results of the optimized circuit
+    probs = template.probabilities([opt_params], shots)[0]
+
+    # Select the top [cutoff] probs
+    top_probs = sorted([(key, val) for key, val in probs.items() if val > threshold],
+                    key=lambda tup: tup[1], reverse=True)[:cutoff]
+
+    if verbose:
+        print('\tFound MIS: {} with probability {:.4f}'.format(top_probs[0][0], top_probs[0][1]))
+
+    return {'bitstr':top_probs[0][0], 'nodes_to_qubits':nodes_to_qubits,
+            'opt_params':opt_params, 'cost':opt_cost, 'function_evals':out['nfev'],
+            'num_params':num_params, 'timing':template.timing()}
 
 
 def solve_mis_no_cut_dqva(init_state, graph, P=1, m=4, threshold=1e-5, cutoff=1,
                           sim='aer', shots=8192, verbose=0, max_cuts=1,
-                          partition_alg='klb', num_frags=2):
+                          partition_alg='klb', num_frags=2, max_frag_qubits=None,
+                          workers=None, canonical_cache=None, partition=None):
     """
     Find the MIS of G using the dqva and partition but no circuit cutting
+
+    The subgraph circuits are independent, so each subgraph is optimized in
+    its own worker process (up to workers at once, default one per subgraph).
+    Every subgraph gets its own seed, drawn from numpy's global random state,
+    so the results do not depend on the number of workers.
+
+    The cost, function_evals and num_params of each history entry are summed
+    over the subgraphs, and the per-subgraph values are kept in
+    subgraph_costs, subgraph_function_evals and subgraph_num_params, in
+    partition order.
+
+    canonical_cache is an optional utils.canonical_cache.CanonicalCache
+    which holds the 'best' and 'capped' partitions of isomorphic graphs.
+    If partition is given, it is used as is and partition_alg is ignored.
     """
 
-    # Initialization
-    # NOTE: the backend to use is very version dependent. 
-    # Qiskit 0.23.2 does not support the newer Aer_simulators that
-    # are available in Qiskit 0.26.0.
-    # For now, just use the statevector_simulator
-    #backend = Aer.get_backend(name='aer_simulator', method='statevector')
-    backend = Aer.get_backend('qasm_simulator')
-
-    if partition_alg == 'klb':
-        # Kernighan-Lin partitions a graph into two relatively equal subgraphs
-        partition = kernighan_lin_bisection(graph)
-    elif partition_alg == 'metis':
-        # For generalizing to >2 subgraphs, we'll use the METIS graph partitioning software
-        #    https://metis.readthedocs.io/en/latest/
-        partition_assignment = metis.part_graph(graph, nparts=num_frags)[1]
-        partition = [[] for _ in set(partition_assignment)]
-        for node, assignment in zip(list(graph), partition_assignment):
-            partition[assignment].append(node)
-    else:
-        raise ValueError(f"Unknown graph partitioning algorithm: {partition_alg}")
+    if partition is None:
+        partition = select_partition(graph, partition_alg, num_frags, max_cuts,
+                                     max_frag_qubits=max_frag_qubits,
+                                     canonical_cache=canonical_cache, verbose=verbose)
+    # precompute the adjacency and partition lookups once for the whole solve
+    graph = as_graph_context(graph, partition)
     subgraphs, cut_edges = get_subgraphs(graph, partition)
+    subgraphs = [as_graph_context(subgraph) for subgraph in subgraphs]
     print('='*30)
     print('GRAPH PARTITIONING')
     print(f'Partitioned graph into {len(subgraphs)} subgraphs = {partition}')
@@ -64,28 +131,6 @@ def solve_mis_no_cut_dqva(init_state, graph, P=1, m=4, threshold=1e-5, cutoff=1,
 
     history = []
 
-    # This function will be what scipy.minimize optimizes
-    def avg_cost(params, *args):
-
-        subgraph, cut_nodes, init_state, nodes_to_qubits = args
-        circ = subgraph_dqva.gen_dqva(subgraph, cut_nodes, nodes_to_qubits,
-                                      params=params, init_state=init_state,
-                                      barriers=0, full_mixer_order=cur_permutation,
-                                      verbose=0)
-
-        circ.measure_all()
-
-        # get output probability distribution for the circuit
-        result = execute(circ, backend=backend, shots=shots).result()
-        counts = result.get_counts(circ)
-        probs = strip_ancillas({key: val/shots for key, val in counts.items()}, circ)
-
-        # Compute the average Hamming weight.
-        avg_weight = sum([prob * hamming_weight(bitstr) for bitstr, prob in probs.items()])
-
-        # we want to maximize avg_weight <--> minimize -avg_weight
-        return -avg_weight
-
     # Begin outer optimization loop
     best_indset = init_state
     best_init_state = init_state
@@ -110,50 +155,25 @@ def solve_mis_no_cut_dqva(init_state, graph, P=1, m=4, threshold=1e-5, cutoff=1,
             if verbose:
                 print('\tCurrent Mixer Order:', cur_permutation)
 
-            subgraph_mis = []
-            for sub_idx, subgraph in enumerate(subgraphs):
-                # Set the correct parameters for the subgraph dqva
-                num_params = P * (subgraph.number_of_nodes() + 1)
-                init_params = np.random.uniform(low=0.0, high=2*np.pi, size=num_params)
-
-                # Map between Graph nodes and qubits
-                nodes_to_qubits = [n for n in subgraph.nodes]
-                print('START SUBGRAPH', sub_idx)
-
-                # Form the corresponding initial state
-                rev_init_state = list(reversed(cur_init_state))
-                sub_init_state = ''.join([rev_init_state[n] for n in reversed(nodes_to_qubits)])
-
-                if verbose:
-                    print('\tNum params =', num_params)
-
-                args = (subgraph, cut_nodes, sub_init_state, nodes_to_qubits)
-                out = minimize(avg_cost, init_params, args=args, method='COBYLA')
-                opt_params = out['x']
-                opt_cost = out['fun']
-                if verbose:
-                    print('\tOptimal cost:', opt_cost)
-                    print('\t{} function evaluations'.format(out['nfev']))
-
-                # Get the results of the optimized circuit
-                opt_circ = subgraph_dqva.gen_dqva(subgraph, cut_nodes, nodes_to_qubits,
-                                                  params=opt_params, init_state=sub_init_state,
-                                                  barriers=0, full_mixer_order=cur_permutation,
-                                                  verbose=0)
-                opt_circ.measure_all()
-                result = execute(opt_circ, backend=backend, shots=shots).result()
-                counts = result.get_counts(opt_circ)
-                probs = strip_ancillas({key: val/shots for key, val in counts.items()}, opt_circ)
-
-                # Select the top [cutoff] probs
-                top_probs = sorted([(key, val) for key, val in probs.items() if val > threshold],
-                                key=lambda tup: tup[1], reverse=True)[:cutoff]
-
-                if verbose:
-                    print('\tFound MIS: {} with probability {:.4f}'.format(top_probs[0][0], top_probs[0][1]))
-
-                assert (cutoff == 1), 'Cutoff must equal 1'
-                subgraph_mis.append((top_probs[0][0], nodes_to_qubits))
+            # Optimize the subgraphs concurrently, with one seed per subgraph
+            sub_seeds = np.random.SeedSequence(np.random.randint(2**32, dtype=np.uint64)).spawn(len(subgraphs))
+            num_workers = min(workers or len(subgraphs), len(subgraphs))
+            # split the cpus between the workers' simulators
+            threads = max((os.cpu_count() or 1) // num_workers, 1)
+            jobs = [(sub_idx, subgraph, cut_nodes, cur_init_state, cur_permutation, P, shots,
+                     threshold, cutoff, sub_seeds[sub_idx], threads, verbose)
+                    for sub_idx, subgraph in enumerate(subgraphs)]
+            assert (cutoff == 1), 'Cutoff must equal 1'
+            if num_workers == 1:
+                # the workers reseed the global random state, keep ours intact
+                np_state, py_state = np.random.get_state(), random.getstate()
+                sub_results = [_optimize_subgraph(job) for job in jobs]
+                np.random.set_state(np_state)
+                random.setstate(py_state)
+            else:
+                with concurrent.futures.ProcessPoolExecutor(max_workers=num_workers) as executor:
+                    sub_results = list(executor.map(_optimize_subgraph, jobs))
+            subgraph_mis = [(res['bitstr'], res['nodes_to_qubits']) for res in sub_results]
 
             # Put the results for the two subgraphs together
             soln_str = ['0'] * len(graph.nodes) # soln_str is big endian ordered here
@@ -178,8 +198,13 @@ def solve_mis_no_cut_dqva(init_state, graph, P=1, m=4, threshold=1e-5, cutoff=1,
 
             # Save current results to history
             inner_history = {'mixer_round':mixer_round, 'inner_round':inner_round,
-                'cost':opt_cost, 'function_evals':out['nfev'], 'init_state':cur_init_state,
-                'mixer_order':copy.copy(cur_permutation), 'num_params':num_params,
+                'cost':sum(res['cost'] for res in sub_results),
+                'function_evals':sum(res['function_evals'] for res in sub_results),
+                'init_state':cur_init_state, 'mixer_order':copy.copy(cur_permutation),
+                'num_params':sum(res['num_params'] for res in sub_results),
+                'subgraph_costs':[res['cost'] for res in sub_results],
+                'subgraph_function_evals':[res['function_evals'] for res in sub_results],
+                'subgraph_num_params':[res['num_params'] for res in sub_results],
                 'frag_shots':shots, 'frag_qubits':[sg.number_of_nodes() for sg in subgraphs],
                 'better_strs':better_strs}
             mixer_history.append(inner_history)
@@ -192,7 +217,7 @@ def solve_mis_no_cut_dqva(init_state, graph, P=1, m=4, threshold=1e-5, cutoff=1,
             # Otherwise, save the new bitstring and repeat
             best_indset, new_hamming_weight = better_strs[0]
             best_init_state = cur_init_state
-            best_params = opt_params
+            best_params = [res['opt_params'] for res in sub_results]
             best_perm = copy.copy(cur_permutation)
             cur_init_state = best_indset
             print('\tFound new independent set: {}, Hamming weight = {}'.format(
@@ -9,6 +9,7 @@ from qiskit.circuit import ControlledGate
 
 import utils.graph_funcs as graph_funcs
 import utils.helper_funcs as helper_funcs
+import utils.cutting_funcs as cutting_funcs
 
 ##########################################################################################
 
@@ -19,7 +20,11 @@ import utils.helper_funcs as helper_funcs
 #   O({ #cut_nodes_in_subgraph \choose #max_cuts })
 # I am simply assuming that this complexity won't be a problem for now
 # if it becomes a problem when we scale up, we should rethink this algorithm
+# For more than two subgraphs use the polynomial cutting_funcs.choose_nodes_kway
 def choose_nodes(graph, subgraphs, cut_edges, max_cuts):
+    if len(subgraphs) != 2:
+        return cutting_funcs.choose_nodes_kway(graph, subgraphs, cut_edges, max_cuts)
+
     cut_nodes = []
     for edge in cut_edges:
         cut_nodes.extend(edge)
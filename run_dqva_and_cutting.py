@@ -1,12 +1,19 @@
 #!/usr/bin/env python
 import sys, argparse, glob
 import pickle
+import numpy as np
 import networkx as nx
 from pathlib import Path
 
 import mis
 import partition_no_cuts
 from utils.graph_funcs import graph_from_file
+from utils.cut_cache import CutPlanCache
+from utils.canonical_cache import CanonicalCache
+from utils.history import FragmentTable
+from utils.checkpoint import load_checkpoint, save_checkpoint, restore_random_state, remove_checkpoint
+from utils.classical_mis import warm_start_state
+from utils.partition_funcs import select_partition
 
 def parse_args():
     parser = argparse.ArgumentParser()
@@ -27,7 +34,29 @@ def parse_args():
     parser.add_argument('--optimizer', type=str, default='COBYLA',
                         help='Optimizer passed to sklearn.minimize()')
     parser.add_argument('--graphalg', type=str, default='metis',
-                        help='Graph partitioning algorithm to use')
+                        help='Graph partitioning algorithm to use (klb, metis, spectral, best, or capped)')
+    parser.add_argument('--maxfragqubits', type=int, default=None,
+                        help='Qubit budget per fragment, used by --graphalg capped')
+    parser.add_argument('--hotnodes', type=str, default='random',
+                        help='Hot node selection: random, cheapest, weighted, or kway')
+    parser.add_argument('--ordersearch', type=int, default=0,
+                        help='Flag for ranking the mixer orders by predicted cutting cost')
+    parser.add_argument('--cutcache', type=str, default=None,
+                        help='Directory used to persist cut plans across runs')
+    parser.add_argument('--canoncache', type=str, default=None,
+                        help='File used to share partitions between isomorphic graphs')
+    parser.add_argument('--shotschedule', type=int, default=0,
+                        help='Flag for growing the shots per evaluation during optimization')
+    parser.add_argument('--checkpoint', type=int, default=0,
+                        help='Flag for checkpointing every round so that a preempted job can resume')
+    parser.add_argument('--warmstart', type=float, default=0,
+                        help='Seconds of classical local search for the initial state (0 = off)')
+    parser.add_argument('--warmfree', type=int, default=2,
+                        help='Nodes removed from the warm-start set to leave room for the dqva')
+    parser.add_argument('--speculative', type=int, default=0,
+                        help='Number of workers running the rounds speculatively on one partition (0 = off)')
+    parser.add_argument('--seed', type=int, default=None,
+                        help='Seed of the speculative rounds')
     parser.add_argument('--resultdir', type=str, default='MICRO_testing',
                         help='Directory within benchmark_results to store sims')
     args = parser.parse_args()
@@ -49,6 +78,11 @@ def main():
     savepath = DQVAROOT + f'benchmark_results/{args.resultdir}/{args.graphalg.upper()}_{args.optimizer}/{graphsave}_{args.numfrags}frags_{args.numcuts}cuts_{args.shots}shots/'
     Path(savepath).mkdir(parents=True, exist_ok=True)
 
+    # reuse cut circuits across rounds, and across reps if a directory is given
+    cut_cache = CutPlanCache(directory=args.cutcache)
+    # reuse the partitions found for isomorphic graphs of the family
+    canonical_cache = CanonicalCache(args.canoncache)
+
     for graphfn in all_graphs:
         graphname = graphfn.split('/')[-1].strip('.txt')
         cur_savepath = savepath + '{}/'.format(graphname)
@@ -62,25 +96,99 @@ def main():
         print('Edges:', G.edges)
 
         init_state = '0'*G.number_of_nodes()
+        if args.warmstart > 0:
+            init_state = warm_start_state(G, time_budget=args.warmstart,
+                                          num_free=args.warmfree)
+            print('Warm start init state:', init_state)
         full_history = []
-        for rounds in range(args.rounds):
-            print('-------------- ROUND {} BEGIN --------------\n\n'.format(rounds+1))
-            if args.numcuts > 0:
-                out = mis.solve_mis_cut_dqva(init_state, G, m=1, verbose=1,
-                                        shots=args.shots, max_cuts=args.numcuts,
-                                        num_frags=args.numfrags, optimizer=args.optimizer,
-                                        partition_alg=args.graphalg)
+        # fragments are stored once per cut plan, outside of the history
+        fragment_table = FragmentTable()
+
+        # Resume the completed rounds of a preempted job
+        start_round = 0
+        ckpt_path = None
+        if args.checkpoint:
+            ckpt_path = cur_savepath + 'checkpoint_{}cuts_rep{}.pickle'.format(args.numcuts, args.rep)
+        resumed = load_checkpoint(ckpt_path)
+        if resumed is not None:
+            init_state, full_history = resumed['best_indset'], resumed['full_history']
+            fragment_table.fragments.update(resumed['fragment_table']['fragments'])
+            fragment_table.plans.update(resumed['fragment_table']['plans'])
+            start_round = resumed['mixer_round'] - 1
+            restore_random_state(resumed)
+
+        if args.numcuts > 0:
+            solver = mis.solve_mis_cut_dqva
+            solver_kwargs = dict(verbose=1, shots=args.shots, max_cuts=args.numcuts,
+                                 num_frags=args.numfrags, optimizer=args.optimizer,
+                                 partition_alg=args.graphalg,
+                                 hot_node_selection=args.hotnodes,
+                                 cut_cache=cut_cache,
+                                 mixer_order_search=bool(args.ordersearch),
+                                 max_frag_qubits=args.maxfragqubits,
+                                 fragment_table=fragment_table,
+                                 shot_schedule=bool(args.shotschedule),
+                                 canonical_cache=canonical_cache)
+        else:
+            solver = partition_no_cuts.solve_mis_no_cut_dqva
+            solver_kwargs = dict(shots=args.shots, verbose=1,
+                                 num_frags=args.numfrags,
+                                 partition_alg=args.graphalg,
+                                 max_frag_qubits=args.maxfragqubits,
+                                 canonical_cache=canonical_cache)
+
+        if args.speculative > 0:
+            # every speculative round runs on the same partition, and a resumed
+            # job keeps both the partition and the seed of the round streams
+            if resumed is not None and 'partition' in resumed:
+                partition, seed = resumed['partition'], resumed['seed']
             else:
-                out = partition_no_cuts.solve_mis_no_cut_dqva(init_state, G, m=1,
-                                                    shots=args.shots, verbose=1,
-                                                    num_frags=args.numfrags,
-                                                    partition_alg=args.graphalg)
-            init_state = out[0]
-            full_history.append(out)
+                partition = select_partition(G, args.graphalg, args.numfrags, args.numcuts,
+                                             max_frag_qubits=args.maxfragqubits,
+                                             canonical_cache=canonical_cache, verbose=1)
+                seed = args.seed
+                if seed is None:
+                    seed = np.random.SeedSequence().entropy
+
+            def _commit_round(cur_round, out, incumbent):
+                full_history.append(out)
+                if args.checkpoint:
+                    save_checkpoint(ckpt_path, mixer_round=cur_round+1, inner_round=1,
+                                    best_indset=incumbent, full_history=full_history,
+                                    fragment_table=fragment_table.state(),
+                                    partition=partition, seed=seed)
+
+            mis.solve_mis_speculative(solver, init_state, G, m=args.rounds,
+                                      workers=args.speculative, seed=seed,
+                                      start_round=start_round+1, callback=_commit_round,
+                                      partition=partition, **solver_kwargs)
+        else:
+            for rounds in range(start_round, args.rounds):
+                print('-------------- ROUND {} BEGIN --------------\n\n'.format(rounds+1))
+                round_kwargs = dict(solver_kwargs)
+                round_ckpt_path = None
+                if args.checkpoint and args.numcuts > 0:
+                    round_ckpt_path = cur_savepath + 'checkpoint_{}cuts_rep{}_round{}.pickle'.format(
+                                                     args.numcuts, args.rep, rounds+1)
+                    round_kwargs['checkpoint'] = round_ckpt_path
+                out = solver(init_state, G, m=1, **round_kwargs)
+                init_state = out[0]
+                full_history.append(out)
+
+                if args.checkpoint:
+                    save_checkpoint(ckpt_path, mixer_round=rounds+2, inner_round=1,
+                                    best_indset=init_state, full_history=full_history,
+                                    fragment_table=fragment_table.state())
+                    remove_checkpoint(round_ckpt_path)
 
         savefn = 'dqva_{}_{}cuts_rep{}.pickle'.format(graphname, args.numcuts, args.rep)
         with open(cur_savepath+savefn, 'wb') as pf:
             pickle.dump((G, full_history), pf)
+        if fragment_table.plans:
+            fragfn = 'dqva_{}_{}cuts_rep{}_fragments.pickle'.format(graphname, args.numcuts, args.rep)
+            with open(cur_savepath+fragfn, 'wb') as pf:
+                pickle.dump(fragment_table.state(), pf)
+        remove_checkpoint(ckpt_path)
 
 if __name__ == '__main__':
     main()
@@ -5,10 +5,10 @@ import glob
 import os
 import sys
 import networkx as nx
-import numpy as np
 
 from utils.graph_funcs import graph_from_file, is_indset
 from utils.helper_funcs import hamming_weight
+from utils.classical_mis import random_greedy_batch
 
 def parse_args():
     parser = argparse.ArgumentParser()
@@ -45,22 +45,12 @@ def main():
 
         print('Loaded graph: {}, with {} nodes'.format(graphfn, nq))
 
-        for rep in range(1, args.reps+1):
-            cur_mis = ['0'] * len(G.nodes)
-            visited = [0] * len(G.nodes)
-
-            counter = 0
-            while sum(visited) < len(G.nodes):
-                unvisited = [i for i, val in enumerate(visited) if val == 0]
-
-                new_node = np.random.choice(unvisited)
+        # Run all of the reps at once
+        out = random_greedy_batch(G, num_samples=args.reps, return_sets=True)
 
-                neighbors = list(G.neighbors(new_node))
-                neighbor_vals = [int(cur_mis[n]) for n in neighbors]
-                if sum(neighbor_vals) == 0:
-                    cur_mis[new_node] = '1'
-
-                visited[new_node] = 1
+        for rep in range(1, args.reps+1):
+            # cur_mis is big endian ordered: cur_mis[i] is node i
+            cur_mis = ['1' if bit else '0' for bit in out['sets'][rep-1]]
 
             mis = ''.join(cur_mis)
             valid = is_indset(''.join(cur_mis[::-1]), G)
@@ -0,0 +1,59 @@
+"""
+Check that a solver resumed from a checkpoint finishes exactly as an
+uninterrupted run. Run with pytest.
+"""
+import random
+
+import networkx as nx
+import numpy as np
+import pytest
+
+import mis
+from utils.checkpoint import LoopCheckpoint, LOOP_STATE
+
+
+def _seed(seed):
+    np.random.seed(seed)
+    random.seed(seed)
+
+
+@pytest.mark.parametrize('solver', [mis.solve_mis_qls, mis.solve_mis_dqva, mis.solve_mis_qaoa])
+def test_resume(solver, tmp_path):
+    G = nx.random_regular_graph(3, 8, seed=1)
+    init_state = '0'*8
+
+    _seed(3)
+    full = solver(init_state, G, m=3, sim='native')
+
+    # stop after the first mixer round, then resume the remaining rounds
+    path = str(tmp_path / 'checkpoint.pickle')
+    _seed(3)
+    solver(init_state, G, m=1, sim='native', checkpoint=path)
+    _seed(99)
+    resumed = solver(init_state, G, m=3, sim='native', checkpoint=path)
+
+    assert resumed[0] == full[0]
+    assert str(resumed) == str(full)
+
+
+def test_loop_checkpoint(tmp_path):
+    path = str(tmp_path / 'checkpoint.pickle')
+    values = dict(zip(LOOP_STATE, ['101', '000', '100', [0.5], [0, 1, 2], [2, 1, 0], [[]]]))
+    ckpt = LoopCheckpoint(path, lambda: tuple(values[key] for key in LOOP_STATE),
+                          extra_state=lambda: {'partition': [[0], [1, 2]]})
+    assert ckpt.resumed is None and ckpt.start_round == 1
+    assert ckpt.round_state(1) == ([], 1)
+
+    _seed(5)
+    ckpt.save(2, 3, [{'inner_round': 1}])
+    draw = np.random.random()
+
+    resumed = LoopCheckpoint(path, None)
+    assert resumed.start_round == 2
+    assert resumed.resumed['partition'] == [[0], [1, 2]]
+    assert resumed.resume() == tuple(values[key] for key in LOOP_STATE)
+    assert np.random.random() == draw
+    assert resumed.round_state(2) == ([{'inner_round': 1}], 3)
+    assert resumed.round_state(3) == ([], 1)
+
+    LoopCheckpoint(None, None).save(2, 1, [])
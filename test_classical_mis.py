@@ -0,0 +1,72 @@
+"""
+Check the exact classical MIS solvers and the independent set enumerator of
+utils/classical_mis.py against brute force. Run with pytest.
+"""
+import itertools
+import random
+
+import networkx as nx
+import numpy as np
+
+from utils.classical_mis import mis_bitsets, exact_mis, enumerate_indsets
+from utils.graph_funcs import is_indset
+from utils.helper_funcs import brute_force_search
+
+
+def _random_graphs(num_graphs=40):
+    rng = random.Random(0)
+    for seed in range(num_graphs):
+        n = rng.randint(1, 12)
+        yield nx.gnp_random_graph(n, rng.uniform(0.1, 0.7), seed=seed)
+    yield nx.empty_graph(6)
+    yield nx.complete_graph(6)
+
+
+def _bitstr(indset, num_nodes):
+    return f'{indset:0{num_nodes}b}'
+
+
+def test_mis_bitsets():
+    for G in _random_graphs():
+        n = G.number_of_nodes()
+        best_strs, best_size = brute_force_search(G)
+
+        size, sets = mis_bitsets(G)
+        assert size == best_size
+        assert len(sets) == 1 and _bitstr(sets[0], n) in best_strs
+
+        size, sets = mis_bitsets(G, all_solutions=True)
+        assert size == best_size
+        assert sorted(_bitstr(indset, n) for indset in sets) == sorted(best_strs)
+
+
+def test_exact_mis():
+    for G in _random_graphs():
+        best_strs, best_size = brute_force_search(G)
+        assert exact_mis(G) == (sorted(best_strs), best_size)
+        opt_strs, size = exact_mis(G, all_solutions=False)
+        assert size == best_size and len(opt_strs) == 1
+        assert is_indset(opt_strs[0], G)
+
+
+def test_enumerate_indsets(tmp_path):
+    validity_file = str(tmp_path / 'validity.npy')
+    for G in _random_graphs(num_graphs=15):
+        n = G.number_of_nodes()
+        valid = [not any((state >> u) & (state >> v) & 1 for u, v in G.edges)
+                 for state in range(2**n)]
+        counts = [0] * (n+1)
+        for state in itertools.compress(range(2**n), valid):
+            counts[bin(state).count('1')] += 1
+        opt_size = max(bin(state).count('1') for state in itertools.compress(range(2**n), valid))
+
+        # small blocks, so that the results of several blocks are merged
+        for processes in [1, 2]:
+            result = enumerate_indsets(G, chunk_bits=3, processes=processes,
+                                       validity_file=validity_file)
+            assert list(result['counts']) == counts
+            assert result['opt_size'] == opt_size
+            assert sorted(int(state) for state in result['opt_states']) == \
+                [state for state in range(2**n)
+                 if valid[state] and bin(state).count('1') == opt_size]
+            assert np.load(validity_file).tolist() == valid
@@ -0,0 +1,172 @@
+"""
+Check the cut plans predicted by utils/cutting_funcs.py against the cuts of
+the dqva circuit, and its hot node selection against a brute force search
+over all hot node sets. Run with pytest.
+"""
+import collections
+import itertools
+import random
+
+import networkx as nx
+import pytest
+import qiskit
+
+from ansatz import dqv_cut_ansatz
+
+from utils.cutting_funcs import (choose_nodes, choose_nodes_kway, plan_hot_nodes,
+                                 simple_choose_nodes, PartitionIndex, predict_cut_plan,
+                                 search_hot_nodes, _is_connected)
+from utils.graph_funcs import get_subgraphs
+
+
+def _random_instances(num_instances=150):
+    rng = random.Random(0)
+    for seed in range(num_instances):
+        G = nx.gnp_random_graph(rng.randint(6, 12), rng.uniform(0.2, 0.5), seed=seed)
+        if not nx.is_connected(G):
+            continue
+        k = rng.randint(2, 4)
+        nodes = list(G.nodes)
+        rng.shuffle(nodes)
+        partition = [nodes[i::k] for i in range(k)]
+        max_frag_qubits = rng.choice([None, rng.randint(3, 9)])
+        yield G, partition, rng.randint(1, 5), max_frag_qubits
+
+
+def _feasible(partition, hot_nodes, index, max_cuts, max_frag_qubits):
+    if len(hot_nodes) == 0 or not _is_connected(hot_nodes, index):
+        return False
+    plan = predict_cut_plan(partition, tuple(hot_nodes), index)
+    if not 1 <= plan.num_cuts <= max_cuts:
+        return False
+    return max_frag_qubits is None or max(plan.frag_qubits) <= max_frag_qubits
+
+
+def _any_feasible(partition, index, max_cuts, max_frag_qubits):
+    for r in range(1, len(index.cut_nodes) + 1):
+        for hot_nodes in itertools.combinations(index.cut_nodes, r):
+            if _feasible(partition, hot_nodes, index, max_cuts, max_frag_qubits):
+                return True
+    return False
+
+
+def test_choose_nodes_kway_feasible():
+    num_found = 0
+    for G, partition, max_cuts, max_frag_qubits in _random_instances():
+        subgraphs, cut_edges = get_subgraphs(G, partition)
+        index = PartitionIndex(G, partition)
+        _, hot_nodes = choose_nodes_kway(G, subgraphs, cut_edges, max_cuts,
+                                         max_frag_qubits=max_frag_qubits)
+        if _any_feasible(partition, index, max_cuts, max_frag_qubits):
+            assert _feasible(partition, hot_nodes, index, max_cuts, max_frag_qubits)
+            num_found += 1
+        else:
+            assert hot_nodes == []
+    assert num_found > 0
+
+
+def test_choose_nodes_kway_regular():
+    # the cases where the spanning tree alone used to come back empty
+    for seed in range(10):
+        G = nx.random_regular_graph(3, 24, seed=seed)
+        for k, max_cuts in [(3, 2), (4, 3), (4, 8)]:
+            nodes = list(G.nodes)
+            partition = [nodes[i*len(nodes)//k:(i+1)*len(nodes)//k] for i in range(k)]
+            subgraphs, cut_edges = get_subgraphs(G, partition)
+            index = PartitionIndex(G, partition)
+            _, hot_nodes = choose_nodes_kway(G, subgraphs, cut_edges, max_cuts)
+            assert _feasible(partition, hot_nodes, index, max_cuts, None)
+
+
+def test_width_budget():
+    for G, partition, max_cuts, max_frag_qubits in _random_instances():
+        if max_frag_qubits is None or len(partition) > 3:
+            continue
+        subgraphs, cut_edges = get_subgraphs(G, partition)
+        index = PartitionIndex(G, partition)
+        _, plans = plan_hot_nodes(G, partition, cut_edges, max_cuts, index=index,
+                                  max_frag_qubits=max_frag_qubits)
+        for plan in plans:
+            assert max(plan.frag_qubits) <= max_frag_qubits
+        _, all_plans = plan_hot_nodes(G, partition, cut_edges, max_cuts, index=index)
+        assert len(plans) == len([plan for plan in all_plans
+                                  if max(plan.frag_qubits) <= max_frag_qubits])
+
+        _, hot_nodes = choose_nodes(G, subgraphs, cut_edges, max_cuts,
+                                    max_frag_qubits=max_frag_qubits)
+        assert (len(hot_nodes) > 0) == (len(plans) > 0)
+        if len(plans) == 0:
+            with pytest.raises(Exception):
+                simple_choose_nodes(G, partition, cut_edges, max_cuts, index=index,
+                                    max_frag_qubits=max_frag_qubits)
+            continue
+        assert _feasible(partition, hot_nodes, index, max_cuts, max_frag_qubits)
+        for selection in ['random', 'cheapest', 'weighted']:
+            _, hot_nodes = simple_choose_nodes(G, partition, cut_edges, max_cuts, index=index,
+                                               selection=selection,
+                                               max_frag_qubits=max_frag_qubits)
+            assert _feasible(partition, hot_nodes, index, max_cuts, max_frag_qubits)
+
+
+def test_predict_cut_plan():
+    rng = random.Random(1)
+    num_checked = 0
+    for seed in range(40):
+        n = rng.randint(5, 10)
+        G = nx.gnp_random_graph(n, 0.4, seed=seed)
+        if not nx.is_connected(G):
+            continue
+        k = rng.randint(2, 3)
+        nodes = list(G.nodes)
+        rng.shuffle(nodes)
+        partition = [nodes[i::k] for i in range(k)]
+        index = PartitionIndex(G, partition)
+        # the mixers are grouped by subgraph, as in mis.solve_mis_cut_dqva
+        mixer_order = [node for i in rng.sample(range(k), k) for node in partition[i]]
+        params = [qiskit.circuit.Parameter('var_{}'.format(i)) for i in range(n+1)]
+
+        for r in range(1, 4):
+            for hot_nodes in itertools.islice(itertools.combinations(index.cut_nodes, r), 3):
+                if not _is_connected(hot_nodes, index):
+                    continue
+                circuit, cuts = dqv_cut_ansatz.gen_dqva(G, partition, index.cut_nodes,
+                                                        list(hot_nodes), mixer_order,
+                                                        params=params, init_state='0'*n)
+                plan = predict_cut_plan(partition, hot_nodes, index, mixer_order)
+                assert len(cuts) == plan.num_cuts
+
+                # a cut node is cut once per foreign subgraph of its hot neighbors
+                cuts_per_node = collections.Counter(circuit.find_bit(qubit).index
+                                                    for qubit, _ in cuts)
+                for node in G.nodes:
+                    foreign = set(index.subgraph_of[hot_node] for hot_node in hot_nodes
+                                  if node in index.cut_incidence[hot_node])
+                    assert cuts_per_node[node] == len(foreign)
+                num_checked += 1
+    assert num_checked > 0
+
+
+def test_empty_block():
+    G = nx.cycle_graph(6)
+    partition = [[0, 1, 2], [3, 4, 5], []]
+    subgraphs, cut_edges = get_subgraphs(G, partition)
+    _, plans = plan_hot_nodes(G, partition, cut_edges, max_cuts=4)
+    assert plans == []
+    _, hot_nodes = choose_nodes_kway(G, subgraphs, cut_edges, max_cuts=4)
+    assert hot_nodes == []
+
+
+def test_search_expansion_limit():
+    num_checked = 0
+    for G, partition, max_cuts, max_frag_qubits in _random_instances():
+        index = PartitionIndex(G, partition)
+        hot_nodes = search_hot_nodes(partition, index, max_cuts, max_frag_qubits,
+                                     max_expansions=None)
+        if len(hot_nodes) == 0:
+            continue
+        assert search_hot_nodes(partition, index, max_cuts, max_frag_qubits) == hot_nodes
+        # only the empty set is expanded
+        assert search_hot_nodes(partition, index, max_cuts, max_frag_qubits,
+                                max_expansions=1) == []
+        num_checked += 1
+    assert num_checked > 0
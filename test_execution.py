@@ -0,0 +1,90 @@
+"""
+Check that the CircuitTemplate of utils/execution.py gives the same results
+as transpiling and running each bound circuit afresh, while transpiling only
+once. Run with pytest.
+"""
+import networkx as nx
+import numpy as np
+import pytest
+from qiskit import transpile
+
+import utils.execution
+from ansatz import dqv_ansatz
+from utils.execution import get_backend, CircuitTemplate
+from utils.helper_funcs import hamming_weight
+
+
+def _circuit_fn(G, init_state):
+    return lambda params: dqv_ansatz.gen_dqva(
+        G, P=1, params=params, init_state=init_state, barriers=0, decompose_toffoli=1,
+        mixer_order=list(G.nodes))
+
+
+def _fresh_probabilities(circuit, backend):
+    # the ancilla is the last qubit, and is returned to |0>
+    circuit = transpile(circuit, backend)
+    state = np.asarray(backend.run(circuit).result().get_statevector())
+    num_data = circuit.num_qubits - 1
+    probs = np.abs(state[:2**num_data])**2
+    return {format(i, '0{}b'.format(num_data)): prob for i, prob in enumerate(probs)
+            if prob > 1e-12}
+
+
+def _param_sets(num_params, num_sets=4):
+    rng = np.random.default_rng(0)
+    return [rng.uniform(0, 2*np.pi, num_params) for _ in range(num_sets)]
+
+
+@pytest.fixture
+def transpile_calls(monkeypatch):
+    calls = []
+    def counting_transpile(*args, **kwargs):
+        calls.append(args)
+        return transpile(*args, **kwargs)
+    monkeypatch.setattr(utils.execution, 'transpile', counting_transpile)
+    return calls
+
+
+def test_template_matches_fresh_run(transpile_calls):
+    G = nx.cycle_graph(6)
+    circuit_fn = _circuit_fn(G, '000001')
+    backend = get_backend('statevector')
+    template = CircuitTemplate(circuit_fn, len(G.nodes) + 1, backend)
+    param_sets = _param_sets(len(G.nodes) + 1)
+
+    batch = template.probabilities(param_sets)
+    moments = template.hamming_weight_moments(param_sets)
+    single = [template.probabilities([params])[0] for params in param_sets]
+    assert len(transpile_calls) == 1
+    assert template.num_runs == 3 * len(param_sets)
+
+    for params, probs, single_probs, (mean, variance) in zip(param_sets, batch, single, moments):
+        fresh = _fresh_probabilities(circuit_fn(list(params)), backend)
+        assert probs.keys() == fresh.keys() == single_probs.keys()
+        for bitstr in fresh:
+            assert np.isclose(probs[bitstr], fresh[bitstr])
+            assert np.isclose(single_probs[bitstr], fresh[bitstr])
+        weights = np.array([hamming_weight(bitstr) for bitstr in fresh])
+        fresh_probs = np.array(list(fresh.values()))
+        assert np.isclose(mean, np.dot(fresh_probs, weights))
+        assert np.isclose(variance, np.dot(fresh_probs, weights**2) - mean**2)
+
+
+def test_sampled_template(transpile_calls):
+    G = nx.cycle_graph(6)
+    circuit_fn = _circuit_fn(G, '000000')
+    template = CircuitTemplate(circuit_fn, len(G.nodes) + 1, get_backend('qasm'),
+                               seed_simulator=11)
+    param_sets = _param_sets(len(G.nodes) + 1, num_sets=2)
+    samples = template.probabilities(param_sets, shots=8192)
+    assert len(transpile_calls) == 1
+
+    for params, probs in zip(param_sets, samples):
+        fresh = _fresh_probabilities(circuit_fn(list(params)), get_backend('statevector'))
+        assert np.isclose(sum(probs.values()), 1)
+        for bitstr in set(probs) | set(fresh):
+            assert abs(probs.get(bitstr, 0) - fresh.get(bitstr, 0)) < 0.03
+
+    # the same seed gives the same samples
+    template.num_runs = 0
+    assert template.probabilities(param_sets, shots=8192) == samples
@@ -0,0 +1,87 @@
+"""
+Check that a GraphContext behaves like the networkx Graph it was built from,
+and that the cut dqva circuit is the same for both. Run with pytest.
+"""
+import copy
+import pickle
+import random
+
+import networkx as nx
+import qiskit
+
+from ansatz import dqv_cut_ansatz
+from utils.graph_context import GraphContext, as_graph_context, get_subgraph_dict
+from utils.graph_funcs import get_subgraphs, is_indset
+
+
+def _random_graphs(num_graphs=20):
+    for seed in range(num_graphs):
+        yield nx.gnp_random_graph(random.Random(seed).randint(4, 14), 0.35, seed=seed)
+
+
+def _build_cut_circuit(G, partition, cut_nodes, hot_nodes, mixer_order, params):
+    return dqv_cut_ansatz.gen_dqva(G, partition, cut_nodes, hot_nodes, mixer_order,
+                                   params=params, init_state='0'*G.number_of_nodes())
+
+
+def test_graph_parity():
+    for G in _random_graphs():
+        ctx = GraphContext(G)
+        assert list(ctx.nodes) == list(G.nodes)
+        assert list(ctx.edges) == list(G.edges)
+        assert dict(ctx.degree) == dict(G.degree)
+        for node in G.nodes:
+            assert list(ctx.neighbors(node)) == list(G.neighbors(node))
+            assert ctx.neighbor_list(node) == list(G.neighbors(node))
+        assert nx.is_frozen(ctx)
+
+
+def test_is_indset_parity():
+    rng = random.Random(0)
+    for G in _random_graphs():
+        ctx = as_graph_context(G)
+        n = G.number_of_nodes()
+        for _ in range(50):
+            bitstr = ''.join(rng.choice('01') for _ in range(n))
+            assert is_indset(bitstr, ctx) == is_indset(bitstr, G)
+
+
+def test_partition_lookups():
+    for G in _random_graphs():
+        nodes = list(G.nodes)
+        partition = [nodes[::2], nodes[1::2]]
+        ctx = as_graph_context(G, partition)
+        assert ctx.subgraph_dict == get_subgraph_dict(G, partition)
+
+        subgraphs, cut_edges = get_subgraphs(G, partition)
+        ctx_subgraphs, ctx_cut_edges = get_subgraphs(ctx, partition)
+        assert ctx_cut_edges == cut_edges
+        for subG, ctx_subG in zip(subgraphs, ctx_subgraphs):
+            assert list(ctx_subG.nodes) == list(subG.nodes)
+            assert list(ctx_subG.edges) == list(subG.edges)
+        assert ctx.cut_nodes == {v for edge in cut_edges for v in edge}
+
+
+def test_pickle_and_copy():
+    G = nx.random_regular_graph(3, 10, seed=1)
+    ctx = as_graph_context(G, [list(range(5)), list(range(5, 10))])
+    for other in [pickle.loads(pickle.dumps(ctx)), copy.deepcopy(ctx), ctx.copy()]:
+        assert list(other.edges) == list(ctx.edges)
+        assert other.neighbor_masks == ctx.neighbor_masks
+
+
+def test_cut_circuit_from_context():
+    # a 6-cycle cut into two paths, with one hot node on the boundary
+    G = nx.cycle_graph(6)
+    partition = [[0, 1, 2], [3, 4, 5]]
+    cut_nodes, hot_nodes = [0, 2, 3, 5], [2]
+    mixer_order = [0, 1, 2, 3, 4, 5]
+
+    params = [qiskit.circuit.Parameter('var_{}'.format(i)) for i in range(7)]
+
+    circuit, cuts = _build_cut_circuit(G, partition, cut_nodes, hot_nodes, mixer_order, params)
+    ctx_circuit, ctx_cuts = _build_cut_circuit(as_graph_context(G, partition), partition,
+                                               cut_nodes, hot_nodes, mixer_order, params)
+    assert len(cuts) > 0
+    assert ctx_circuit == circuit
+    assert ctx_cuts == cuts
@@ -0,0 +1,36 @@
+"""
+Check the seeded benchmark graph generation of utils/graph_gen.py. Run with
+pytest.
+"""
+import networkx as nx
+import pytest
+
+from utils.graph_gen import random_graph, generate_family
+
+
+def test_planted_partition_sizes():
+    for n, num_comms in [(30, 3), (31, 3), (26, 4), (5, 5)]:
+        G = random_graph('planted_partition', n, seed=0, num_comms=num_comms)
+        assert G.number_of_nodes() == n
+        sizes = sorted(len(block) for block in G.graph['partition'])
+        assert sizes[-1] - sizes[0] <= 1
+
+    # evenly divided families are drawn as before
+    G = random_graph('planted_partition', 30, seed=5, num_comms=3, p_in=0.2, p_out=0.02)
+    planted = nx.planted_partition_graph(3, 10, 0.2, 0.02, seed=5)
+    assert sorted(G.edges) == sorted(planted.edges)
+
+    for num_comms in [0, 11]:
+        with pytest.raises(ValueError):
+            random_graph('planted_partition', 10, seed=0, num_comms=num_comms)
+
+
+def test_generate_family():
+    graphs = generate_family('planted_partition', 13, 3, seed=1, processes=1, num_comms=2,
+                             p_in=0.8, p_out=0.2)
+    assert graphs == generate_family('planted_partition', 13, 3, seed=1, processes=1,
+                                     num_comms=2, p_in=0.8, p_out=0.2)
+    for edges, mis_size in graphs:
+        G = nx.Graph(edges)
+        assert G.number_of_nodes() == 13 and nx.is_connected(G)
+        assert mis_size > 0
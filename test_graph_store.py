@@ -0,0 +1,94 @@
+"""
+Check the packed graph stores of utils/graph_store.py. Run with pytest.
+"""
+import os
+import random
+
+import networkx as nx
+
+from utils.classical_mis import mis_bitsets
+from utils.graph_funcs import graph_from_file, parse_edge_file
+from utils.graph_store import (GraphStore, write_store, convert_family, store_path,
+                               find_stored_graph, find_stored_mis_size)
+
+
+def _write_family(graph_dir, graphs):
+    os.makedirs(graph_dir)
+    for i, G in enumerate(graphs):
+        with open(os.path.join(graph_dir, 'G{}.txt'.format(i+1)), 'w') as fn:
+            fn.write(', '.join(str(edge) for edge in G.edges))
+
+
+def test_round_trip(tmp_path):
+    rng = random.Random(0)
+    names, edge_lists = [], []
+    for i in range(10):
+        G = nx.gnp_random_graph(rng.randint(2, 14), 0.4, seed=i)
+        edges = list(G.edges)
+        rng.shuffle(edges)
+        names.append('G{}'.format(i+1))
+        edge_lists.append(edges)
+    # an edgeless entry and one with a single edge
+    names += ['G11', 'G12']
+    edge_lists += [[], [(3, 1)]]
+    mis_sizes = list(range(len(names)))
+
+    path = str(tmp_path / 'family.gstore')
+    write_store(path, 'family', names, edge_lists, mis_sizes)
+    store = GraphStore(path)
+    assert store.family == 'family' and store.names == names and len(store) == len(names)
+
+    for i, (name, edges) in enumerate(zip(names, edge_lists)):
+        assert [tuple(edge) for edge in store.graph_edges(name).tolist()] == edges
+        expected = nx.Graph()
+        expected.add_edges_from(edges)
+        for G in [store[i], store[name]]:
+            assert list(G.nodes) == list(expected.nodes)
+            assert list(G.edges) == list(expected.edges)
+        props = store.properties(name)
+        assert props['num_nodes'] == expected.number_of_nodes()
+        assert props['num_edges'] == len(edges)
+        assert props['mis_size'] == mis_sizes[i]
+        assert props['degree_sequence'] == sorted((d for _, d in expected.degree), reverse=True)
+        assert props['connected'] == (len(edges) > 0 and nx.is_connected(expected))
+    assert [name for name, _ in store] == names
+
+
+def test_graph_from_store(tmp_path):
+    graph_dir = str(tmp_path / 'N12_d3_graphs')
+    graphs = [nx.random_regular_graph(3, 12, seed=seed) for seed in range(3)]
+    _write_family(graph_dir, graphs)
+    graph_fns = [os.path.join(graph_dir, 'G{}.txt'.format(i+1)) for i in range(3)]
+    assert all(find_stored_graph(fn) is None for fn in graph_fns)
+
+    assert convert_family(graph_dir) == store_path(graph_dir)
+    for fn in graph_fns:
+        # the same node and edge order as the text file
+        expected = nx.Graph()
+        expected.add_edges_from(parse_edge_file(fn))
+        stored = find_stored_graph(fn)
+        assert list(stored.nodes) == list(expected.nodes)
+        assert list(stored.edges) == list(expected.edges)
+        assert list(graph_from_file(fn).edges) == list(expected.edges)
+
+    # a file rewritten after packing is read from the text file again
+    os.utime(graph_fns[0], (os.path.getmtime(store_path(graph_dir)) + 10,) * 2)
+    assert find_stored_graph(graph_fns[0]) is None
+    assert find_stored_graph(graph_fns[1]) is not None
+
+
+def test_stored_mis_size(tmp_path):
+    graph_dir = str(tmp_path / 'N10_d3_graphs')
+    graphs = [nx.random_regular_graph(3, 10, seed=seed) for seed in range(4)]
+    _write_family(graph_dir, graphs)
+
+    graph_fn = os.path.join(graph_dir, 'G2.txt')
+    assert find_stored_mis_size(graph_fn) is None
+
+    convert_family(graph_dir)
+    for i, G in enumerate(graphs):
+        graph_fn = os.path.join(graph_dir, 'G{}.txt'.format(i+1))
+        assert find_stored_mis_size(graph_fn) == mis_bitsets(G)[0]
+
+    convert_family(graph_dir, compute_mis=False)
+    assert find_stored_mis_size(graph_fn) is None
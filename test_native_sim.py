@@ -0,0 +1,89 @@
+"""
+Check the native statevector simulator of utils/native_sim.py against the
+qiskit ansatz circuits, and its adjoint gradient and the parameter shift
+gradient of utils/gradients.py against finite differences. Run with pytest.
+"""
+import os
+
+import numpy as np
+import pytest
+from qiskit.quantum_info import Statevector
+
+from ansatz import dqv_ansatz, qls_ansatz, qaoa
+from utils.execution import get_backend
+from utils.gradients import ParameterShiftGradient
+from utils.graph_funcs import graph_from_file
+from utils.native_sim import NativeAnsatz
+
+GRAPH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                     'benchmark_graphs', 'N8_d3_graphs', 'G1.txt')
+# nodes 0 and 2 are not adjacent in GRAPH
+INIT_STATE = '00000101'
+
+
+def _circuit_fn(G, ansatz, P, init_state, mixer_order):
+    if ansatz == 'dqva':
+        return lambda params: dqv_ansatz.gen_dqva(
+            G, P=P, params=params, init_state=init_state, barriers=0, decompose_toffoli=1,
+            mixer_order=mixer_order)
+    if ansatz == 'qls':
+        return lambda params: qls_ansatz.gen_qlsa(
+            G, P=P, params=params, init_state=init_state, barriers=0, decompose_toffoli=1,
+            mixer_order=mixer_order)
+    return lambda params: qaoa.gen_qaoa(
+        G, P, params=params, init_state=init_state, barriers=0, decompose_toffoli=1,
+        mixer_order=mixer_order)
+
+
+def _central_difference(fun, x, eps=1e-5):
+    grad = np.zeros(len(x))
+    for i in range(len(x)):
+        step = np.zeros(len(x))
+        step[i] = eps
+        grad[i] = (fun(x + step) - fun(x - step)) / (2*eps)
+    return grad
+
+
+@pytest.mark.parametrize('ansatz', ['dqva', 'qls', 'qaoa'])
+@pytest.mark.parametrize('init_state', ['0'*8, INIT_STATE])
+def test_statevector(ansatz, init_state):
+    G = graph_from_file(GRAPH)
+    rng = np.random.default_rng(0)
+    mixer_order = list(rng.permutation(list(G.nodes)))
+    for P in [1, 2]:
+        native = NativeAnsatz(G, ansatz, P, init_state=init_state, mixer_order=mixer_order)
+        params = rng.uniform(0, 2*np.pi, native.num_params)
+        circuit = _circuit_fn(G, ansatz, P, init_state, mixer_order)(list(params))
+
+        # the ancilla is the last qubit and is returned to |0>
+        amplitudes = Statevector(circuit).data[:2**len(G.nodes)]
+        state = native.statevector(params)
+        assert np.isclose(np.linalg.norm(amplitudes), 1)
+        # equal up to the global phase of the rz phase separators
+        assert np.isclose(abs(np.vdot(amplitudes, state)), 1)
+
+
+@pytest.mark.parametrize('ansatz', ['dqva', 'qls', 'qaoa'])
+def test_adjoint_gradient(ansatz):
+    G = graph_from_file(GRAPH)
+    rng = np.random.default_rng(1)
+    native = NativeAnsatz(G, ansatz, P=2, init_state=INIT_STATE)
+    params = rng.uniform(0, 2*np.pi, native.num_params)
+    cost, grad = native.cost_and_gradient(params)
+    assert np.isclose(cost, native.cost(params))
+    assert np.allclose(grad, _central_difference(native.cost, params), atol=1e-6)
+
+
+@pytest.mark.parametrize('ansatz', ['dqva', 'qaoa'])
+def test_parameter_shift_gradient(ansatz):
+    # the crx gates of the partial mixers need the four-term rule
+    G = graph_from_file(GRAPH)
+    rng = np.random.default_rng(2)
+    mixer_order = list(G.nodes)
+    native = NativeAnsatz(G, ansatz, P=1, init_state=INIT_STATE, mixer_order=mixer_order)
+    circuit_fn = _circuit_fn(G, ansatz, 1, INIT_STATE, mixer_order)
+    shift = ParameterShiftGradient(circuit_fn, native.num_params, get_backend('statevector'))
+    for _ in range(2):
+        params = rng.uniform(0, 2*np.pi, native.num_params)
+        assert np.allclose(shift.gradient(params), _central_difference(native.cost, params),
+                           atol=1e-6)
@@ -0,0 +1,56 @@
+"""
+Check the partition scoring of utils/partition_funcs.py. Run with pytest.
+"""
+import networkx as nx
+import pytest
+
+from utils.partition_funcs import (score_partition, best_of_k_partition, spectral_partition,
+                                   select_partition)
+
+
+def test_score_feasible_partition():
+    for seed in range(10):
+        G = nx.random_regular_graph(3, 16, seed=seed)
+        partition = spectral_partition(G, 3, seed=seed)
+        result = score_partition(G, partition, max_cuts=6)
+        assert result['feasible']
+        assert 1 <= result['plan'].num_cuts <= 6
+        assert result['score'][0] == result['plan'].cost < float('inf')
+
+
+def test_score_infeasible_partition():
+    # connecting three blocks of a cycle takes at least two cuts
+    G = nx.cycle_graph(9)
+    partition = [[0, 1, 2], [3, 4, 5], [6, 7, 8]]
+    result = score_partition(G, partition, max_cuts=1)
+    assert not result['feasible']
+    assert result['plan'] is None
+    assert result['score'][0] == float('inf')
+    assert score_partition(G, partition, max_cuts=2)['feasible']
+
+    # no hot node set fits within 4 qubits per fragment
+    assert not score_partition(G, partition, max_cuts=2, max_frag_qubits=4)['feasible']
+    assert score_partition(G, partition, max_cuts=2, max_frag_qubits=5)['feasible']
+
+    # an empty block is never feasible
+    assert not score_partition(G, [list(range(9)), []], max_cuts=2)['feasible']
+
+
+def test_best_of_k_skips_infeasible():
+    G = nx.cycle_graph(9)
+    partition, result = best_of_k_partition(G, 3, max_cuts=2, k=2, seed=0, processes=1)
+    assert result['feasible']
+    assert sorted(node for block in partition for node in block) == list(range(9))
+    with pytest.raises(Exception):
+        best_of_k_partition(G, 3, max_cuts=1, k=2, seed=0, processes=1)
+
+
+def test_best_of_k_width_budget():
+    G = nx.cycle_graph(9)
+    partition, result = best_of_k_partition(G, 3, max_cuts=2, k=2, seed=0, processes=1,
+                                            max_frag_qubits=5)
+    assert max(result['plan'].frag_qubits) <= 5
+    with pytest.raises(Exception):
+        best_of_k_partition(G, 3, max_cuts=2, k=2, seed=0, processes=1, max_frag_qubits=4)
+    with pytest.raises(Exception):
+        select_partition(G, 'best', 3, max_cuts=2, max_frag_qubits=4)
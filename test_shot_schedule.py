@@ -0,0 +1,86 @@
+"""
+Check the shot growth rules of the ShotScheduler in utils/shot_schedule.py.
+Run with pytest.
+"""
+import numpy as np
+
+from utils.shot_schedule import ShotScheduler, hamming_weight_variance
+
+
+def _line(num_evals, step=1.0):
+    # parameter vectors a constant step apart, which never trigger the step rule
+    return [np.array([i * step, 0.0]) for i in range(num_evals)]
+
+
+def test_initial_shots():
+    assert ShotScheduler(8192).shots == 512
+    assert ShotScheduler(1024).shots == 128
+    assert ShotScheduler(100).shots == 100
+    assert ShotScheduler(8192, min_shots=64).shots == 64
+
+
+def test_resolved_costs_keep_shots():
+    scheduler = ShotScheduler(8192, min_shots=256)
+    for i, params in enumerate(_line(20)):
+        # cost changes of 1 are far outside the standard error of 0.0625
+        scheduler.record(params, -float(i), variance=1.0)
+        assert scheduler.shots == 256
+    assert scheduler.total_shots == 20 * 256
+    assert scheduler.num_evals == 20
+
+
+def test_noise_rule():
+    for patience in [1, 3]:
+        scheduler = ShotScheduler(8192, min_shots=256, patience=patience)
+        shots = [scheduler.shots]
+        for params in _line(13):
+            # a constant cost is never resolved
+            scheduler.record(params, -1.0, variance=1.0)
+            shots.append(scheduler.shots)
+        # the first evaluation has nothing to compare against
+        expected = [256]
+        for num_unresolved in range(13):
+            grows = num_unresolved > 0 and num_unresolved % patience == 0
+            expected.append(min(8192, expected[-1] * 2) if grows else expected[-1])
+        assert shots == expected
+
+
+def test_step_rule():
+    scheduler = ShotScheduler(8192, min_shots=256, growth=4)
+    scheduler.record([0.0], 0.0, variance=0.0)
+    scheduler.record([1.0], -1.0, variance=0.0)
+    assert scheduler.shots == 256
+    # steps down to a quarter of the reference step do not count
+    scheduler.record([1.25], -2.0, variance=0.0)
+    assert scheduler.shots == 256
+    # a smaller one grows the shots and becomes the new reference
+    scheduler.record([1.45], -3.0, variance=0.0)
+    assert scheduler.shots == 1024
+    scheduler.record([1.5], -4.0, variance=0.0)
+    assert scheduler.shots == 1024
+    scheduler.record([1.51], -5.0, variance=0.0)
+    assert scheduler.shots == 4096
+
+
+def test_monotone_up_to_cap():
+    rng = np.random.default_rng(0)
+    for max_shots in [1000, 8192]:
+        scheduler = ShotScheduler(max_shots)
+        params = rng.uniform(0, 2*np.pi, 5)
+        last_shots = scheduler.shots
+        for i in range(200):
+            # a converging optimizer: shrinking steps and noisy costs
+            params = params + rng.normal(scale=1 / (i+1), size=5)
+            scheduler.record(params, rng.normal(-3, 0.1), variance=rng.uniform(0.5, 2))
+            assert last_shots <= scheduler.shots <= max_shots
+            last_shots = scheduler.shots
+        assert scheduler.shots == max_shots
+
+
+def test_hamming_weight_variance():
+    assert hamming_weight_variance({'0101': 1.0}) == 0
+    probs = {'000': 0.25, '011': 0.5, '111': 0.25}
+    weights = np.array([0, 2, 3])
+    values = np.array([0.25, 0.5, 0.25])
+    mean = np.dot(values, weights)
+    assert np.isclose(hamming_weight_variance(probs), np.dot(values, weights**2) - mean**2)
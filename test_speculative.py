@@ -0,0 +1,86 @@
+"""
+Check that mis.solve_mis_speculative commits the same rounds as a serial run.
+Run with pytest.
+"""
+import random
+
+import networkx as nx
+import pytest
+
+import mis
+from utils.graph_funcs import is_indset
+
+
+def _greedy_round(init_state, graph, m=1, partition=None, fail_round=None):
+    # add one random node of the partition which keeps the set independent
+    if fail_round is not None and init_state.count('1') >= fail_round:
+        raise ValueError('round failed')
+    new_state = init_state
+    nodes = [node for block in partition for node in block]
+    random.shuffle(nodes)
+    for node in nodes:
+        bits = list(reversed(init_state))
+        bits[node] = '1'
+        candidate = ''.join(reversed(bits))
+        if candidate != init_state and is_indset(candidate, graph):
+            new_state = candidate
+            break
+    return new_state, None, init_state, None, [[{'mixer_round': 1, 'init_state': init_state}]]
+
+
+def _seeded_round(init_state, graph, m=1, seed_simulator=None):
+    # record the simulator seed each round was given
+    return init_state, None, init_state, None, [[{'mixer_round': 1,
+                                                  'seed_simulator': seed_simulator}]]
+
+
+def _run(workers):
+    G = nx.cycle_graph(12)
+    partition = [list(range(6)), list(range(6, 12))]
+    committed = []
+    out = mis.solve_mis_speculative(_greedy_round, '0'*12, G, m=5, workers=workers, seed=7,
+                                    callback=lambda *args: committed.append(args),
+                                    partition=partition)
+    return out, committed
+
+
+def test_speculative_matches_serial():
+    serial_out, serial_committed = _run(1)
+    for workers in [2, 4]:
+        out, committed = _run(workers)
+        assert out == serial_out
+        assert committed == serial_committed
+    assert [args[0] for args in serial_committed] == [1, 2, 3, 4, 5]
+    assert serial_out[0] == serial_committed[-1][2]
+    assert [round_history[0]['mixer_round'] for round_history in serial_out[-1]] == [1, 2, 3, 4, 5]
+
+
+def test_speculative_start_round():
+    _, committed = _run(1)
+    G = nx.cycle_graph(12)
+    partition = [list(range(6)), list(range(6, 12))]
+    resumed = []
+    mis.solve_mis_speculative(_greedy_round, committed[2][2], G, m=5, workers=2, seed=7,
+                              start_round=4, callback=lambda *args: resumed.append(args),
+                              partition=partition)
+    assert resumed == committed[3:]
+
+
+def test_speculative_failure():
+    G = nx.cycle_graph(12)
+    partition = [list(range(6)), list(range(6, 12))]
+    with pytest.raises(ValueError):
+        mis.solve_mis_speculative(_greedy_round, '0'*12, G, m=5, workers=2, seed=0,
+                                  partition=partition, fail_round=2)
+    with pytest.raises(ValueError):
+        mis.solve_mis_speculative(_greedy_round, '0'*12, G, m=2, checkpoint='ckpt.pickle')
+
+
+def test_speculative_seed_simulator():
+    G = nx.cycle_graph(4)
+    seeds = []
+    for workers in [1, 3]:
+        out = mis.solve_mis_speculative(_seeded_round, '0'*4, G, m=3, workers=workers, seed=7)
+        seeds.append([round_history[0]['seed_simulator'] for round_history in out[-1]])
+    assert seeds[0] == seeds[1]
+    assert None not in seeds[0] and len(set(seeds[0])) == 3
@@ -0,0 +1,69 @@
+"""
+Check that the WarmStartStore of utils/warm_start.py round trips its angles
+through the JSON file, and matches them by motif rather than by node label.
+Run with pytest.
+"""
+import networkx as nx
+import numpy as np
+
+from utils.warm_start import WarmStartStore
+
+
+def _spider():
+    # legs of length 1, 2 and 3 around node 0; with node 2 set in the initial
+    # state, every unset node has its own motif
+    G = nx.Graph()
+    G.add_edges_from([(0, 1), (0, 2), (2, 3), (0, 4), (4, 5), (5, 6)])
+    return G, '0000100', [6, 0, 3, 1, 5, 4, 2]
+
+
+def _relabel(G, init_state, mixer_order, mapping):
+    bits = list(reversed(init_state))
+    new_bits = ['0'] * len(bits)
+    for node, bit in enumerate(bits):
+        new_bits[mapping[node]] = bit
+    return (nx.relabel_nodes(G, mapping), ''.join(reversed(new_bits)),
+            [mapping[node] for node in mixer_order])
+
+
+def test_round_trip(tmp_path):
+    path = str(tmp_path / 'warm_start.json')
+    G, init_state, mixer_order = _spider()
+    params = np.random.default_rng(0).uniform(0, 2*np.pi, len(G.nodes) + 1)
+    store = WarmStartStore(path)
+    assert store.angles == {}
+    store.update(G, 'dqva', 1, init_state, mixer_order, params)
+
+    reloaded = WarmStartStore(path)
+    assert reloaded.angles == store.angles
+    suggested = reloaded.suggest(G, 'dqva', 1, init_state, mixer_order, spread=0)
+    assert np.allclose(suggested, params)
+
+    # the same motifs under a different node labeling
+    mapping = dict(zip(G.nodes, np.random.default_rng(1).permutation(len(G.nodes)).tolist()))
+    H, H_init_state, H_mixer_order = _relabel(G, init_state, mixer_order, mapping)
+    suggested = reloaded.suggest(H, 'dqva', 1, H_init_state, H_mixer_order, spread=0)
+    assert np.allclose(suggested, params)
+    assert reloaded.hits == 2 * len(params) and reloaded.misses == 0
+
+
+def test_misses(tmp_path):
+    path = str(tmp_path / 'warm_start.json')
+    G, init_state, mixer_order = _spider()
+    params = np.random.default_rng(0).uniform(0, 2*np.pi, len(G.nodes) + 1)
+    WarmStartStore(path).update(G, 'dqva', 1, init_state, mixer_order, params)
+    store = WarmStartStore(path)
+
+    # no stored angles for another ansatz or P
+    np.random.seed(0)
+    suggested = store.suggest(G, 'qaoa', 1, init_state, mixer_order)
+    assert store.hits == 0 and store.misses == 2
+    assert len(suggested) == 2 and np.all((0 <= suggested) & (suggested < 2*np.pi))
+    store.suggest(G, 'dqva', 2, init_state, mixer_order)
+    assert store.hits == 0 and store.misses == 2 + 2*(len(G.nodes) + 1)
+
+    # a cycle has no matching neighborhood, but its degree 2 nodes fall back
+    # to the coarse motif of nodes 4 and 5 of the spider
+    C = nx.cycle_graph(5)
+    store.suggest(C, 'dqva', 1, '0'*5, list(C.nodes))
+    assert store.hits == len(C.nodes) + 1
@@ -0,0 +1,163 @@
+"""
+Cache of classical results shared between isomorphic graphs.
+
+The benchmark families hold many graphs which are identical up to a
+relabelling of their nodes, and the ground truth MIS and the partitions
+computed for one of them are valid for all of them once relabelled.
+CanonicalCache groups graphs into isomorphism classes: the Weisfeiler-Lehman
+hash of a graph selects a bucket, and VF2 finds the class in the bucket whose
+representative (the first graph of the class seen) is isomorphic to it,
+along with the node mapping between the two. Values are stored in the
+labelling of the representative and mapped to the caller's labelling on the
+way out.
+
+What a value contains decides how it is relabelled:
+
+    None          values which do not depend on the labels, e.g. MIS sizes
+    'nodes'       nodes, or (nested) lists, tuples and sets of nodes, e.g.
+                  partitions or hot node sets
+    'bitstrings'  a bitstring, or a list of bitstrings, over the nodes
+                  0..n-1 in the little-endian order of the rest of the repo
+
+If a path is given, the cache is kept in a pickle file which is rewritten
+atomically after every update, so that it can be shared across reps, runs
+and graph families.
+"""
+import os
+import pickle
+
+import networkx as nx
+
+from utils.cut_cache import graph_fingerprint
+
+
+def _map_nodes(value, mapping):
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return type(value)(_map_nodes(item, mapping) for item in value)
+    return mapping[value]
+
+
+def _map_bitstring(bitstr, mapping):
+    bits = ['0'] * len(bitstr)
+    for node, bit in enumerate(reversed(bitstr)):
+        bits[mapping[node]] = bit
+    return ''.join(reversed(bits))
+
+
+def relabel(value, mapping, remap):
+    if remap is None:
+        return value
+    elif remap == 'nodes':
+        return _map_nodes(value, mapping)
+    elif remap == 'bitstrings':
+        if isinstance(value, str):
+            return _map_bitstring(value, mapping)
+        return [_map_bitstring(bitstr, mapping) for bitstr in value]
+    raise ValueError(f'Unknown relabelling: {remap}')
+
+
+class CanonicalCache:
+    """
+    Map from isomorphism classes of graphs to named results, see the module
+    docstring
+    """
+    def __init__(self, path=None):
+        self.path = path
+        # WL hash -> list of {'edges', 'nodes', 'values'}, in representative labels
+        self.buckets = {}
+        self.hits = 0
+        self.misses = 0
+        # graph fingerprint -> (WL hash, class index, {representative node: node})
+        self._matches = {}
+        if path is not None and os.path.isfile(path):
+            with open(path, 'rb') as pf:
+                self.buckets = pickle.load(pf)
+
+    def match(self, G):
+        """
+        Return the class entry of G, adding a new class if G is not
+        isomorphic to any known graph, and the mapping from the nodes of its
+        representative to the nodes of G
+        """
+        fingerprint = graph_fingerprint(G)
+        if fingerprint in self._matches:
+            wl_hash, idx, mapping = self._matches[fingerprint]
+            return self.buckets[wl_hash][idx], mapping
+
+        wl_hash = nx.weisfeiler_lehman_graph_hash(G)
+        bucket = self.buckets.setdefault(wl_hash, [])
+        for idx, entry in enumerate(bucket):
+            rep = nx.Graph()
+            rep.add_nodes_from(entry['nodes'])
+            rep.add_edges_from(entry['edges'])
+            matcher = nx.isomorphism.GraphMatcher(rep, G)
+            if matcher.is_isomorphic():
+                mapping = matcher.mapping
+                break
+        else:
+            idx = len(bucket)
+            bucket.append({'nodes': list(G.nodes), 'edges': list(G.edges), 'values': {}})
+            mapping = {node: node for node in G.nodes}
+
+        self._matches[fingerprint] = (wl_hash, idx, mapping)
+        return bucket[idx], mapping
+
+    def key(self, G, name, key_nodes=None):
+        """
+        The key of a value under G. key_nodes are nodes of G (e.g. a
+        partition) which the value depends on, and are mapped to the
+        representative's labels, sorted, to form the key.
+        """
+        if key_nodes is None:
+            return name
+        _, mapping = self.match(G)
+        inverse = {node: rep_node for rep_node, node in mapping.items()}
+        return (name, _canonical_nodes(_map_nodes(key_nodes, inverse)))
+
+    def get(self, G, name, remap=None, key_nodes=None):
+        """
+        Return the value stored under name for the class of G, in the labels
+        of G, or None on a miss
+        """
+        entry, mapping = self.match(G)
+        key = self.key(G, name, key_nodes)
+        if key not in entry['values']:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return relabel(entry['values'][key], mapping, remap)
+
+    def put(self, G, name, value, remap=None, key_nodes=None):
+        """
+        Store value, given in the labels of G, under name for the class of G
+        """
+        entry, mapping = self.match(G)
+        inverse = {node: rep_node for rep_node, node in mapping.items()}
+        entry['values'][self.key(G, name, key_nodes)] = relabel(value, inverse, remap)
+        self.save()
+
+    def get_or_compute(self, G, name, compute, remap=None, key_nodes=None):
+        """
+        Return the value stored under name for the class of G, calling
+        compute() and storing its result on a miss
+        """
+        value = self.get(G, name, remap, key_nodes)
+        if value is None:
+            value = compute()
+            self.put(G, name, value, remap, key_nodes)
+        return value
+
+    def save(self):
+        if self.path is None:
+            return
+        tmp_path = self.path + f'.{os.getpid()}.tmp'
+        with open(tmp_path, 'wb') as pf:
+            pickle.dump(self.buckets, pf)
+        os.replace(tmp_path, self.path)
+
+
+def _canonical_nodes(value):
+    # an order independent form of (nested) node containers
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return tuple(sorted((_canonical_nodes(item) for item in value), key=repr))
+    return value
@@ -0,0 +1,98 @@
+"""
+Atomic checkpoints for the long-running solve_mis_* outer loops.
+
+A checkpoint is a pickled dict of the solver's loop state together with the
+state of the numpy and python random number generators, so that a resumed run
+draws the same initial parameters and mixer permutations as an uninterrupted
+one. Files are written to a temporary path and moved into place, so a job
+which is preempted mid-write leaves the previous checkpoint intact.
+"""
+import os
+import pickle
+import random
+
+import numpy as np
+
+
+def save_checkpoint(path, **state):
+    state['np_random_state'] = np.random.get_state()
+    state['random_state'] = random.getstate()
+
+    tmp_path = path + f'.{os.getpid()}.tmp'
+    with open(tmp_path, 'wb') as pf:
+        pickle.dump(state, pf)
+        pf.flush()
+        os.fsync(pf.fileno())
+    os.replace(tmp_path, path)
+
+
+def load_checkpoint(path):
+    """
+    Return the state saved at path, or None if there is no checkpoint
+    """
+    if path is None or not os.path.isfile(path):
+        return None
+
+    with open(path, 'rb') as pf:
+        state = pickle.load(pf)
+    print(f'Resuming from checkpoint {path}: mixer round {state["mixer_round"]},',
+          f'inner round {state["inner_round"]}, best = {state["best_indset"]}')
+    return state
+
+
+def restore_random_state(state):
+    np.random.set_state(state['np_random_state'])
+    random.setstate(state['random_state'])
+
+
+def remove_checkpoint(path):
+    if path is not None and os.path.isfile(path):
+        os.remove(path)
+
+
+# the outer loop variables shared by every solve_mis_* function
+LOOP_STATE = ('best_indset', 'best_init_state', 'cur_init_state', 'best_params',
+              'best_perm', 'cur_permutation', 'history')
+
+
+class LoopCheckpoint:
+    """
+    Save and resume the outer loop of a solve_mis_* function at path (None
+    disables checkpointing).
+
+    loop_state is called on every save and returns the current values of the
+    LOOP_STATE variables, in that order. extra_state, if given, returns a
+    dict of further values to save, e.g. the partition, which are read back
+    from resumed.
+    """
+    def __init__(self, path, loop_state, extra_state=None):
+        self.path = path
+        self.loop_state = loop_state
+        self.extra_state = extra_state
+        self.resumed = load_checkpoint(path)
+        self.start_round = 1 if self.resumed is None else self.resumed['mixer_round']
+
+    def resume(self):
+        """
+        Restore the random state of the checkpointed run and return its
+        LOOP_STATE values
+        """
+        restore_random_state(self.resumed)
+        return tuple(self.resumed[key] for key in LOOP_STATE)
+
+    def round_state(self, mixer_round):
+        """
+        The (mixer_history, inner_round) to start mixer_round from
+        """
+        if self.resumed is not None and mixer_round == self.start_round:
+            return self.resumed['mixer_history'], self.resumed['inner_round']
+        return [], 1
+
+    def save(self, next_round, next_inner_round, mixer_history):
+        if self.path is None:
+            return
+        state = dict(zip(LOOP_STATE, self.loop_state()))
+        if self.extra_state is not None:
+            state.update(self.extra_state())
+        save_checkpoint(self.path, mixer_round=next_round, inner_round=next_inner_round,
+                        mixer_history=mixer_history, **state)
@@ -0,0 +1,367 @@
+"""
+Exact classical MIS solver used for the ground truth of the benchmarks.
+
+The graph is stored as one integer bitmask of neighbors per node, and the
+search is a branch-and-bound over the set of candidate nodes P. The upper
+bound on the number of nodes that can still be added comes from greedily
+covering P with cliques of G: an independent set contains at most one node
+of every clique. Nodes of P with no neighbors in P are always taken, and when
+only one optimal set is needed so are nodes with a single neighbor in P.
+
+enumerate_indsets instead visits all 2^n states in vectorized blocks, for
+when every independent set is needed rather than only the maximum ones, and
+random_greedy_batch runs the random greedy baseline many times at once.
+local_search_indset and warm_start_state give fast heuristic solutions to
+start the quantum solvers from.
+
+Bitstrings follow the rest of the repo: reversed(bitstr)[i] is node i.
+"""
+import time
+import concurrent.futures
+
+import numpy as np
+
+from utils.helper_funcs import hamming_weight_array
+
+
+def _popcount(mask):
+    return bin(mask).count('1')
+
+
+def _adjacency_masks(G):
+    num_nodes = len(G.nodes)
+    adj = [0] * num_nodes
+    for u, v in G.edges:
+        if u != v:
+            adj[u] |= 1 << v
+            adj[v] |= 1 << u
+    return num_nodes, adj
+
+
+def _clique_cover(P, adj):
+    """
+    Greedily cover the nodes of P with cliques of G. Returns the nodes in the
+    order they were covered and, for each, the number of cliques used to
+    cover it and all the nodes before it.
+    """
+    order, bounds = [], []
+    num_cliques = 0
+    while P:
+        num_cliques += 1
+        candidates = P
+        while candidates:
+            v = (candidates & -candidates).bit_length() - 1
+            # the rest of the clique must be adjacent to v
+            candidates &= adj[v]
+            P &= ~(1 << v)
+            order.append(v)
+            bounds.append(num_cliques)
+    return order, bounds
+
+
+def _greedy_indset(P, adj):
+    """
+    Minimum degree greedy independent set, used as the initial incumbent
+    """
+    indset = 0
+    while P:
+        v = min((u for u in range(P.bit_length()) if P >> u & 1),
+                key=lambda u: _popcount(adj[u] & P))
+        indset |= 1 << v
+        P &= ~(adj[v] | (1 << v))
+    return indset
+
+
+def _reduce(P, adj, all_solutions):
+    """
+    Take the isolated nodes of P (and the pendant nodes, unless all optimal
+    sets are needed). Returns the nodes taken and the remaining candidates.
+    """
+    taken = 0
+    changed = True
+    while changed:
+        changed = False
+        remaining = P
+        while remaining:
+            v = (remaining & -remaining).bit_length() - 1
+            remaining &= remaining - 1
+            if not P >> v & 1:
+                continue
+            degree = _popcount(adj[v] & P)
+            if degree == 0 or (degree == 1 and not all_solutions):
+                taken |= 1 << v
+                P &= ~(adj[v] | (1 << v))
+                changed = True
+    return taken, P
+
+
+def mis_bitsets(G, all_solutions=False):
+    """
+    Return the size of the maximum independent set of G and a list of
+    maximum independent sets as integer bitmasks (every maximum independent
+    set if all_solutions, otherwise one)
+    """
+    num_nodes, adj = _adjacency_masks(G)
+    all_nodes = (1 << num_nodes) - 1
+
+    best = {'size': -1, 'sets': []}
+    if not all_solutions:
+        greedy = _greedy_indset(all_nodes, adj)
+        best = {'size': _popcount(greedy), 'sets': [greedy]}
+
+    def expand(cur, size, P):
+        taken, P = _reduce(P, adj, all_solutions)
+        cur |= taken
+        size += _popcount(taken)
+
+        if P == 0:
+            if size > best['size']:
+                best['size'], best['sets'] = size, [cur]
+            elif size == best['size'] and all_solutions:
+                best['sets'].append(cur)
+            return
+
+        order, bounds = _clique_cover(P, adj)
+        for v, bound in zip(reversed(order), reversed(bounds)):
+            if size + bound < best['size'] or \
+                    (size + bound == best['size'] and not all_solutions):
+                return
+            bit = 1 << v
+            expand(cur | bit, size + 1, P & ~(adj[v] | bit))
+            P &= ~bit
+
+    expand(0, 0, all_nodes)
+    return best['size'], best['sets']
+
+
+def exact_mis(G, all_solutions=True):
+    """
+    Drop-in replacement for helper_funcs.brute_force_search: returns the
+    maximum independent sets as bitstrings and their Hamming weight
+    """
+    num_nodes = len(G.nodes)
+    size, sets = mis_bitsets(G, all_solutions=all_solutions)
+    best_strs = sorted(f'{indset:0{num_nodes}b}' for indset in sets)
+    return best_strs, size
+
+
+def _enumerate_block(args):
+    """
+    Check the states in [start, stop) against every edge mask. Returns the
+    number of independent sets of each size and the largest ones.
+    """
+    num_nodes, edge_masks, start, stop, validity_file = args
+    states = np.arange(start, stop, dtype=np.uint64)
+    valid = np.ones(len(states), dtype=bool)
+    for mask in edge_masks:
+        mask = np.uint64(mask)
+        valid &= (states & mask) != mask
+
+    weights = hamming_weight_array(states)
+    counts = np.bincount(weights[valid], minlength=num_nodes+1)
+    # a block may contain no independent sets at all
+    best_size = int(weights[valid].max()) if valid.any() else -1
+    best_states = states[valid & (weights == best_size)]
+
+    if validity_file is not None:
+        validity = np.load(validity_file, mmap_mode='r+')
+        validity[start:stop] = valid
+        validity.flush()
+    return counts, best_size, best_states
+
+
+def enumerate_indsets(G, chunk_bits=20, processes=None, validity_file=None):
+    """
+    Exhaustively enumerate the independent sets of G.
+
+    The 2^n states are checked in blocks of 2^chunk_bits with vectorized
+    bitwise ANDs against the edge masks, and the blocks are spread over a
+    process pool. Returns a dict with 'counts', the number of independent
+    sets of each Hamming weight, 'opt_size' and 'opt_states', the maximum
+    independent sets as integers. If validity_file is given, a boolean array
+    marking every independent set is saved there as a .npy file, which can
+    be reopened with np.load(validity_file, mmap_mode='r').
+    """
+    num_nodes = len(G.nodes)
+    if num_nodes > 63:
+        raise ValueError('Exhaustive enumeration is limited to 63 nodes')
+    edge_masks = [(1 << u) | (1 << v) for u, v in G.edges if u != v]
+
+    num_states = 2**num_nodes
+    block_size = 2**min(chunk_bits, num_nodes)
+    if validity_file is not None:
+        # create the file, which the workers fill in block by block
+        np.lib.format.open_memmap(validity_file, mode='w+', dtype=bool,
+                                  shape=(num_states,)).flush()
+
+    blocks = [(num_nodes, edge_masks, start, min(start + block_size, num_states),
+               validity_file) for start in range(0, num_states, block_size)]
+    if len(blocks) == 1 or processes == 1:
+        results = [_enumerate_block(block) for block in blocks]
+    else:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=processes) as executor:
+            results = list(executor.map(_enumerate_block, blocks))
+
+    counts = np.zeros(num_nodes+1, dtype=np.int64)
+    opt_size = max(best_size for _, best_size, _ in results)
+    opt_states = []
+    for block_counts, best_size, best_states in results:
+        counts += block_counts
+        if best_size == opt_size:
+            opt_states.append(best_states)
+
+    return {'counts': counts, 'opt_size': opt_size,
+            'opt_states': np.concatenate(opt_states)}
+
+
+def random_greedy_batch(G, num_samples=1000, seed=None, return_sets=False):
+    """
+    Run num_samples random-order greedy constructions at once.
+
+    Each construction visits the nodes in a uniformly random order and adds
+    every node none of whose neighbors has been added yet, as in
+    run_random_mis_algo.py. All of them advance together over a boolean
+    adjacency matrix, one position of the visiting order per step. Returns a
+    dict with the largest set found as a bitstring ('best_str'), its size,
+    the size of every sample ('sizes') and the number of samples of each
+    size ('size_counts'). With return_sets, 'sets' holds the
+    (num_samples, n) boolean array of all the sets.
+    """
+    rng = np.random.default_rng(seed)
+    num_nodes = len(G.nodes)
+    adj = np.zeros((num_nodes, num_nodes), dtype=bool)
+    for u, v in G.edges:
+        adj[u, v] = adj[v, u] = True
+
+    order = np.argsort(rng.random((num_samples, num_nodes)), axis=1)
+    samples = np.arange(num_samples)
+    chosen = np.zeros((num_samples, num_nodes), dtype=bool)
+    blocked = np.zeros((num_samples, num_nodes), dtype=bool)
+    for step in range(num_nodes):
+        nodes = order[:, step]
+        added = ~blocked[samples, nodes]
+        chosen[samples, nodes] = added
+        blocked |= adj[nodes] & added[:, None]
+
+    sizes = chosen.sum(axis=1)
+    best = int(np.argmax(sizes))
+    best_str = ''.join('1' if bit else '0' for bit in reversed(chosen[best]))
+    out = {'best_str': best_str, 'best_size': int(sizes[best]), 'sizes': sizes,
+           'size_counts': np.bincount(sizes, minlength=num_nodes+1)}
+    if return_sets:
+        out['sets'] = chosen
+    return out
+
+
+class _LocalSearch:
+    """
+    Independent set with the (1,2)-swap local search of Andrade, Resende and
+    Werneck. tight[v] counts the neighbors of v in the set.
+    """
+    def __init__(self, G, rng):
+        self.neighbors = {v: list(G.neighbors(v)) for v in G.nodes}
+        self.rng = rng
+        self.indset = set()
+        self.tight = {v: 0 for v in G.nodes}
+
+    def add(self, v):
+        self.indset.add(v)
+        for u in self.neighbors[v]:
+            self.tight[u] += 1
+
+    def remove(self, v):
+        self.indset.remove(v)
+        for u in self.neighbors[v]:
+            self.tight[u] -= 1
+
+    def add_free(self):
+        free = [v for v, t in self.tight.items() if t == 0 and v not in self.indset]
+        self.rng.shuffle(free)
+        for v in free:
+            if self.tight[v] == 0:
+                self.add(v)
+
+    def two_improvement(self):
+        """
+        Replace one node of the set by two of its neighbors, if possible
+        """
+        for x in self.rng.permutation(list(self.indset)):
+            # neighbors of x whose only neighbor in the set is x
+            candidates = [u for u in self.neighbors[x] if self.tight[u] == 1]
+            for i, u in enumerate(candidates):
+                for v in candidates[i+1:]:
+                    if v not in self.neighbors[u]:
+                        self.remove(x)
+                        self.add(u)
+                        self.add(v)
+                        return True
+        return False
+
+    def local_search(self):
+        self.add_free()
+        while self.two_improvement():
+            self.add_free()
+
+    def perturb(self):
+        # force a random node in, evicting its neighbors
+        v = self.rng.choice([u for u in self.tight if u not in self.indset])
+        for u in self.neighbors[v]:
+            if u in self.indset:
+                self.remove(u)
+        self.add(v)
+
+
+def local_search_indset(G, time_budget=0.1, seed=None):
+    """
+    Greedy construction followed by iterated (1,2)-swap local search, run
+    until time_budget seconds have passed. Returns the largest independent
+    set found as a bitstring.
+    """
+    start = time.time()
+    rng = np.random.default_rng(seed)
+    num_nodes = len(G.nodes)
+    search = _LocalSearch(G, rng)
+    _, adj = _adjacency_masks(G)
+    greedy = _greedy_indset((1 << num_nodes) - 1, adj)
+    for v in range(num_nodes):
+        if greedy >> v & 1:
+            search.add(v)
+    search.local_search()
+
+    best = set(search.indset)
+    while time.time() - start < time_budget and len(search.indset) < num_nodes:
+        search.perturb()
+        search.local_search()
+        if len(search.indset) > len(best):
+            best = set(search.indset)
+        elif len(search.indset) < len(best) - 1:
+            # wandered too far, restart from the best set
+            search.indset, search.tight = set(), {v: 0 for v in G.nodes}
+            for v in best:
+                search.add(v)
+
+    return ''.join('1' if v in best else '0' for v in reversed(range(num_nodes)))
+
+
+def warm_start_state(G, time_budget=0.1, num_free=2, seed=None):
+    """
+    A classical initial state for the quantum solvers.
+
+    The partial mixers of the dqva and qls only act on nodes with no
+    neighbors in the set, so a maximal independent set would leave them
+    nothing to do. The local search solution is returned with the num_free
+    nodes removed whose removal frees the most neighbors, opening regions of
+    the graph for the quantum search to improve on.
+    """
+    bitstr = local_search_indset(G, time_budget=time_budget, seed=seed)
+    indset = [v for v, bit in enumerate(reversed(bitstr)) if bit == '1']
+    bits = list(reversed(bitstr))
+
+    def freed(v):
+        # neighbors of v whose only neighbor in the set is v
+        return sum(1 for u in G.neighbors(v)
+                   if sum(bits[w] == '1' for w in G.neighbors(u)) == 1)
+
+    for v in sorted(indset, key=freed, reverse=True)[:num_free]:
+        bits[v] = '0'
+    return ''.join(reversed(bits))
@@ -0,0 +1,137 @@
+"""
+Cache of cut dqva circuits, shared across mixer rounds and repeated runs.
+
+The circuit built by dqv_cut_ansatz.gen_dqva, and so its cut locations,
+fragments, and wire path map, depends only on the graph, the partition, the
+hot nodes, the mixer order, the initial state, and P. solve_mis_cut_dqva
+revisits the same combinations often, so the classical preprocessing (building
+the full circuit, locating cuts, cutting) can be skipped on a cache hit.
+The cut and qubit budgets are not part of the key, since they do not change
+the circuit: callers check a hit against their own budgets, as they would a
+freshly cut plan.
+
+Fragments are stored in QPY form and the wire path map and cuts are stored by
+qubit index, so that entries can be written to disk and reloaded by a later
+process.
+"""
+import io
+import os
+import pickle
+import hashlib
+from collections import OrderedDict
+
+from qiskit import QuantumRegister, AncillaRegister
+
+# NOTE: the location of the QPY serializer is version dependent
+try:
+    from qiskit import qpy
+except ImportError:
+    from qiskit.circuit import qpy_serialization as qpy
+
+
+def graph_fingerprint(graph):
+    """
+    Return a hash of the node set and edge set of a graph
+    """
+    nodes = sorted(graph.nodes)
+    edges = sorted(tuple(sorted(edge)) for edge in graph.edges)
+    return hashlib.sha256(repr((nodes, edges)).encode()).hexdigest()
+
+
+class CutPlanCache:
+    """
+    A bounded LRU cache of cut plans, optionally backed by a directory.
+
+    Entries are held in memory up to maxsize. If a directory is given, every
+    new entry is also written there, and misses in memory fall back to the
+    directory, so the cache persists across processes and benchmark reps.
+    """
+    def __init__(self, maxsize=128, directory=None):
+        self.maxsize = maxsize
+        self.directory = directory
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def make_key(graph, partition, hot_nodes, mixer_order, init_state, P=1):
+        key = (graph_fingerprint(graph),
+               tuple(tuple(sorted(subgraph_nodes)) for subgraph_nodes in partition),
+               tuple(sorted(hot_nodes)),
+               tuple(int(node) for node in mixer_order),
+               init_state, P)
+        return hashlib.sha256(repr(key).encode()).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + '.pickle')
+
+    def _remember(self, key, entry):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def get(self, key):
+        """
+        Return (fragments, wire_path_map, cuts, num_params) or None on a miss
+        """
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        elif self.directory is not None and os.path.isfile(self._path(key)):
+            with open(self._path(key), 'rb') as pf:
+                entry = pickle.load(pf)
+            self._remember(key, entry)
+
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return _unpack(entry)
+
+    def put(self, key, circuit, fragments, wire_path_map, cuts, num_params):
+        entry = _pack(circuit, fragments, wire_path_map, cuts, num_params)
+        self._remember(key, entry)
+
+        if self.directory is not None:
+            # write atomically so that concurrent jobs never read a partial file
+            tmp_path = self._path(key) + f'.{os.getpid()}.tmp'
+            with open(tmp_path, 'wb') as pf:
+                pickle.dump(entry, pf)
+            os.replace(tmp_path, self._path(key))
+
+
+def _pack(circuit, fragments, wire_path_map, cuts, num_params):
+    qpy_buffer = io.BytesIO()
+    qpy.dump(list(fragments), qpy_buffer)
+
+    circuit_qubits = list(circuit.qubits)
+    frag_qubits = [list(fragment.qubits) for fragment in fragments]
+    path_map = [(circuit_qubits.index(wire),
+                 [(frag_idx, frag_qubits[frag_idx].index(frag_wire))
+                  for frag_idx, frag_wire in path])
+                for wire, path in wire_path_map.items()]
+
+    return {'registers': [(reg.name, reg.size, isinstance(reg, AncillaRegister))
+                          for reg in circuit.qregs],
+            'fragments': qpy_buffer.getvalue(),
+            'wire_path_map': path_map,
+            'cuts': [(circuit_qubits.index(wire), location) for wire, location in cuts],
+            'num_params': num_params}
+
+
+def _unpack(entry):
+    fragments = qpy.load(io.BytesIO(entry['fragments']))
+
+    circuit_qubits = []
+    for name, size, is_ancilla in entry['registers']:
+        register = AncillaRegister(size, name) if is_ancilla else QuantumRegister(size, name)
+        circuit_qubits.extend(register[:])
+
+    wire_path_map = {circuit_qubits[wire]: [(frag_idx, fragments[frag_idx].qubits[frag_wire])
+                                            for frag_idx, frag_wire in path]
+                     for wire, path in entry['wire_path_map']}
+    cuts = [(circuit_qubits[wire], location) for wire, location in entry['cuts']]
+    return fragments, wire_path_map, cuts, entry['num_params']
@@ -1,8 +1,9 @@
 import sys
 import itertools
+import math
 import random
 import time
-from typing import List, Tuple
+from typing import List, NamedTuple, Tuple
 
 import numpy as np
 import networkx as nx
@@ -12,6 +13,7 @@ sys.path.append('../')
 import qsplit.qsplit_mlrecon_methods as qmm
 
 
+
 # (1) idetify cut_nodes and uncut_nodes (nodes incident to a cut and their complement)
 # (2) choose "hot nodes": nodes incident to a graph partition,
 #       to which we will nonetheless apply a partial mixer in the first mixing layer
@@ -19,7 +21,14 @@ import qsplit.qsplit_mlrecon_methods as qmm
 #   O({ #cut_nodes_in_subgraph \choose #max_cuts })
 # I am simply assuming that this complexity won't be a problem for now
 # if it becomes a problem when we scale up, we should rethink this algorithm
-def choose_nodes(graph, subgraphs, cut_edges, max_cuts):
+# For more than two subgraphs use choose_nodes_kway, which is polynomial
+# If the chosen hot nodes exceed max_cuts or max_frag_qubits, fall back to search_hot_nodes,
+#   which is exponential in the worst case and gives up after a fixed number of expansions
+def choose_nodes(graph, subgraphs, cut_edges, max_cuts, max_frag_qubits=None):
+    if len(subgraphs) != 2:
+        return choose_nodes_kway(graph, subgraphs, cut_edges, max_cuts,
+                                 max_frag_qubits=max_frag_qubits)
+
     cut_nodes = []
     for edge in cut_edges:
         cut_nodes.extend(edge)
@@ -83,52 +92,346 @@ def choose_nodes(graph, subgraphs, cut_edges, max_cuts):
 
     # hot nodes = those without neighbors that we are tossing out
     hot_nodes = list(filter(_no_tossed_neighbors, ext_cut_nodes))
+
+    partition = [list(subgraph.nodes) for subgraph in subgraphs]
+    index = PartitionIndex(graph, partition)
+    if not _is_feasible(partition, hot_nodes, index, max_cuts, max_frag_qubits):
+        hot_nodes = search_hot_nodes(partition, index, max_cuts, max_frag_qubits)
     return cut_nodes, hot_nodes
 
 
-def _is_connected(graph, partition, hot_nodes, subgraph_dict):
-    meta_graph = nx.Graph()
-    for i in range(len(partition)):
-        meta_graph.add_node(i)
+# k-subgraph version of choose_nodes
+# (1) connect the subgraphs with a spanning tree of the "meta graph" whose nodes
+#       are subgraphs and whose edges are sets of cut edges
+# (2) along each tree edge, one subgraph is "extended" with the cut nodes of its
+#       neighbor, exactly as in choose_nodes. For a fixed number of kept nodes,
+#       tossing the nodes with the smallest degree contributions is optimal
+#       (exchange argument), so each tree edge has at most 2*max_cuts options
+# (3) a knapsack-style dynamic program spreads the max_cuts budget across the
+#       tree edges, minimizing the total toss cost and then the fragment sizes
+# cost: O(#tree_edges * max_cuts^2) option combinations, plus the degree sums
+# (4) if the result does not connect every subgraph within max_cuts cuts (and
+#       max_frag_qubits qubits per fragment), fall back to search_hot_nodes, which
+#       is exponential in the worst case and gives up after a fixed number of expansions
+def choose_nodes_kway(graph, subgraphs, cut_edges, max_cuts, max_frag_qubits=None):
+    cut_nodes = []
+    for edge in cut_edges:
+        cut_nodes.extend(edge)
+    cut_node_set = set(cut_nodes)
 
-    for hot_node in hot_nodes:
-        for edge in graph.edges:
-            if hot_node in edge:
-                subgraph_i = subgraph_dict[edge[0]]
-                subgraph_j = subgraph_dict[edge[1]]
-                if subgraph_i != subgraph_j:
-                    meta_graph.add_edge(subgraph_i, subgraph_j)
+    subgraph_of = {}
+    for idx, subgraph in enumerate(subgraphs):
+        for node in subgraph.nodes:
+            subgraph_of[node] = idx
+
+    def _foreign_subgraphs(node):
+        return set(subgraph_of[neighbor] for neighbor in graph.neighbors(node)
+                   if subgraph_of[neighbor] != subgraph_of[node])
+
+    # for some node in adj_idx that we might throw out, add up the degrees of
+    # its neighbors in ext_idx (same cost as choose_nodes.single_choice_cost)
+    def single_choice_cost(adj_node, ext_idx):
+        return sum([ graph.degree[ext_node] for ext_node in graph.neighbors(adj_node)
+                     if subgraph_of[ext_node] == ext_idx ])
+
+    # meta graph weighted by the cost of tossing every cut node along an edge
+    meta_graph = nx.Graph()
+    meta_graph.add_nodes_from(range(len(subgraphs)))
+    for v1, v2 in cut_edges:
+        meta_graph.add_edge(subgraph_of[v1], subgraph_of[v2])
+    if not nx.is_connected(meta_graph):
+        return cut_nodes, []
+
+    def _facing_cut_nodes(adj_idx, ext_idx):
+        return [node for node in subgraphs[adj_idx].nodes
+                if node in cut_node_set and ext_idx in _foreign_subgraphs(node)]
+
+    for s, t in meta_graph.edges:
+        meta_graph[s][t]['weight'] = min(
+            sum(single_choice_cost(node, ext) for node in _facing_cut_nodes(adj, ext))
+            for ext, adj in [(s, t), (t, s)])
+    tree_edges = list(nx.maximum_spanning_tree(meta_graph).edges)
+
+    # all ways of extending ext_idx with the cut nodes of adj_idx:
+    #   (toss_cost, num_cuts, ext_idx, pulled_in_nodes, hot_nodes)
+    def _edge_options(ext_idx, adj_idx):
+        adj_cut_nodes = _facing_cut_nodes(adj_idx, ext_idx)
+        # only nodes whose foreign neighbors all lie in adj_idx can be hot
+        candidates = [node for node in subgraphs[ext_idx].nodes
+                      if node in cut_node_set and _foreign_subgraphs(node) == {adj_idx}]
+
+        toss_order = sorted(adj_cut_nodes, key=lambda node: single_choice_cost(node, ext_idx))
+        options = []
+        for num_keep in range(1, min(len(adj_cut_nodes), max_cuts) + 1):
+            toss_nodes = set(toss_order[:len(adj_cut_nodes) - num_keep])
+            hot_nodes = [node for node in candidates
+                         if not any(neighbor in toss_nodes for neighbor in graph.neighbors(node))]
+            if len(hot_nodes) == 0:
+                continue
+            pulled_in = set(neighbor for node in hot_nodes for neighbor in graph.neighbors(node)
+                            if subgraph_of[neighbor] == adj_idx)
+            toss_cost = sum(single_choice_cost(node, ext_idx) for node in toss_nodes)
+            options.append((toss_cost, len(pulled_in), ext_idx, pulled_in, hot_nodes))
+        return options
+
+    base_sizes = [subgraph.number_of_nodes() for subgraph in subgraphs]
+    def _score(toss_cost, pulled):
+        frag_sizes = tuple(sorted([size + extra for size, extra in zip(base_sizes, pulled)],
+                                  reverse=True))
+        return (toss_cost,) + frag_sizes
+
+    # dp: cuts used so far -> (score, toss cost, nodes pulled into each subgraph, hot nodes)
+    dp = {0: (_score(0, [0]*len(subgraphs)), 0, [0]*len(subgraphs), [])}
+    for s, t in tree_edges:
+        options = _edge_options(s, t) + _edge_options(t, s)
+        new_dp = {}
+        for used, (_, cost, pulled, hot_nodes) in dp.items():
+            for toss_cost, num_cuts, ext_idx, pulled_in, option_hot in options:
+                if used + num_cuts > max_cuts:
+                    continue
+                new_pulled = list(pulled)
+                new_pulled[ext_idx] += len(pulled_in)
+                new_cost = cost + toss_cost
+                entry = (_score(new_cost, new_pulled), new_cost, new_pulled,
+                         hot_nodes + option_hot)
+                key = used + num_cuts
+                if key not in new_dp or entry[0] < new_dp[key][0]:
+                    new_dp[key] = entry
+        dp = new_dp
+
+    hot_nodes = []
+    if len(dp) > 0:
+        hot_nodes = min(dp.values(), key=lambda entry: entry[0])[3]
+
+    # the tree DP only considers hot nodes facing a single subgraph, along
+    # the edges of one spanning tree, so it can miss every feasible set
+    partition = [list(subgraph.nodes) for subgraph in subgraphs]
+    index = PartitionIndex(graph, partition)
+    if not _is_feasible(partition, hot_nodes, index, max_cuts, max_frag_qubits):
+        hot_nodes = search_hot_nodes(partition, index, max_cuts, max_frag_qubits)
+    return cut_nodes, hot_nodes
 
-    return nx.is_connected(meta_graph)
 
+def _is_feasible(partition, hot_nodes, index, max_cuts, max_frag_qubits=None):
+    if len(hot_nodes) == 0 or not _is_connected(hot_nodes, index):
+        return False
+    plan = predict_cut_plan(partition, tuple(hot_nodes), index)
+    if plan.num_cuts == 0 or plan.num_cuts > max_cuts:
+        return False
+    return max_frag_qubits is None or max(plan.frag_qubits) <= max_frag_qubits
 
-def _cut_cost(graph, partition, hot_nodes, subgraph_dict, cut_nodes):
-    subgraph_appearances = {cut_node: [] for cut_node in cut_nodes}
 
-    for subgraph_idx, subgraph_nodes in enumerate(partition):
-        for subgraph_node in subgraph_nodes:
-            if (subgraph_node in cut_nodes) and (subgraph_node not in hot_nodes):
+def search_hot_nodes(partition, index, max_cuts, max_frag_qubits=None,
+                     max_expansions=100000):
+    """
+    Branch and bound over the hot node sets which connect every subgraph
+    within max_cuts cuts (and max_frag_qubits qubits per fragment, if
+    given). Returns a set with the fewest cuts, then the narrowest widest
+    fragment, or [] if there is none.
+
+    Nodes are added in a fixed order and only when they join two components
+    of the subgraphs, which still reaches every minimal connecting set: a
+    node that joins nothing when added would join nothing in the final set
+    either. So at most num_subgraphs-1 nodes are chosen.
+
+    The worst case is still exponential, about (#cut_nodes choose
+    num_subgraphs-1) partial sets, so the search stops after max_expansions
+    of them (None for no limit) and returns the best set found so far, which
+    may be [] even though a feasible set exists.
+    """
+    candidates = index.cut_nodes
+    best = {'key': (max_cuts + 1, float('inf')), 'hot_nodes': [], 'expansions': 0}
+
+    # cuts holds the (cut node, hot node's subgraph) pairs, one per cut wire
+    # segment, and every pair adds a qubit to the hot node's fragment
+    def extend(start, component, cuts, frag_qubits, hot_nodes):
+        best['expansions'] += 1
+        if max_expansions is not None and best['expansions'] > max_expansions:
+            return
+        if len(set(component)) == 1:
+            key = (len(cuts), max(frag_qubits))
+            if len(cuts) > 0 and key < best['key']:
+                best['key'], best['hot_nodes'] = key, list(hot_nodes)
+            return
+        for i in range(start, len(candidates)):
+            node = candidates[i]
+            subgraph = index.subgraph_of[node]
+            joined = set(component[other] for other in index.foreign_subgraphs[node])
+            joined.discard(component[subgraph])
+            if len(joined) == 0:
+                continue
+            new_cuts = cuts | set((cut_node, subgraph) for cut_node in index.cut_incidence[node])
+            if len(new_cuts) > max_cuts or len(new_cuts) > best['key'][0]:
+                continue
+            new_frag_qubits = list(frag_qubits)
+            new_frag_qubits[subgraph] += len(new_cuts) - len(cuts)
+            if max_frag_qubits is not None and new_frag_qubits[subgraph] > max_frag_qubits:
                 continue
-            for partial_mixer_node in list(graph.neighbors(subgraph_node)) + [subgraph_node]:
-                if partial_mixer_node in cut_nodes:
-                    subgraph_appearances[partial_mixer_node].append(subgraph_idx)
+            new_component = [component[subgraph] if label in joined else label
+                             for label in component]
+            extend(i + 1, new_component, new_cuts, new_frag_qubits, hot_nodes + [node])
 
-    num_cuts = 0
-    for cut_node, appearances in subgraph_appearances.items():
-        cut_node_subgraph = subgraph_dict[cut_node]
-        for subgraph in set(appearances):
-            if cut_node_subgraph != subgraph:
-                num_cuts += 1
-    return num_cuts
+    frag_qubits = [len(subgraph_nodes) + 1 for subgraph_nodes in partition]
+    if max_frag_qubits is None or max(frag_qubits) <= max_frag_qubits:
+        extend(0, list(range(len(partition))), set(), frag_qubits, [])
+    return best['hot_nodes']
 
 
-def simple_choose_nodes(graph: nx.Graph, partition: List[List[int]],
-                        cut_edges: List[Tuple[int, int]], max_cuts: int,
-                        ) -> Tuple[List[int], List[int]]:
-    subgraph_dict = {}
-    for i, subgraph_nodes in enumerate(partition):
-        for node in subgraph_nodes:
-            subgraph_dict[node] = i
+class PartitionIndex:
+    """
+    Cross-partition adjacency data for a fixed (graph, partition) pair.
+
+    The index is built once and then shared by _is_connected and
+    predict_cut_plan so that scoring a candidate set of hot nodes only touches
+    the candidate nodes and their foreign neighbors, rather than every edge in
+    the graph.
+
+    Attributes
+    ----------
+    num_subgraphs : int
+        Number of blocks in the partition
+    subgraph_of : dict
+        Maps each node to the index of its subgraph
+    foreign_subgraphs : dict
+        Maps each node to the frozenset of *other* subgraph indices it touches
+    cut_incidence : dict
+        Maps each node to the tuple of its neighbors in other subgraphs, i.e.
+        the cut nodes which its partial mixer would pull across the partition
+    cut_nodes : list
+        All nodes incident to a cut edge
+    """
+    def __init__(self, graph, partition):
+        self.num_subgraphs = len(partition)
+
+        self.subgraph_of = {}
+        for i, subgraph_nodes in enumerate(partition):
+            for node in subgraph_nodes:
+                self.subgraph_of[node] = i
+
+        self.foreign_subgraphs = {}
+        self.cut_incidence = {}
+        for node in graph.nodes:
+            own_subgraph = self.subgraph_of[node]
+            foreign_neighbors = tuple(neighbor for neighbor in graph.neighbors(node)
+                                      if self.subgraph_of[neighbor] != own_subgraph)
+            self.cut_incidence[node] = foreign_neighbors
+            self.foreign_subgraphs[node] = frozenset(self.subgraph_of[neighbor]
+                                                     for neighbor in foreign_neighbors)
+
+        self.cut_nodes = [node for node in graph.nodes if self.cut_incidence[node]]
+
+
+def _is_connected(hot_nodes, index):
+    # union-find over the subgraph indices, joined by the hot nodes' cut edges
+    parent = list(range(index.num_subgraphs))
+    def _find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    num_components = index.num_subgraphs
+    for hot_node in hot_nodes:
+        root_i = _find(index.subgraph_of[hot_node])
+        for subgraph_j in index.foreign_subgraphs[hot_node]:
+            root_j = _find(subgraph_j)
+            if root_i != root_j:
+                parent[root_j] = root_i
+                num_components -= 1
+
+    return num_components == 1
+
+
+class CutPlan(NamedTuple):
+    """
+    Predicted outcome of cutting the dqva circuit for one choice of hot nodes.
+
+    frag_qubits, frag_prep and frag_meas are listed in partition order.
+    """
+    hot_nodes: Tuple[int, ...]
+    num_cuts: int
+    frag_qubits: List[int]
+    frag_prep: List[int]
+    frag_meas: List[int]
+    num_variants: int
+    cost: float
+
+
+def predict_cut_plan(partition: List[List[int]], hot_nodes: Tuple[int, ...],
+                     index: PartitionIndex, mixer_order: List[int] = None,
+                     ) -> CutPlan:
+    """
+    Predict the cuts and fragments that dqv_cut_ansatz.gen_dqva and
+    qsplit_circuit_cutter.cut_circuit would produce, without building a circuit.
+
+    This follows the rules used by dqv_cut_ansatz.find_cuts when the mixers are
+    grouped by subgraph: a cut node is cut once for every foreign subgraph
+    containing a hot node adjacent to it, and its wire then visits its own
+    subgraph and each of those foreign subgraphs in mixer order. Every cut
+    measures the wire in the earlier fragment and prepares it in the later one.
+
+    The cost of a plan is the number of amplitudes simulated across all
+    tomography variants, sum_f variants_f * 2^qubits_f, plus the 4^cuts terms
+    summed over when the fragment models are recombined.
+    """
+    # position of each subgraph in the mixer order
+    if mixer_order is None:
+        subgraph_order = list(range(index.num_subgraphs))
+    else:
+        subgraph_order = []
+        for node in mixer_order:
+            subgraph = index.subgraph_of[node]
+            if subgraph not in subgraph_order:
+                subgraph_order.append(subgraph)
+    position = {subgraph: i for i, subgraph in enumerate(subgraph_order)}
+
+    # foreign subgraphs that each cut node is pulled into
+    touched_by = {}
+    for hot_node in hot_nodes:
+        hot_subgraph = index.subgraph_of[hot_node]
+        for cut_node in index.cut_incidence[hot_node]:
+            touched_by.setdefault(cut_node, set()).add(hot_subgraph)
+
+    # every fragment holds its own subgraph plus an ancilla
+    frag_qubits = [len(subgraph_nodes) + 1 for subgraph_nodes in partition]
+    frag_prep = [0] * len(partition)
+    frag_meas = [0] * len(partition)
+    num_cuts = 0
+    for cut_node, foreign in touched_by.items():
+        for subgraph in foreign:
+            frag_qubits[subgraph] += 1
+        path = sorted(foreign | {index.subgraph_of[cut_node]}, key=position.get)
+        for meas_subgraph, prep_subgraph in zip(path[:-1], path[1:]):
+            frag_meas[meas_subgraph] += 1
+            frag_prep[prep_subgraph] += 1
+            num_cuts += 1
+
+    frag_variants = [4**prep * 3**meas for prep, meas in zip(frag_prep, frag_meas)]
+    sim_cost = sum(variants * 2**qubits for variants, qubits in zip(frag_variants, frag_qubits))
+    cost = sim_cost + 4**num_cuts
+
+    return CutPlan(tuple(hot_nodes), num_cuts, frag_qubits, frag_prep, frag_meas,
+                   sum(frag_variants), cost)
+
+
+def plan_hot_nodes(graph: nx.Graph, partition: List[List[int]],
+                   cut_edges: List[Tuple[int, int]], max_cuts: int,
+                   mixer_order: List[int] = None, index: PartitionIndex = None,
+                   max_frag_qubits: int = None,
+                   ) -> Tuple[List[int], List[CutPlan]]:
+    """
+    Enumerate the feasible hot node sets and predict the cut plan of each.
+
+    A set is feasible when it connects every subgraph, and when the circuit it
+    produces would pass the checks in mis.solve_mis_cut_dqva: between 1 and
+    max_cuts cuts and, if max_frag_qubits is given, no fragment wider than
+    max_frag_qubits qubits. Every subgraph becomes one fragment, and an empty
+    subgraph can never be connected, so a partition with an empty block has
+    no feasible sets. The plans are returned sorted from cheapest to most
+    expensive.
+    """
+    if index is None:
+        index = PartitionIndex(graph, partition)
 
     cut_nodes = []
     for edge in cut_edges:
@@ -148,20 +451,115 @@ def simple_choose_nodes(graph: nx.Graph, partition: List[List[int]],
     # Eliminate those hot node sets that result in a disconnected graph
     all_connected_hot_nodes = []
     for possible_hot_nodes in all_possible_hot_nodes:
-        if _is_connected(graph, partition, possible_hot_nodes, subgraph_dict):
+        if _is_connected(possible_hot_nodes, index):
             all_connected_hot_nodes.append(possible_hot_nodes)
 
-    # Eliminate those hot node sets that require cuts > max_cuts
-    all_feasible_hot_nodes = []
+    # Eliminate those hot node sets whose circuits would be rejected after cutting
+    all_feasible_plans = []
     for possible_hot_nodes in all_connected_hot_nodes:
-        cost = _cut_cost(graph, partition, possible_hot_nodes, subgraph_dict, cut_nodes)
-        if cost <= max_cuts:
-            all_feasible_hot_nodes.append(possible_hot_nodes)
+        plan = predict_cut_plan(partition, possible_hot_nodes, index, mixer_order)
+        if plan.num_cuts > max_cuts or plan.num_cuts == 0:
+            continue
+        if max_frag_qubits is not None and max(plan.frag_qubits) > max_frag_qubits:
+            continue
+        all_feasible_plans.append(plan)
 
-    # For now, uniform random sampling
-    hot_nodes = random.choice(all_feasible_hot_nodes)
+    return cut_nodes, sorted(all_feasible_plans, key=lambda plan: plan.cost)
 
-    return cut_nodes, list(hot_nodes)
+
+def simple_choose_nodes(graph: nx.Graph, partition: List[List[int]],
+                        cut_edges: List[Tuple[int, int]], max_cuts: int,
+                        index: PartitionIndex = None, selection: str = 'random',
+                        mixer_order: List[int] = None, max_frag_qubits: int = None,
+                        ) -> Tuple[List[int], List[int]]:
+    """
+    Select the hot nodes for the first mixing layer, among the feasible sets
+    of plan_hot_nodes (so within max_frag_qubits qubits per fragment, if
+    given).
+
+    selection : str
+        'random' samples the feasible hot node sets uniformly, 'cheapest'
+        takes the plan with the lowest predicted simulation cost (ties broken
+        at random), and 'weighted' samples plans with probability inversely
+        proportional to their predicted cost.
+    """
+    cut_nodes, all_feasible_plans = plan_hot_nodes(graph, partition, cut_edges,
+                                                   max_cuts, mixer_order=mixer_order,
+                                                   index=index,
+                                                   max_frag_qubits=max_frag_qubits)
+    if len(all_feasible_plans) == 0:
+        raise Exception('No feasible hot node selection!')
+
+    if selection == 'random':
+        plan = random.choice(all_feasible_plans)
+    elif selection == 'cheapest':
+        min_cost = all_feasible_plans[0].cost
+        plan = random.choice([p for p in all_feasible_plans if p.cost == min_cost])
+    elif selection == 'weighted':
+        weights = [all_feasible_plans[0].cost / p.cost for p in all_feasible_plans]
+        plan = random.choices(all_feasible_plans, weights=weights)[0]
+    else:
+        raise ValueError(f'Unknown hot node selection: {selection}')
+
+    return cut_nodes, list(plan.hot_nodes)
+
+
+def rank_mixer_orders(graph: nx.Graph, partition: List[List[int]],
+                      cut_edges: List[Tuple[int, int]], max_cuts: int,
+                      num_orders: int, index: PartitionIndex = None,
+                      hot_node_sets: List[Tuple[int, ...]] = None,
+                      max_candidates: int = 720, max_frag_qubits: int = None,
+                      ) -> List[List[int]]:
+    """
+    Search the orders in which the subgraphs' mixers are applied for those
+    with the lowest predicted cutting cost, and return num_orders mixer orders
+    ranked from cheapest to most expensive.
+
+    Mixers are grouped by subgraph as in solve_mis_cut_dqva._sort_mixers. With
+    grouped mixers the number of cuts and the fragment widths predicted by
+    predict_cut_plan do not depend on the subgraph order, but the direction of
+    each cut does: a wire is measured in the earlier fragment and prepared in
+    the later one, which sets every fragment's 4^prep * 3^meas variants once
+    there are three or more subgraphs. Each order is scored by the cheapest
+    plan over hot_node_sets (by default all feasible hot node sets, within
+    max_frag_qubits qubits per fragment if given).
+
+    Orders are drawn from every permutation of the subgraphs, or from
+    max_candidates random permutations if there are more than that. Ties are
+    broken at random, and if num_orders exceeds the number of candidates the
+    ranking is repeated. Nodes within each subgraph are randomly permuted.
+    """
+    if index is None:
+        index = PartitionIndex(graph, partition)
+    if hot_node_sets is None:
+        _, plans = plan_hot_nodes(graph, partition, cut_edges, max_cuts, index=index,
+                                  max_frag_qubits=max_frag_qubits)
+        hot_node_sets = [plan.hot_nodes for plan in plans]
+
+    num_subgraphs = len(partition)
+    if math.factorial(num_subgraphs) <= max_candidates:
+        candidates = list(itertools.permutations(range(num_subgraphs)))
+    else:
+        candidates = list(set(tuple(np.random.permutation(num_subgraphs))
+                              for _ in range(max_candidates)))
+
+    scored_orders = []
+    for subgraph_order in candidates:
+        mixer_order = [node for subgraph in subgraph_order for node in partition[subgraph]]
+        plan_costs = [predict_cut_plan(partition, hot_nodes, index, mixer_order).cost
+                      for hot_nodes in hot_node_sets]
+        best_cost = min(plan_costs) if len(plan_costs) > 0 else float('inf')
+        scored_orders.append((best_cost, random.random(), subgraph_order))
+    scored_orders.sort()
+
+    ranked_orders = []
+    for i in range(num_orders):
+        subgraph_order = scored_orders[i % len(scored_orders)][2]
+        mixer_order = []
+        for subgraph in subgraph_order:
+            mixer_order.extend(np.random.permutation(partition[subgraph]).tolist())
+        ranked_orders.append(mixer_order)
+    return ranked_orders
 
 
 def sim_with_cutting(fragments, wire_path_map, frag_shots, backend, mode="likely",
@@ -0,0 +1,167 @@
+"""
+Shared execution layer for the variational solvers.
+
+qiskit.execute transpiles and assembles its circuit on every call, which is a
+large share of the cost of one evaluation on 10-16 qubit circuits. Instead,
+the solvers build each ansatz once per inner round with symbolic Parameters,
+wrap it in a CircuitTemplate which transpiles it once, and then only bind new
+values and submit them through backend.run. Backends are pooled by simulator,
+method and thread count, so repeated rounds and solvers share one configured
+instance.
+
+Only the data qubits are measured, so the sampled counts need no ancilla
+stripping, and statevector outputs are marginalized over the ancillas as
+arrays. hamming_weight_moments works on the resulting arrays directly.
+
+Sampling simulators draw their shots from a fresh seed on every job unless a
+template is given seed_simulator; template_seed derives one seed per template
+from a solver's seed_simulator and round numbers.
+"""
+import time
+
+import numpy as np
+
+from qiskit import Aer, ClassicalRegister, transpile
+from qiskit.circuit import Parameter
+
+from utils.helper_funcs import marginalize_ancillas, hamming_weight_array
+
+_BACKENDS = {}
+
+
+def template_seed(seed_simulator, *key):
+    """
+    A simulator seed for one template, derived from seed_simulator and key,
+    e.g. the mixer and inner round. None if seed_simulator is None.
+    """
+    if seed_simulator is None:
+        return None
+    return int(np.random.SeedSequence([seed_simulator, *key]).generate_state(1)[0])
+
+
+def get_backend(sim='aer', threads=0):
+    """
+    Return the pooled backend for sim, one of 'statevector', 'qasm' or
+    'aer', using at most threads threads (0 for all)
+    """
+    key = (sim, threads)
+    if key not in _BACKENDS:
+        if sim == 'statevector' or sim == 'qasm':
+            backend = Aer.get_backend(sim+'_simulator')
+            backend.set_options(max_parallel_threads=threads)
+        elif sim == 'aer':
+            backend = Aer.get_backend('aer_simulator')
+            backend.set_options(method='statevector', max_parallel_threads=threads)
+        elif sim == 'cloud':
+            raise Exception('NOT YET IMPLEMENTED')
+        else:
+            raise Exception('Unknown simulator:', sim)
+        _BACKENDS[key] = backend
+    return _BACKENDS[key]
+
+
+class CircuitTemplate:
+    """
+    A parameterized circuit transpiled once for a backend.
+
+    circuit_fn(params) should build the circuit from the given list of
+    Parameters. Measurements of the data qubits are added unless the backend
+    is a statevector simulator. The time spent transpiling and running is
+    kept in transpile_time and run_time, and the number of circuits run in
+    num_runs. If seed_simulator is given, the job which starts at circuit
+    num_runs is seeded with seed_simulator + num_runs, so repeated runs are
+    reproducible.
+    """
+    def __init__(self, circuit_fn, num_params, backend, seed_simulator=None):
+        self.params = [Parameter('var_{}'.format(i)) for i in range(num_params)]
+        self.backend = backend
+        self.seed_simulator = seed_simulator
+        self.statevector = 'statevector' in backend.name()
+
+        circuit = circuit_fn(self.params)
+        ancillas = set(circuit.ancillas)
+        data_qubits = [qubit for qubit in circuit.qubits if qubit not in ancillas]
+        self.num_qubits = len(circuit.qubits)
+        self.num_data = len(data_qubits)
+        self.ancilla_indices = [i for i, qubit in enumerate(circuit.qubits) if qubit in ancillas]
+        if not self.statevector:
+            creg = ClassicalRegister(self.num_data, 'meas')
+            circuit.add_register(creg)
+            circuit.measure(data_qubits, creg)
+
+        start = time.perf_counter()
+        self.circuit = transpile(circuit, backend)
+        self.transpile_time = time.perf_counter() - start
+        # the transpiler may drop gates, e.g. the diagonal phase separator
+        # right before the measurements, along with their parameters
+        self.bound_params = [(i, param) for i, param in enumerate(self.params)
+                             if param in self.circuit.parameters]
+        self.run_time = 0
+        self.num_runs = 0
+
+    def run(self, param_sets, shots=8192):
+        """
+        Run the circuit once for every parameter vector in param_sets, in a
+        single job, and return the qiskit Result
+        """
+        options = {}
+        if self.seed_simulator is not None:
+            options['seed_simulator'] = self.seed_simulator + self.num_runs
+        start = time.perf_counter()
+        if self.bound_params:
+            # one experiment per parameter vector, in order
+            binds = [{param: [values[i] for values in param_sets]
+                      for i, param in self.bound_params}]
+            job = self.backend.run(self.circuit, shots=shots, parameter_binds=binds, **options)
+        else:
+            job = self.backend.run([self.circuit]*len(param_sets), shots=shots, **options)
+        result = job.result()
+        self.run_time += time.perf_counter() - start
+        self.num_runs += len(param_sets)
+        return result
+
+    def distributions(self, param_sets, shots=8192):
+        """
+        The output distribution over the data qubits for every parameter
+        vector in param_sets, as a pair of arrays (basis states, probabilities)
+        """
+        result = self.run(param_sets, shots)
+        dists = []
+        for i in range(len(param_sets)):
+            if self.statevector:
+                probs = np.abs(np.asarray(result.get_statevector(i)))**2
+                probs = marginalize_ancillas(probs, self.num_qubits, self.ancilla_indices)
+                states = np.flatnonzero(probs > 1e-12)
+                dists.append((states, probs[states]))
+            else:
+                counts = result.get_counts(i)
+                states = np.fromiter((int(key, 2) for key in counts), dtype=np.int64,
+                                     count=len(counts))
+                probs = np.fromiter(counts.values(), dtype=float, count=len(counts)) / shots
+                dists.append((states, probs))
+        return dists
+
+    def probabilities(self, param_sets, shots=8192):
+        """
+        The output distribution over the data qubits for every parameter
+        vector in param_sets, as a {bitstring: probability} dict
+        """
+        return [{format(state, '0{}b'.format(self.num_data)): prob
+                 for state, prob in zip(states.tolist(), probs.tolist())}
+                for states, probs in self.distributions(param_sets, shots)]
+
+    def hamming_weight_moments(self, param_sets, shots=8192):
+        """
+        The mean and variance of the Hamming weight of the output for every
+        parameter vector in param_sets
+        """
+        moments = []
+        for states, probs in self.distributions(param_sets, shots):
+            weights = hamming_weight_array(states).astype(float)
+            mean = np.dot(probs, weights)
+            moments.append((mean, max(np.dot(probs, weights**2) - mean**2, 0)))
+        return moments
+
+    def timing(self):
+        return {'transpile_time': self.transpile_time, 'run_time': self.run_time,
+                'num_runs': self.num_runs}
@@ -0,0 +1,141 @@
+"""
+Gradients of the variational cost functions and the optimizers that use them.
+
+ParameterShiftGradient evaluates the gradient of a sampled cost on a qiskit
+backend with the parameter shift rule. Every parameterized gate in the ansatz
+gets its own shift, even when several gates share a variational parameter (as
+the partial mixers of a QAOA layer do). The shifted circuits of one gradient
+are submitted to the backend as a single batch of parameter bindings. The
+crx gates of the partial mixers have three eigenvalues, so they need the
+four-term shift rule. The shifted circuit is transpiled once, as a
+utils.execution.CircuitTemplate.
+
+minimize_cost dispatches between scipy.optimize.minimize and a simple Adam
+implementation, passing the gradient along to the methods that use one.
+"""
+import numpy as np
+
+from qiskit.circuit import Parameter, ParameterExpression, QuantumCircuit
+from scipy.optimize import minimize, OptimizeResult
+
+from utils.execution import CircuitTemplate
+
+GRADIENT_METHODS = ['cg', 'bfgs', 'newton-cg', 'l-bfgs-b', 'tnc', 'slsqp', 'adam']
+
+# four-term shift rule for gates with eigenvalues {0, +-1/2}, e.g. crx
+_CRX_SHIFTS = [(np.pi/2, (np.sqrt(2)+1) / (4*np.sqrt(2))),
+               (3*np.pi/2, -(np.sqrt(2)-1) / (4*np.sqrt(2)))]
+# two-term shift rule for gates with eigenvalues +-1/2, e.g. rz
+_ROTATION_SHIFTS = [(np.pi/2, 1/2)]
+
+
+def uses_gradient(optimizer):
+    return optimizer.lower() in GRADIENT_METHODS
+
+
+def _split_occurrences(template, params):
+    """
+    Copy template, giving every parameterized gate its own Parameter.
+    Returns the new circuit and a list of (gate Parameter, index into params,
+    coefficient, gate name) for every occurrence.
+    """
+    circuit = QuantumCircuit(*template.qregs, *template.cregs)
+    occurrences = []
+    for instr, qargs, cargs in template.data:
+        if instr.params and isinstance(instr.params[0], ParameterExpression) \
+                and len(instr.params[0].parameters) > 0:
+            expr = instr.params[0]
+            param = next(iter(expr.parameters))
+            theta = Parameter('theta_{}'.format(len(occurrences)))
+            occurrences.append((theta, params.index(param), float(expr.bind({param: 1})),
+                                instr.name))
+            instr = instr.copy()
+            instr.params = [theta]
+        circuit.append(instr, qargs, cargs)
+    return circuit, occurrences
+
+
+class ParameterShiftGradient:
+    """
+    Parameter shift gradient of the negative expected Hamming weight.
+
+    circuit_fn(params) should return the ansatz built from the given list of
+    Parameters. The circuit is built once, and each call to gradient(x) runs
+    2 shifted circuits per rotation and 4 per crx, in one batch.
+    seed_simulator is passed on to the CircuitTemplate.
+    """
+    def __init__(self, circuit_fn, num_params, backend, shots=8192, seed_simulator=None):
+        self.params = [Parameter('var_{}'.format(i)) for i in range(num_params)]
+        circuit, self.occurrences = _split_occurrences(circuit_fn(self.params), self.params)
+        thetas = [theta for theta, _, _, _ in self.occurrences]
+        self.template = CircuitTemplate(
+            lambda values: circuit.assign_parameters(dict(zip(thetas, values))),
+            len(thetas), backend, seed_simulator=seed_simulator)
+        self.shots = shots
+
+    def _binding(self, x, shifted=None, shift=0):
+        return [coef * x[idx] + (shift if k == shifted else 0)
+                for k, (_, idx, coef, _) in enumerate(self.occurrences)]
+
+    def _evaluate(self, binds):
+        return [-mean for mean, _ in self.template.hamming_weight_moments(binds, self.shots)]
+
+    def gradient(self, x):
+        binds, terms = [], []
+        for k, (_, idx, coef, name) in enumerate(self.occurrences):
+            shifts = _CRX_SHIFTS if name == 'crx' else _ROTATION_SHIFTS
+            for shift, weight in shifts:
+                # d cost / d x[idx] = coef * d cost / d theta_k
+                terms.append((idx, coef * weight, len(binds)))
+                binds.append(self._binding(x, k, shift))
+                binds.append(self._binding(x, k, -shift))
+
+        costs = self._evaluate(binds)
+        grad = np.zeros(len(self.params))
+        for idx, weight, b in terms:
+            grad[idx] += weight * (costs[b] - costs[b+1])
+        return grad
+
+
+def adam(fun, x0, jac, maxiter=200, learning_rate=0.05, beta1=0.9, beta2=0.999,
+         eps=1e-8, gtol=1e-4):
+    """
+    Minimize fun with Adam. If jac is True, fun returns (cost, gradient).
+    """
+    x = np.array(x0, dtype=float)
+    m = np.zeros_like(x)
+    v = np.zeros_like(x)
+    nfev = 0
+    for it in range(1, maxiter+1):
+        if jac is True:
+            cost, grad = fun(x)
+        else:
+            cost, grad = fun(x), jac(x)
+        nfev += 1
+        if np.linalg.norm(grad) < gtol:
+            break
+        m = beta1 * m + (1 - beta1) * grad
+        v = beta2 * v + (1 - beta2) * grad**2
+        m_hat = m / (1 - beta1**it)
+        v_hat = v / (1 - beta2**it)
+        x = x - learning_rate * m_hat / (np.sqrt(v_hat) + eps)
+
+    cost = fun(x)[0] if jac is True else fun(x)
+    return OptimizeResult(x=x, fun=cost, nfev=nfev+1, njev=nfev, nit=it)
+
+
+def minimize_cost(fun, x0, optimizer='COBYLA', jac=None):
+    """
+    Minimize fun with a scipy.optimize.minimize method or 'adam'. jac is
+    either a gradient function or True if fun returns (cost, gradient); it
+    is only used by methods which take a gradient.
+    """
+    if optimizer.lower() == 'adam':
+        if jac is None:
+            raise ValueError('Adam requires a gradient')
+        return adam(fun, x0, jac)
+    if jac is not None and uses_gradient(optimizer):
+        return minimize(fun, x0=x0, method=optimizer, jac=jac)
+    if jac is True:
+        return minimize(lambda x: fun(x)[0], x0=x0, method=optimizer)
+    return minimize(fun, x0=x0, method=optimizer)
@@ -0,0 +1,169 @@
+"""
+GraphContext: a networkx Graph with its structure precomputed.
+
+The solvers and the ansatz builders look up neighbors, degrees and partition
+blocks in their innermost loops, each time going through networkx's
+attribute dicts. A GraphContext is built once per graph (and partition) and
+is a frozen networkx Graph, so it can be passed anywhere a graph is today,
+while also holding:
+
+    node_list       the nodes in sorted order, node_index maps them back
+    indptr, indices the CSR adjacency over the contiguous node indices
+    degrees         the degree array
+    neighbor_masks  one integer bitmask of neighbors per node index
+    partition_ids   the partition block of every node index
+    subgraph_dict   {node: partition block}, as built in mis.py
+    cut_nodes       the nodes with a neighbor in another block
+
+neighbors() and is_indset() are answered from the precomputed data.
+"""
+import networkx as nx
+import numpy as np
+
+
+class GraphContext(nx.Graph):
+    """
+    Frozen networkx Graph with precomputed adjacency arrays, see the module
+    docstring. partition is an optional list of lists of nodes.
+    """
+    def __init__(self, incoming_graph_data=None, partition=None, **attr):
+        if isinstance(incoming_graph_data, nx.Graph):
+            # copy the adjacency in its original order, so that neighbors()
+            # (and the circuits built from it) match the original graph
+            super().__init__(**attr)
+            self.graph.update(incoming_graph_data.graph)
+            self.add_nodes_from(incoming_graph_data.nodes(data=True))
+            edge_data = {}
+            for u, nbrs in incoming_graph_data.adj.items():
+                for v, data in nbrs.items():
+                    self._adj[u][v] = edge_data.setdefault(frozenset((u, v)), dict(data))
+        else:
+            super().__init__(incoming_graph_data, **attr)
+        self._context = None
+        self.partition = None
+        if incoming_graph_data is not None:
+            self._build(partition)
+
+    def _build(self, partition=None):
+        node_list = sorted(super().nodes)
+        node_index = {node: i for i, node in enumerate(node_list)}
+        neighbor_lists = {node: list(self._adj[node]) for node in node_list}
+
+        indptr = np.zeros(len(node_list)+1, dtype=np.int64)
+        indices = []
+        neighbor_masks = []
+        for i, node in enumerate(node_list):
+            nbr_idx = [node_index[nbr] for nbr in neighbor_lists[node]]
+            indices.extend(nbr_idx)
+            indptr[i+1] = len(indices)
+            mask = 0
+            for j in nbr_idx:
+                mask |= 1 << j
+            neighbor_masks.append(mask)
+
+        self._context = {'node_list': node_list, 'node_index': node_index,
+                         'neighbor_lists': neighbor_lists, 'indptr': indptr,
+                         'indices': np.array(indices, dtype=np.int64),
+                         'degrees': np.diff(indptr), 'neighbor_masks': neighbor_masks}
+        nx.freeze(self)
+        if partition is not None:
+            self.set_partition(partition)
+
+    def _get(self, key):
+        if self._context is None:
+            # a graph built empty by networkx (e.g. in copy()), fill it in now
+            self._build()
+        return self._context[key]
+
+    node_list = property(lambda self: self._get('node_list'))
+    node_index = property(lambda self: self._get('node_index'))
+    indptr = property(lambda self: self._get('indptr'))
+    indices = property(lambda self: self._get('indices'))
+    degrees = property(lambda self: self._get('degrees'))
+    neighbor_masks = property(lambda self: self._get('neighbor_masks'))
+
+    def neighbors(self, n):
+        if self._context is None:
+            return super().neighbors(n)
+        try:
+            return iter(self._context['neighbor_lists'][n])
+        except KeyError:
+            raise nx.NetworkXError(f"The node {n} is not in the graph.")
+
+    def neighbor_list(self, n):
+        return self._get('neighbor_lists')[n]
+
+    def set_partition(self, partition):
+        """
+        Record the partition blocks and cut nodes. Returns self.
+        """
+        node_index = self.node_index
+        partition_ids = np.full(len(node_index), -1, dtype=np.int64)
+        subgraph_dict = {}
+        for block, nodes in enumerate(partition):
+            for node in nodes:
+                partition_ids[node_index[node]] = block
+                subgraph_dict[node] = block
+
+        cut_nodes = set()
+        for node in self.node_list:
+            block = subgraph_dict.get(node)
+            for nbr in self.neighbor_list(node):
+                if subgraph_dict.get(nbr) != block:
+                    cut_nodes.add(node)
+                    break
+
+        self.partition = [list(nodes) for nodes in partition]
+        self.partition_ids = partition_ids
+        self.subgraph_dict = subgraph_dict
+        self.cut_nodes = cut_nodes
+        return self
+
+    def indset_mask(self, bitstr):
+        """
+        The bitstring (little-endian, as in the rest of the repo) as a mask
+        over the node indices
+        """
+        mask = 0
+        node_index = self.node_index
+        for node, bit in enumerate(reversed(bitstr)):
+            if bit == '1':
+                mask |= 1 << node_index[node]
+        return mask
+
+    def is_indset(self, bitstr):
+        mask = self.indset_mask(bitstr)
+        neighbor_masks = self.neighbor_masks
+        remaining = mask
+        while remaining:
+            i = (remaining & -remaining).bit_length() - 1
+            if neighbor_masks[i] & mask:
+                return False
+            remaining &= remaining - 1
+        return True
+
+
+def as_graph_context(G, partition=None):
+    """
+    Return G as a GraphContext, building one only if needed
+    """
+    if not isinstance(G, GraphContext):
+        G = GraphContext(G, partition=partition)
+    elif partition is not None and G.partition != [list(nodes) for nodes in partition]:
+        G.set_partition(partition)
+    return G
+
+
+def get_subgraph_dict(G, partition):
+    """
+    {node: partition block}, taken from G if it is a GraphContext with this
+    partition
+    """
+    if isinstance(G, GraphContext) and G.partition is not None and \
+            G.partition == [list(nodes) for nodes in partition]:
+        return G.subgraph_dict
+    subgraph_dict = {}
+    for i, subgraph_nodes in enumerate(partition):
+        for node in subgraph_nodes:
+            subgraph_dict[node] = i
+    return subgraph_dict
@@ -1,19 +1,29 @@
+import re
+
 import networkx as nx
+import numpy as np
 
-def graph_from_file(fn):
+from utils.graph_context import GraphContext
+from utils.graph_store import find_stored_graph
+
+def parse_edge_file(fn):
+    """
+    The list of edges in a benchmark graph file, in file order
+    """
     with open(fn, 'r') as f:
-        edgelist = f.readline().split(',')
-        edges = []
-        for e in edgelist:
-            if '(' in e:
-                curedge = []
-                curedge.append(int(e.strip('( ')))
-            elif ')' in e:
-                curedge.append(int(e.strip(') ')))
-                edges.append(tuple(curedge))
+        ints = [int(x) for x in re.findall(r'-?\d+', f.readline())]
+    return list(zip(ints[::2], ints[1::2]))
 
+def graph_from_file(fn):
+    """
+    Load a benchmark graph file. If its directory has been packed into a
+    graph store (see utils/graph_store.py) which is newer than the
+    directory, the graph is read from the store instead.
+    """
+    G = find_stored_graph(fn)
+    if G is None:
         G = nx.Graph()
-        G.add_edges_from(edges)
+        G.add_edges_from(parse_edge_file(fn))
     return G
 
 def square_graph():
@@ -87,24 +97,56 @@ def view_partition(partition, G):
     nx.draw_spring(G, with_labels=True, node_color=node_colors, edge_color=edge_colors)
 
 def get_subgraphs(G, partition):
+    """
+    Return the subgraphs of G induced by the blocks of partition, and the
+    edges between blocks (oriented from the block listed first).
+
+    Every node is assigned its block once, then all of the edges are
+    classified in a single vectorized pass. For a frozen graph, such as a
+    GraphContext, the result is cached per partition and the subgraphs are
+    frozen as well.
+    """
+    if nx.is_frozen(G):
+        cache_key = tuple(tuple(nodes) for nodes in partition)
+        cache = G.__dict__.setdefault('_subgraph_cache', {})
+        if cache_key not in cache:
+            subgraphs, cut_edges = _split_graph(G, partition)
+            cache[cache_key] = ([nx.freeze(subG) for subG in subgraphs], cut_edges)
+        subgraphs, cut_edges = cache[cache_key]
+        return list(subgraphs), list(cut_edges)
+    return _split_graph(G, partition)
+
+def _split_graph(G, partition):
+    node_ids = {node: i for i, node in enumerate(G.nodes)}
+    block_of = np.full(len(node_ids), -1, dtype=np.int64)
+    for block, subgraph_nodes in enumerate(partition):
+        for node in subgraph_nodes:
+            if node in node_ids:
+                block_of[node_ids[node]] = block
+
+    edges = list(G.edges)
+    end_ids = np.array([(node_ids[v1], node_ids[v2]) for v1, v2 in edges],
+                       dtype=np.int64).reshape(-1, 2)
+    blocks1, blocks2 = block_of[end_ids[:, 0]], block_of[end_ids[:, 1]]
+
     subgraphs = []
-    cut_edges = []
-    all_edges = G.edges
-    for subgraph_nodes in partition:
+    internal = blocks1 == blocks2
+    for block, subgraph_nodes in enumerate(partition):
         subG = nx.Graph()
         subG.add_nodes_from(subgraph_nodes)
-
-        for v1, v2 in all_edges:
-            if v1 in subgraph_nodes and v2 in subgraph_nodes:
-                subG.add_edge(v1, v2)
-            if v1 in subgraph_nodes and v2 not in subgraph_nodes:
-                cut_edges.append((v1, v2))
-
+        subG.add_edges_from(edges[i] for i in np.flatnonzero(internal & (blocks1 == block)))
         subgraphs.append(subG)
 
+    # group the cut edges by the block of their first node, keeping the edge order
+    cut = np.flatnonzero((blocks1 >= 0) & ~internal)
+    cut = cut[np.argsort(blocks1[cut], kind='stable')]
+    cut_edges = [edges[i] for i in cut]
+
     return subgraphs, cut_edges
 
 def is_indset(bitstr, G):
+    if isinstance(G, GraphContext):
+        return G.is_indset(bitstr)
     nodes = list(G.nodes)
     ind_set = []
     for idx, bit in enumerate(reversed(bitstr)):
@@ -0,0 +1,143 @@
+"""
+Parallel, seeded generation of the benchmark graph families.
+
+Graph i of a family is generated from the i-th child of SeedSequence(seed),
+so a family can be reproduced from its seed and does not depend on the
+number of worker processes. Disconnected graphs are rejected in the worker
+as soon as they are drawn, by redrawing from the graph's own random stream,
+rather than being written out and removed later by clean_graphs.py. The
+workers also compute the MIS size of every graph, and write_family packs the
+family into a graph store (see utils/graph_store.py), optionally alongside
+the usual G*.txt files.
+"""
+import os
+import concurrent.futures
+
+import networkx as nx
+import numpy as np
+
+from utils.classical_mis import mis_bitsets
+from utils.graph_store import store_path, write_store, convert_family, GraphStore
+
+
+def random_graph(kind, n, seed=None, d=3, p=0.1, num_comms=2, p_in=0.2, p_out=0.02):
+    """
+    kind : str
+        'regular' for a random d-regular graph, 'erdos_renyi' for G(n, p),
+        or 'planted_partition' for num_comms communities with edge
+        probabilities p_in within and p_out between them. The n nodes are
+        spread over the communities, the first n % num_comms communities
+        holding one node more than the others.
+    """
+    if kind == 'regular':
+        return nx.random_regular_graph(d, n, seed=seed)
+    elif kind == 'erdos_renyi':
+        return nx.erdos_renyi_graph(n, p, seed=seed)
+    elif kind == 'planted_partition':
+        if not 0 < num_comms <= n:
+            raise ValueError(f'Cannot plant {num_comms} communities in {n} nodes')
+        sizes = [n // num_comms + (i < n % num_comms) for i in range(num_comms)]
+        return nx.random_partition_graph(sizes, p_in, p_out, seed=seed)
+    raise ValueError(f'Unknown graph family: {kind}')
+
+
+def connected_graph(kind, n, seed=None, max_tries=10000, **params):
+    """
+    Draw random_graph(kind, n, **params) until it is connected, seeding every
+    draw from one random stream started at seed
+    """
+    rng = np.random.default_rng(seed)
+    for _ in range(max_tries):
+        G = random_graph(kind, n, seed=int(rng.integers(2**31)), **params)
+        if G.number_of_nodes() > 0 and nx.is_connected(G):
+            return G
+    raise Exception(f'No connected {kind} graph with {n} nodes in {max_tries} tries')
+
+
+def _generate(args):
+    kind, n, seed, params, compute_mis = args
+    G = connected_graph(kind, n, seed, **params)
+    mis_size = mis_bitsets(G)[0] if compute_mis else -1
+    return list(G.edges), mis_size
+
+
+def _is_new(G, seen):
+    # seen: WL hash -> graphs with that hash
+    wl_hash = nx.weisfeiler_lehman_graph_hash(G)
+    if any(nx.is_isomorphic(G, other) for other in seen.get(wl_hash, [])):
+        return False
+    seen.setdefault(wl_hash, []).append(G)
+    return True
+
+
+def generate_family(kind, n, num_graphs, seed=None, processes=None, unique=False,
+                    known=None, compute_mis=True, **params):
+    """
+    Generate num_graphs connected graphs, see random_graph for kind and
+    params. Returns a list of (edge list, MIS size) pairs, the MIS size being
+    -1 unless compute_mis.
+
+    If unique, graphs isomorphic to an earlier graph of the family or to one
+    of the graphs in known are dropped and replaced by new draws. Graphs are
+    generated in a process pool of up to processes workers, serially if
+    processes == 1.
+    """
+    seed_seq = np.random.SeedSequence(seed)
+    seen = {}
+    for G in known or []:
+        _is_new(G, seen)
+
+    def draw(mapper):
+        graphs = []
+        while len(graphs) < num_graphs:
+            args = [(kind, n, child, params, compute_mis)
+                    for child in seed_seq.spawn(num_graphs - len(graphs))]
+            for edges, mis_size in mapper(_generate, args):
+                if unique:
+                    G = nx.Graph()
+                    G.add_edges_from(edges)
+                    if not _is_new(G, seen):
+                        continue
+                graphs.append((edges, mis_size))
+        return graphs
+
+    if processes == 1:
+        return draw(map)
+    with concurrent.futures.ProcessPoolExecutor(max_workers=processes) as executor:
+        return draw(executor.map)
+
+
+def write_family(graph_dir, graphs, start=1, text=True):
+    """
+    Save graphs, as returned by generate_family, as G{start}, G{start+1}, ...
+    into the store of graph_dir, merging them with the graphs already
+    stored there. If text, the G*.txt files are written to graph_dir as well.
+    Returns the path of the store.
+    """
+    path = store_path(graph_dir)
+    if not os.path.isfile(path) and os.path.isdir(graph_dir) and \
+            any(fn.startswith('G') and fn.endswith('.txt') for fn in os.listdir(graph_dir)):
+        # keep the graphs generated before there was a store
+        convert_family(graph_dir, path)
+
+    names = ['G{}'.format(start + i) for i in range(len(graphs))]
+    if text:
+        os.makedirs(graph_dir, exist_ok=True)
+        for name, (edges, _) in zip(names, graphs):
+            with open(os.path.join(graph_dir, name + '.txt'), 'w') as fn:
+                edgestr = ''.join(['{}, '.format(e) for e in edges])
+                edgestr = edgestr.strip(', ')
+                fn.write(edgestr)
+
+    family = {}
+    if os.path.isfile(path):
+        store = GraphStore(path)
+        for i, name in enumerate(store.names):
+            family[name] = (list(map(tuple, store.graph_edges(i).tolist())),
+                            int(store.mis_size[i]))
+    family.update(zip(names, graphs))
+
+    names = sorted(family, key=lambda name: (len(name), name))
+    write_store(path, os.path.basename(os.path.normpath(graph_dir)), names,
+                [family[name][0] for name in names], [family[name][1] for name in names])
+    return path
@@ -0,0 +1,234 @@
+"""
+Packed store for a family of benchmark graphs.
+
+Every benchmark_graphs/*_graphs directory holds one small text file of edge
+tuples per graph. A graph store packs a whole family into a single file:
+
+    magic       b'GSTORE1\\n'
+    header_len  8-byte little-endian length of the header
+    header      JSON with the family name, the graph names (the file names
+                without .txt) and the dtype, shape and offset of every array
+    arrays      raw little-endian arrays, starting at the first multiple of
+                64 bytes after the header, each aligned to 64 bytes
+
+The arrays, indexed by graph id (the position of its name in the header):
+
+    edges       (total edges, 2) int32, the edges of all graphs in file order
+    edge_ptr    graph i's edges are edges[edge_ptr[i]:edge_ptr[i+1]]
+    degrees     the degree sequences (sorted descending) of all graphs
+    degree_ptr  as edge_ptr, for degrees
+    num_nodes   number of nodes of every graph
+    connected   whether every graph is connected
+    mis_size    the size of every graph's maximum independent set, -1 if it
+                was not computed
+
+The arrays are memory-mapped, so opening a store and loading one graph by id
+or by name only reads the pages it needs. Graphs are rebuilt with their edges
+in file order, which gives the same node order as graph_from_file.
+"""
+import os
+import json
+
+import networkx as nx
+import numpy as np
+
+MAGIC = b'GSTORE1\n'
+STORE_EXT = '.gstore'
+_ALIGN = 64
+
+
+def store_path(graph_dir):
+    """
+    The store file for a benchmark graph directory, e.g.
+    benchmark_graphs/N10_p20_graphs -> benchmark_graphs/N10_p20_graphs.gstore
+    """
+    return os.path.normpath(graph_dir) + STORE_EXT
+
+
+def _data_start(header_len):
+    return -(-(len(MAGIC) + 8 + header_len) // _ALIGN) * _ALIGN
+
+
+def write_store(path, family, names, edge_lists, mis_sizes=None):
+    """
+    Pack the graphs given by their lists of edges into a store at path. The
+    edges are stored as given, so that the graphs are rebuilt exactly.
+    """
+    if mis_sizes is None:
+        mis_sizes = [-1] * len(edge_lists)
+    graphs = []
+    for edges in edge_lists:
+        G = nx.Graph()
+        G.add_edges_from(edges)
+        graphs.append(G)
+    degree_seqs = [sorted((d for _, d in G.degree), reverse=True) for G in graphs]
+
+    arrays = {
+        'edges': np.array([e for edges in edge_lists for e in edges], dtype='<i4').reshape(-1, 2),
+        'edge_ptr': np.cumsum([0] + [len(edges) for edges in edge_lists], dtype='<i8'),
+        'degrees': np.array([d for seq in degree_seqs for d in seq], dtype='<i4'),
+        'degree_ptr': np.cumsum([0] + [len(seq) for seq in degree_seqs], dtype='<i8'),
+        'num_nodes': np.array([G.number_of_nodes() for G in graphs], dtype='<i4'),
+        'connected': np.array([G.number_of_nodes() > 0 and nx.is_connected(G) for G in graphs],
+                              dtype='|b1'),
+        'mis_size': np.array(mis_sizes, dtype='<i4'),
+    }
+
+    # offsets are relative to the start of the data, the first multiple of
+    # the alignment after the header
+    layout, offset = {}, 0
+    for key, arr in arrays.items():
+        layout[key] = [arr.dtype.str, list(arr.shape), offset]
+        offset += -(-arr.nbytes // _ALIGN) * _ALIGN
+    header_bytes = json.dumps({'family': family, 'names': list(names),
+                               'arrays': layout}).encode()
+    data_start = _data_start(len(header_bytes))
+
+    tmp_path = path + f'.{os.getpid()}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(MAGIC)
+        f.write(len(header_bytes).to_bytes(8, 'little'))
+        f.write(header_bytes)
+        for key, arr in arrays.items():
+            f.seek(data_start + layout[key][2])
+            f.write(np.ascontiguousarray(arr).tobytes())
+        f.truncate(data_start + offset)
+    os.replace(tmp_path, path)
+
+
+class GraphStore:
+    """
+    Read-only, memory-mapped view of a store written by write_store. Graphs
+    are indexed by id or by name, e.g. store['G1'].
+    """
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f'{path} is not a graph store')
+            header_len = int.from_bytes(f.read(8), 'little')
+            header = json.loads(f.read(header_len))
+        self.family = header['family']
+        self.names = header['names']
+        self.index = {name: i for i, name in enumerate(self.names)}
+        self.mtime = os.path.getmtime(path)
+        data_start = _data_start(header_len)
+        for key, (dtype, shape, offset) in header['arrays'].items():
+            if np.prod(shape) == 0:
+                arr = np.zeros(shape, dtype=dtype)
+            else:
+                arr = np.memmap(path, dtype=dtype, mode='r', offset=data_start+offset,
+                                shape=tuple(shape))
+            setattr(self, key, arr)
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, name):
+        return name in self.index
+
+    def graph_id(self, key):
+        return self.index[key] if isinstance(key, str) else int(key)
+
+    def graph_edges(self, key):
+        """
+        The (num edges, 2) array of edges of a graph
+        """
+        i = self.graph_id(key)
+        return self.edges[self.edge_ptr[i]:self.edge_ptr[i+1]]
+
+    def __getitem__(self, key):
+        G = nx.Graph()
+        G.add_edges_from(map(tuple, self.graph_edges(key).tolist()))
+        return G
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self.names[i], self[i]
+
+    def properties(self, key):
+        """
+        The precomputed properties of a graph, as a dict
+        """
+        i = self.graph_id(key)
+        return {'name': self.names[i], 'num_nodes': int(self.num_nodes[i]),
+                'num_edges': int(self.edge_ptr[i+1] - self.edge_ptr[i]),
+                'connected': bool(self.connected[i]),
+                'degree_sequence': self.degrees[self.degree_ptr[i]:self.degree_ptr[i+1]].tolist(),
+                'mis_size': int(self.mis_size[i])}
+
+
+def convert_family(graph_dir, path=None, compute_mis=True):
+    """
+    Pack the G*.txt files of a benchmark graph directory into a store, by
+    default next to the directory (see store_path). The graphs are stored in
+    the order of their number. Returns the path of the store.
+    """
+    from utils.graph_funcs import parse_edge_file
+    from utils.classical_mis import mis_bitsets
+
+    if path is None:
+        path = store_path(graph_dir)
+    fns = [fn for fn in os.listdir(graph_dir) if fn.startswith('G') and fn.endswith('.txt')]
+    fns = sorted(fns, key=lambda fn: (len(fn), fn))
+
+    names, edge_lists, mis_sizes = [], [], []
+    for fn in fns:
+        edges = parse_edge_file(os.path.join(graph_dir, fn))
+        G = nx.Graph()
+        G.add_edges_from(edges)
+        names.append(fn[:-len('.txt')])
+        edge_lists.append(edges)
+        if compute_mis:
+            mis_sizes.append(mis_bitsets(nx.convert_node_labels_to_integers(G))[0])
+        else:
+            mis_sizes.append(-1)
+
+    family = os.path.basename(os.path.normpath(graph_dir))
+    write_store(path, family, names, edge_lists, mis_sizes)
+    return path
+
+
+_STORES = {}
+
+
+def _find_store(fn):
+    # the up-to-date store holding the graph of the text file fn, and its name
+    graph_dir, fn = os.path.split(os.path.abspath(fn))
+    path = store_path(graph_dir)
+    if not os.path.isfile(path):
+        return None, None
+    store = _STORES.get(path)
+    if store is None or os.path.getmtime(path) != store.mtime:
+        store = _STORES[path] = GraphStore(path)
+    name = fn[:-len('.txt')] if fn.endswith('.txt') else fn
+    if name not in store:
+        return None, None
+    # files added to, or rewritten in, the directory after it was packed
+    for changed in [graph_dir, os.path.join(graph_dir, fn)]:
+        if os.path.exists(changed) and os.path.getmtime(changed) > store.mtime:
+            return None, None
+    return store, name
+
+
+def find_stored_graph(fn):
+    """
+    Return the graph of the text file fn from the store of its directory, or
+    None if there is no up-to-date store holding it. Families written only
+    as a store (see utils/graph_gen.py) need no text files.
+    """
+    store, name = _find_store(fn)
+    if store is None:
+        return None
+    return store[name]
+
+
+def find_stored_mis_size(fn):
+    """
+    Return the MIS size stored for the graph of the text file fn, or None if
+    there is no up-to-date store holding it or its MIS size was not computed
+    """
+    store, name = _find_store(fn)
+    if store is None or store.mis_size[store.index[name]] < 0:
+        return None
+    return int(store.mis_size[store.index[name]])
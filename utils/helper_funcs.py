@@ -1,3 +1,4 @@
+import numpy as np
 from utils.graph_funcs import is_indset
 
 def strip_ancillas(counts, circ=None, num_anc=None):
@@ -15,9 +16,36 @@ def strip_ancillas(counts, circ=None, num_anc=None):
 
     return new_counts
 
+def marginalize_ancillas(probs, num_qubits, ancilla_qubits):
+    """
+    Sum a probability vector over all 2**num_qubits basis states (qiskit
+    ordering) down to the vector over the qubits not in ancilla_qubits
+    """
+    if len(ancilla_qubits) == 0:
+        return probs
+    # bit q of the index is axis num_qubits-1-q of the C-ordered tensor
+    tensor = np.reshape(probs, [2]*num_qubits)
+    axes = tuple(num_qubits - 1 - q for q in ancilla_qubits)
+    return tensor.sum(axis=axes).ravel()
+
 def hamming_weight(bitstr):
     return sum([1 for bit in bitstr if bit == '1'])
 
+# Popcount of every byte value, for numpy versions without np.bitwise_count
+_BYTE_POPCOUNT = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+def hamming_weight_array(states):
+    """
+    Hamming weights of an array of basis states given as integers
+    """
+    states = np.asarray(states, dtype=np.uint64)
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(states)
+    counts = np.zeros(states.shape, dtype=np.uint8)
+    for shift in range(0, 64, 8):
+        counts += _BYTE_POPCOUNT[(states >> np.uint64(shift)) & np.uint64(255)]
+    return counts
+
 def gen_binary_str(n, bitstr, ret):
     """
     Generate all binary strings of length n
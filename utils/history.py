@@ -0,0 +1,89 @@
+"""
+Compact history records for the cut dqva solver.
+
+Every inner round of solve_mis_cut_dqva is summarized by a CutDQVARound, which
+holds only numbers, bitstrings and a cut plan id. The fragment circuits and the
+wire path map, which used to be stored with every round, are kept once per cut
+plan in a FragmentTable, content-addressed by the hash of their QPY form.
+"""
+import io
+import hashlib
+from typing import Any, Dict, List, NamedTuple, Tuple
+
+import numpy as np
+
+from utils.cut_cache import qpy
+
+
+class CutDQVARound(NamedTuple):
+    mixer_round: int
+    inner_round: int
+    cost: float
+    function_evals: int
+    init_state: str
+    mixer_order: List[int]
+    num_params: int
+    frag_shots: int
+    frag_qubits: List[int]
+    cuts: List[Tuple[str, int, int]]
+    hot_nodes: List[int]
+    better_strs: List[Tuple[str, int]]
+    cur_params: np.ndarray
+    plan_id: str
+    cut_time: float
+    opt_time: float
+    total_shots: int = 0
+
+    def __getitem__(self, key):
+        # allow the dict-style access used by the analysis notebooks
+        if isinstance(key, str):
+            return getattr(self, key)
+        return tuple.__getitem__(self, key)
+
+
+def compact_cuts(cuts):
+    """
+    Replace the Qubit of every (Qubit, location) cut with its register name and index
+    """
+    return [(wire.register.name, wire.index, location) for wire, location in cuts]
+
+
+class FragmentTable:
+    """
+    Side table of the fragments of every cut plan seen during a run.
+
+    fragments maps the sha256 of a fragment's QPY serialization to that
+    serialization, and plans maps a cut plan id to the hashes of its
+    fragments and its wire path map, stored by register name and index.
+    """
+    def __init__(self):
+        self.fragments: Dict[str, bytes] = {}
+        self.plans: Dict[str, Dict[str, Any]] = {}
+
+    def add(self, plan_id, fragments, wire_path_map):
+        if plan_id in self.plans:
+            return plan_id
+
+        frag_hashes = []
+        for fragment in fragments:
+            qpy_buffer = io.BytesIO()
+            qpy.dump(fragment, qpy_buffer)
+            data = qpy_buffer.getvalue()
+            frag_hash = hashlib.sha256(data).hexdigest()
+            self.fragments.setdefault(frag_hash, data)
+            frag_hashes.append(frag_hash)
+
+        frag_qubits = [list(fragment.qubits) for fragment in fragments]
+        path_map = [((wire.register.name, wire.index),
+                     [(frag_idx, frag_qubits[frag_idx].index(frag_wire))
+                      for frag_idx, frag_wire in path])
+                    for wire, path in wire_path_map.items()]
+        self.plans[plan_id] = {'fragments': frag_hashes, 'wire_path_map': path_map}
+        return plan_id
+
+    def get_fragments(self, plan_id):
+        return [qpy.load(io.BytesIO(self.fragments[frag_hash]))[0]
+                for frag_hash in self.plans[plan_id]['fragments']]
+
+    def state(self):
+        return {'fragments': self.fragments, 'plans': self.plans}
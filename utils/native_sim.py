@@ -0,0 +1,235 @@
+"""
+Native statevector simulation of the DQVA, QLS and QAO ansatzes.
+
+The partial mixer of node q applies RX(2*alpha) to q only when all of its
+neighbors are |0>. The circuits built in ansatz/ implement this with an
+ancilla and two multi-controlled Toffolis, but the ancilla is always returned
+to |0>, so here the rotation is applied directly to the amplitudes of the
+n data qubits in which q's neighbors are all 0. The phase separator is an
+rz(2*gamma) on every qubit, i.e. a diagonal phase exp(i*gamma*(2|x| - n)).
+
+Amplitudes are indexed little-endian like qiskit: bit q of the index is the
+state of node q. The gradient of the expected Hamming weight is computed
+with the adjoint method, at the cost of about three statevector passes.
+"""
+import numpy as np
+
+from utils.helper_funcs import hamming_weight
+
+
+def _mixer_params(init_state, mixer_order, alpha_indices):
+    """
+    Pair the qubits with unset bits in mixer_order with the given parameter
+    indices, as in the dqva and qls apply_mixer
+    """
+    pairs = []
+    next_alpha = 0
+    for qubit in mixer_order:
+        bit = list(reversed(init_state))[qubit]
+        if bit == '1' or next_alpha >= len(alpha_indices):
+            continue
+        pairs.append((qubit, alpha_indices[next_alpha]))
+        next_alpha += 1
+    return pairs
+
+
+def dqva_layers(G, P, init_state, mixer_order):
+    """
+    The gate layers of dqv_ansatz.gen_dqva as a list of ('mixer', [(qubit,
+    param index), ...]) and ('phase', param index)
+    """
+    nq = len(G.nodes)
+    num_nonzero = nq - hamming_weight(init_state)
+    num_params = (nq + 1) * P
+    layers = []
+    last_idx = 0
+    for p in range(P):
+        chunk = num_nonzero + 1
+        section = list(range(p*chunk, (p+1)*chunk))
+        layers.append(('mixer', _mixer_params(init_state, mixer_order, section[:-1])))
+        layers.append(('phase', section[-1]))
+        last_idx = (p+1)*chunk
+    # Add the leftover parameters as extra mixers
+    layers.append(('mixer', _mixer_params(init_state, mixer_order,
+                                          list(range(last_idx, num_params)))))
+    return layers, num_params
+
+
+def qls_layers(G, P, init_state, mixer_order, param_lim=None):
+    """
+    The gate layers of qls_ansatz.gen_qlsa, see dqva_layers
+    """
+    nq = len(G.nodes)
+    num_nonzero = nq - hamming_weight(init_state)
+    if param_lim is None:
+        num_params = min(P * (nq + 1), (P+1) * (num_nonzero + 1))
+    else:
+        num_params = param_lim
+
+    alpha_list, gamma_list = [], []
+    param_index = 0
+    while param_index < num_params:
+        if param_index == 0:
+            gamma_list.append(param_index)
+            param_index += 1
+            need_new_driver = False
+        elif num_params - param_index >= num_nonzero:
+            alpha_list.append(list(range(param_index, param_index+num_nonzero)))
+            param_index += num_nonzero
+            if param_index < num_params and need_new_driver:
+                gamma_list.append(param_index)
+                param_index += 1
+            need_new_driver = True
+        elif num_params - param_index < num_nonzero:
+            alpha_list.append(list(range(param_index, num_params)))
+            param_index = num_params
+
+    layers = []
+    for i, alphas in enumerate(alpha_list):
+        layers.append(('mixer', _mixer_params(init_state, mixer_order, alphas)))
+        if i < len(gamma_list):
+            layers.append(('phase', gamma_list[i]))
+    return layers, num_params
+
+
+def qaoa_layers(G, P, mixer_order):
+    """
+    The gate layers of qaoa.gen_qaoa, every partial mixer in a layer shares
+    the layer's beta
+    """
+    layers = []
+    for p in range(P):
+        layers.append(('mixer', [(qubit, 2*p) for qubit in mixer_order]))
+        layers.append(('phase', 2*p + 1))
+    return layers, 2 * P
+
+
+class NativeAnsatz:
+    """
+    Statevector simulator for one of the ansatzes at a fixed graph, initial
+    state and mixer order.
+
+    cost(params) and gradient(params) return the negative expected Hamming
+    weight and its gradient, matching the cost functions in mis.py, and
+    probabilities(params) returns a {bitstring: probability} dict over the
+    data qubits.
+    """
+    def __init__(self, G, ansatz='dqva', P=1, init_state=None, mixer_order=None,
+                 param_lim=None):
+        self.num_qubits = nq = len(G.nodes)
+        if init_state is None:
+            init_state = '0'*nq
+        if mixer_order is None:
+            mixer_order = list(G.nodes)
+        self.init_state = init_state
+
+        if ansatz == 'dqva':
+            self.layers, self.num_params = dqva_layers(G, P, init_state, mixer_order)
+        elif ansatz == 'qls':
+            self.layers, self.num_params = qls_layers(G, P, init_state, mixer_order, param_lim)
+        elif ansatz == 'qaoa':
+            if init_state == 'W':
+                raise ValueError('The native simulator only supports product initial states')
+            self.layers, self.num_params = qaoa_layers(G, P, mixer_order)
+        else:
+            raise ValueError(f'Unknown ansatz: {ansatz}')
+
+        self.neighbors = {qubit: list(G.neighbors(qubit)) for qubit in G.nodes}
+        indices = np.arange(2**nq)
+        self.weights = np.zeros(2**nq)
+        for qubit in range(nq):
+            self.weights += (indices >> qubit) & 1
+        self.phase_weights = 2*self.weights - nq
+
+    def _initial_state(self):
+        state = np.zeros(2**self.num_qubits, dtype=complex)
+        state[int(self.init_state, 2)] = 1
+        return state
+
+    def _subspace(self, state, qubit):
+        """
+        Views of the amplitudes with qubit in |0> and |1> and all of its neighbors in |0>
+        """
+        nq = self.num_qubits
+        # bit q of the index is axis nq-1-q of the C-ordered tensor
+        tensor = state.reshape([2]*nq)
+        index = [slice(None)]*nq
+        for neighbor in self.neighbors[qubit]:
+            index[nq-1-neighbor] = 0
+        index[nq-1-qubit] = 0
+        zero = tensor[tuple(index)]
+        index[nq-1-qubit] = 1
+        one = tensor[tuple(index)]
+        return zero, one
+
+    def _rotate(self, state, qubit, alpha):
+        # RX(2*alpha) = cos(alpha) I - i sin(alpha) X on the subspace
+        zero, one = self._subspace(state, qubit)
+        c, s = np.cos(alpha), np.sin(alpha)
+        old_zero = zero.copy()
+        zero *= c
+        zero += -1j * s * one
+        one *= c
+        one += -1j * s * old_zero
+
+    def _apply(self, state, layer, params, adjoint=False):
+        sign = -1 if adjoint else 1
+        kind, data = layer
+        if kind == 'mixer':
+            mixers = reversed(data) if adjoint else data
+            for qubit, idx in mixers:
+                self._rotate(state, qubit, sign * params[idx])
+        else:
+            state *= np.exp(sign * 1j * params[data] * self.phase_weights)
+
+    def statevector(self, params):
+        state = self._initial_state()
+        for layer in self.layers:
+            self._apply(state, layer, params)
+        return state
+
+    def probabilities(self, params, threshold=0):
+        probs = np.abs(self.statevector(params))**2
+        return {format(i, f'0{self.num_qubits}b'): p for i, p in enumerate(probs)
+                if p > threshold}
+
+    def cost(self, params):
+        probs = np.abs(self.statevector(params))**2
+        return -np.dot(probs, self.weights)
+
+    def cost_and_gradient(self, params):
+        """
+        Adjoint-mode gradient: run the circuit forward once, then walk the
+        gates backwards, un-applying each one to both the state and the
+        co-state H|psi>.
+        """
+        params = np.asarray(params, dtype=float)
+        state = self.statevector(params)
+        costate = self.weights * state
+        cost = -np.real(np.vdot(state, costate))
+
+        grad = np.zeros(self.num_params)
+        for kind, data in reversed(self.layers):
+            if kind == 'phase':
+                # d/dgamma exp(i gamma s) = i s exp(i gamma s)
+                grad[data] += 2 * np.real(np.vdot(costate, 1j * self.phase_weights * state))
+                self._apply(state, (kind, data), params, adjoint=True)
+                self._apply(costate, (kind, data), params, adjoint=True)
+                continue
+            for qubit, idx in reversed(data):
+                alpha = params[idx]
+                self._rotate(state, qubit, -alpha)
+                zero, one = self._subspace(state, qubit)
+                lam_zero, lam_one = self._subspace(costate, qubit)
+                # d/dalpha (cos I - i sin X) = -sin I - i cos X
+                c, s = np.cos(alpha), np.sin(alpha)
+                overlap = (np.vdot(lam_zero, -s * zero - 1j * c * one)
+                           + np.vdot(lam_one, -1j * c * zero - s * one))
+                grad[idx] += 2 * np.real(overlap)
+                self._rotate(costate, qubit, -alpha)
+
+        # the cost is the negative expected Hamming weight
+        return cost, -grad
+
+    def gradient(self, params):
+        return self.cost_and_gradient(params)[1]
@@ -0,0 +1,256 @@
+"""
+Graph partitioning for the divide-and-conquer solvers.
+
+partition_graph wraps the partitioners used by mis.solve_mis_cut_dqva and
+partition_no_cuts.solve_mis_no_cut_dqva. best_of_k_partition generates several
+candidate partitions in parallel and keeps the one with the lowest predicted
+cutting cost, since a poor bisection can double the width of the largest
+fragment.
+"""
+import concurrent.futures
+
+import numpy as np
+import networkx as nx
+import metis
+
+from networkx.algorithms.community.kernighan_lin import kernighan_lin_bisection
+
+from utils.cutting_funcs import PartitionIndex, choose_nodes_kway, predict_cut_plan
+from utils.graph_funcs import get_subgraphs
+
+
+def partition_graph(graph, partition_alg, num_frags=2, seed=None,
+                    vertex_weights=None, **options):
+    """
+    Partition graph into a list of node lists
+
+    partition_alg : str
+        'klb' for a Kernighan-Lin bisection, 'metis' for METIS with nparts =
+        num_frags (options are passed on as METIS options, e.g. ufactor), or
+        'spectral' for recursive spectral bisection
+    vertex_weights : dict
+        Optional integer weight of every node, only used by METIS
+    """
+    if partition_alg == 'klb':
+        # Kernighan-Lin partitions a graph into two relatively equal subgraphs
+        partition = [list(nodes) for nodes in kernighan_lin_bisection(graph, seed=seed)]
+    elif partition_alg == 'metis':
+        # For generalizing to >2 subgraphs, we'll use the METIS graph partitioning software
+        #    https://metis.readthedocs.io/en/latest/
+        if seed is not None:
+            options['seed'] = seed
+        if vertex_weights is not None:
+            graph = graph.copy()
+            nx.set_node_attributes(graph, vertex_weights, 'vertex_weight')
+            graph.graph['node_weight_attr'] = 'vertex_weight'
+        partition_assignment = metis.part_graph(graph, nparts=num_frags, **options)[1]
+        partition = [[] for _ in set(partition_assignment)]
+        block_index = {block: i for i, block in enumerate(sorted(set(partition_assignment)))}
+        for node, assignment in zip(list(graph), partition_assignment):
+            partition[block_index[assignment]].append(node)
+    elif partition_alg == 'spectral':
+        partition = spectral_partition(graph, num_frags, seed=seed)
+    else:
+        raise ValueError(f"Unknown graph partitioning algorithm: {partition_alg}")
+    return partition
+
+
+def spectral_partition(graph, num_frags, seed=None):
+    """
+    Recursively split the largest block at the median of its Fiedler vector
+    """
+    partition = [list(graph.nodes)]
+    while len(partition) < num_frags:
+        largest = max(range(len(partition)), key=lambda i: len(partition[i]))
+        block = partition.pop(largest)
+        subgraph = graph.subgraph(block)
+        if len(block) < 2:
+            partition.append(block)
+            break
+        if nx.is_connected(subgraph):
+            fiedler = nx.fiedler_vector(subgraph, seed=seed)
+            ranked = [block[i] for i in np.argsort(fiedler)]
+        else:
+            # order the nodes component by component
+            ranked = [node for component in nx.connected_components(subgraph)
+                      for node in component]
+        half = len(ranked) // 2
+        partition.extend([ranked[:half], ranked[half:]])
+    return partition
+
+
+def score_partition(graph, partition, max_cuts, max_frag_qubits=None):
+    """
+    Predict the cost of cutting the dqva circuit for a partition.
+
+    The hot nodes are chosen with cutting_funcs.choose_nodes_kway, which
+    returns a set connecting every subgraph within max_cuts cuts (and
+    max_frag_qubits qubits per fragment, if given) whenever one exists, and
+    the resulting plan is scored with predict_cut_plan. Returns a dict
+    containing the sort key 'score' and 'feasible'. Partitions with an empty
+    block or without any feasible hot node set are infeasible, have no
+    'plan', and score infinity.
+    """
+    subgraphs, cut_edges = get_subgraphs(graph, partition)
+    cut_nodes = set(node for edge in cut_edges for node in edge)
+    result = {'partition': partition, 'num_cut_edges': len(cut_edges),
+              'num_cut_nodes': len(cut_nodes), 'plan': None, 'feasible': False,
+              'score': (float('inf'), float('inf'), len(cut_nodes))}
+    if any(len(nodes) == 0 for nodes in partition):
+        return result
+
+    _, hot_nodes = choose_nodes_kway(graph, subgraphs, cut_edges, max_cuts,
+                                     max_frag_qubits=max_frag_qubits)
+    if len(hot_nodes) == 0:
+        return result
+
+    plan = predict_cut_plan(partition, hot_nodes, PartitionIndex(graph, partition))
+    result['plan'] = plan
+    result['feasible'] = True
+    result['score'] = (plan.cost, max(plan.frag_qubits), len(cut_nodes))
+    return result
+
+
+def _candidate_partition(args):
+    graph, partition_alg, num_frags, max_cuts, max_frag_qubits, seed, options = args
+    try:
+        partition = partition_graph(graph, partition_alg, num_frags, seed=seed, **options)
+    except Exception:
+        return None
+    if len(partition) != num_frags:
+        return None
+    result = score_partition(graph, partition, max_cuts, max_frag_qubits=max_frag_qubits)
+    result['partition_alg'] = partition_alg
+    result['seed'] = seed
+    result['options'] = options
+    return result
+
+
+def best_of_k_partition(graph, num_frags, max_cuts, k=8, seed=None, processes=None,
+                        max_frag_qubits=None, verbose=0):
+    """
+    Generate k candidate partitions in a process pool and return the feasible
+    one (see score_partition, within max_frag_qubits qubits per fragment if
+    given) with the lowest predicted cutting cost, along with its score dict.
+
+    The candidates mix Kernighan-Lin bisections with different seeds (when
+    num_frags == 2), METIS runs with different seeds and imbalance tolerances,
+    and one spectral partition.
+    """
+    rng = np.random.default_rng(seed)
+    candidates = [(graph, 'spectral', num_frags, max_cuts, max_frag_qubits,
+                   int(rng.integers(2**31)), {})]
+    ufactors = [1, 30, 100, 200]
+    while len(candidates) < k:
+        i = len(candidates)
+        if num_frags == 2 and i % 2 == 1:
+            candidates.append((graph, 'klb', num_frags, max_cuts, max_frag_qubits,
+                               int(rng.integers(2**31)), {}))
+        else:
+            candidates.append((graph, 'metis', num_frags, max_cuts, max_frag_qubits,
+                               int(rng.integers(2**31)),
+                               {'ufactor': ufactors[i % len(ufactors)]}))
+
+    with concurrent.futures.ProcessPoolExecutor(max_workers=processes) as executor:
+        results = [result for result in executor.map(_candidate_partition, candidates)
+                   if result is not None]
+    if verbose:
+        for result in results:
+            print(f"\t{result['partition_alg']} (seed {result['seed']}, {result['options']}):",
+                  f"score = {result['score']}")
+
+    feasible = [result for result in results if result['feasible']]
+    if len(feasible) == 0:
+        raise Exception(f'No candidate partition into {num_frags} fragments can be cut '
+                        f'with at most {max_cuts} cuts within {max_frag_qubits} qubits '
+                        f'per fragment!')
+    best = min(feasible, key=lambda result: result['score'])
+    if verbose:
+        print(f"Selected {best['partition_alg']} partition with score {best['score']}")
+    return best['partition'], best
+
+
+def mixer_weights(graph):
+    """
+    Weight every node by the footprint of its partial mixer: the node plus
+    the neighbours it is controlled on
+    """
+    return {node: graph.degree(node) + 1 for node in graph.nodes}
+
+
+def capped_partition(graph, max_frag_qubits, max_cuts, max_frags=None, seed=None,
+                     ufactors=(30, 1, 100), verbose=0):
+    """
+    Partition graph with METIS into the fewest fragments whose predicted
+    width fits within max_frag_qubits.
+
+    The width of a fragment counts its nodes, its ancilla, and the cut nodes
+    pulled in by its hot nodes (see cutting_funcs.predict_cut_plan). Vertices
+    are weighted by mixer_weights so that METIS balances the partial mixer
+    footprint rather than the node count. num_frags starts at the smallest
+    value which could fit the budget and grows until a partition fits, or
+    max_frags is reached.
+
+    Returns (partition, score dict), the latter as given by score_partition.
+    """
+    weights = mixer_weights(graph)
+    num_nodes = graph.number_of_nodes()
+    if max_frags is None:
+        max_frags = max_cuts + 1
+    if max_frag_qubits < 2:
+        raise ValueError(f'A fragment needs at least 2 qubits, got {max_frag_qubits}')
+
+    # every fragment holds at least one ancilla
+    num_frags = max(2, -(-num_nodes // (max_frag_qubits - 1)))
+    while num_frags <= min(max_frags, num_nodes):
+        for ufactor in ufactors:
+            try:
+                partition = partition_graph(graph, 'metis', num_frags, seed=seed,
+                                            vertex_weights=weights, ufactor=ufactor)
+            except Exception:
+                continue
+            if len(partition) != num_frags:
+                continue
+            result = score_partition(graph, partition, max_cuts, max_frag_qubits=max_frag_qubits)
+            if verbose:
+                print(f'\t{num_frags} fragments (ufactor {ufactor}): score = {result["score"]}')
+            if result['feasible']:
+                return partition, result
+        num_frags += 1
+
+    raise Exception(f'No partition with at most {max_cuts} cuts fits within '
+                    f'{max_frag_qubits} qubits per fragment!')
+
+
+def select_partition(graph, partition_alg, num_frags, max_cuts, max_frag_qubits=None,
+                     canonical_cache=None, verbose=0):
+    """
+    Partition graph as requested by the partition_alg argument of the
+    solvers: 'best' for best_of_k_partition and 'capped' for
+    capped_partition, both within max_frag_qubits, and otherwise
+    partition_graph.
+
+    The searches of 'best' and 'capped' are stored in canonical_cache (a
+    utils.canonical_cache.CanonicalCache) if one is given, and are reused for
+    every graph isomorphic to graph.
+    """
+    if partition_alg == 'best':
+        # Keep the best of several candidate partitions by predicted cutting cost
+        compute = lambda: best_of_k_partition(graph, num_frags, max_cuts,
+                                              max_frag_qubits=max_frag_qubits,
+                                              verbose=verbose)[0]
+    elif partition_alg == 'capped':
+        # Choose the number of fragments so that each fits within the qubit budget
+        if max_frag_qubits is None:
+            raise ValueError("partition_alg='capped' requires max_frag_qubits")
+        compute = lambda: capped_partition(graph, max_frag_qubits, max_cuts, verbose=verbose)[0]
+    else:
+        return partition_graph(graph, partition_alg, num_frags)
+
+    if canonical_cache is None:
+        return compute()
+    name = f'partition|{partition_alg}|{num_frags}|{max_cuts}|{max_frag_qubits}'
+    partition = canonical_cache.get_or_compute(graph, name, compute, remap='nodes')
+    if verbose:
+        print(f'Canonical cache: {canonical_cache.hits} hits, {canonical_cache.misses} misses')
+    return partition
@@ -0,0 +1,83 @@
+"""
+Adaptive shot counts for the variational cost functions.
+
+Early in an optimization the optimizer takes large steps and a coarse estimate
+of the average Hamming weight is enough to tell the candidate points apart.
+ShotScheduler starts from a small number of shots and raises it as the steps
+shrink or as the differences between successive costs fall within the
+sampling error, up to the full shot count.
+"""
+import numpy as np
+
+
+def hamming_weight_variance(probs):
+    """
+    Variance of the Hamming weight under the distribution probs
+    """
+    mean, mean_sq = 0, 0
+    for bitstr, prob in probs.items():
+        weight = bitstr.count('1')
+        mean += prob * weight
+        mean_sq += prob * weight**2
+    return max(mean_sq - mean**2, 0)
+
+
+class ShotScheduler:
+    """
+    Shot count for the evaluations of a single variational optimization.
+
+    The shots grow by a factor of growth (up to max_shots) whenever the
+    distance between successive parameter vectors falls below the reference
+    step divided by growth, or the change in cost between successive
+    evaluations has been within noise_ratio standard errors of the estimate
+    for patience evaluations in a row.
+    """
+    def __init__(self, max_shots, min_shots=None, growth=2, noise_ratio=2.0, patience=1):
+        if min_shots is None:
+            min_shots = max(max_shots // 16, 128)
+        self.max_shots = max_shots
+        self.shots = min(min_shots, max_shots)
+        self.growth = growth
+        self.noise_ratio = noise_ratio
+        self.patience = patience
+        self.total_shots = 0
+        self.num_evals = 0
+        self._last_params = None
+        self._last_cost = None
+        self._ref_step = None
+        self._num_unresolved = 0
+
+    def record(self, params, cost, variance, shots=None):
+        """
+        Record an evaluation of the cost function and update the shot count
+        """
+        if shots is None:
+            shots = self.shots
+        self.total_shots += shots
+        self.num_evals += 1
+
+        params = np.array(params, dtype=float)
+        grow = False
+        if self._last_params is not None:
+            step = np.linalg.norm(params - self._last_params)
+            if self._ref_step is None:
+                if step > 0:
+                    self._ref_step = step
+            elif step < self._ref_step / self.growth:
+                grow = True
+                self._ref_step = step
+
+            # the optimizer can no longer resolve the cost differences
+            error = np.sqrt(variance / shots)
+            if abs(cost - self._last_cost) < self.noise_ratio * error:
+                self._num_unresolved += 1
+            else:
+                self._num_unresolved = 0
+            if self._num_unresolved >= self.patience:
+                grow = True
+
+        self._last_params = params
+        self._last_cost = cost
+        if grow:
+            self.shots = min(self.max_shots, int(self.shots * self.growth))
+            self._num_unresolved = 0
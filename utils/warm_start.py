@@ -0,0 +1,121 @@
+"""
+Warm-start store for the variational parameters of the dqva, qls and qaoa.
+
+The optimal angle of a partial mixer depends mostly on the local structure
+around its node, so the store keys every optimized angle by a motif: the
+ansatz, P, the layer, the node's degree, its neighbors' degrees, and how many
+of its neighbors are already set in the initial state. New optimizations are
+seeded with the (circular) mean of the angles stored for a matching motif,
+falling back to a coarser motif without the neighborhood, and finally to a
+uniformly random angle. The phase separator angles are keyed by ansatz, P and
+layer only.
+
+The store is a JSON file, rewritten atomically after every update, so that it
+can be shared across rounds, reps and graphs.
+"""
+import os
+import json
+
+import numpy as np
+
+from utils.native_sim import dqva_layers, qls_layers, qaoa_layers
+
+
+def ansatz_layers(G, ansatz, P, init_state, mixer_order, param_lim=None):
+    if ansatz == 'dqva':
+        return dqva_layers(G, P, init_state, mixer_order)
+    elif ansatz == 'qls':
+        return qls_layers(G, P, init_state, mixer_order, param_lim)
+    elif ansatz == 'qaoa':
+        return qaoa_layers(G, P, mixer_order)
+    raise ValueError(f'Unknown ansatz: {ansatz}')
+
+
+def _motif_keys(G, ansatz, P, init_state, layers, num_params):
+    """
+    Return a [fine key, coarse key] list for every parameter index
+    """
+    bits = list(reversed(init_state))
+    keys = [None] * num_params
+    mixer_layer, phase_layer = 0, 0
+    for kind, data in layers:
+        if kind == 'phase':
+            key = f'{ansatz}|P{P}|phase{phase_layer}'
+            keys[data] = [key, key]
+            phase_layer += 1
+            continue
+        for qubit, idx in data:
+            if keys[idx] is not None:
+                # the qaoa shares one angle between all of a layer's mixers
+                continue
+            if ansatz == 'qaoa':
+                key = f'{ansatz}|P{P}|mixer{mixer_layer}'
+                keys[idx] = [key, key]
+                continue
+            neighbors = list(G.neighbors(qubit))
+            coarse = f'{ansatz}|P{P}|mixer{mixer_layer}|deg{len(neighbors)}'
+            fine = '{}|nbr{}|on{}'.format(coarse, sorted(G.degree(n) for n in neighbors),
+                                          sum(bits[n] == '1' for n in neighbors))
+            keys[idx] = [fine, coarse]
+        mixer_layer += 1
+    return keys
+
+
+class WarmStartStore:
+    """
+    Persistent map from local motifs to previously optimized angles
+    """
+    def __init__(self, path=None):
+        self.path = path
+        # key -> [sum of cos, sum of sin, count]
+        self.angles = {}
+        self.hits = 0
+        self.misses = 0
+        if path is not None and os.path.isfile(path):
+            with open(path, 'r') as fp:
+                self.angles = json.load(fp)
+
+    def suggest(self, G, ansatz, P, init_state, mixer_order, param_lim=None, spread=0.1):
+        """
+        Initial parameters for an optimization: the stored mean angle plus a
+        small normal perturbation where a motif matches, random otherwise
+        """
+        layers, num_params = ansatz_layers(G, ansatz, P, init_state, mixer_order, param_lim)
+        keys = _motif_keys(G, ansatz, P, init_state, layers, num_params)
+        params = np.random.uniform(low=0.0, high=2*np.pi, size=num_params)
+        for idx, idx_keys in enumerate(keys):
+            if idx_keys is None:
+                continue
+            for key in idx_keys:
+                if key in self.angles:
+                    cos_sum, sin_sum, _ = self.angles[key]
+                    params[idx] = (np.arctan2(sin_sum, cos_sum) + np.random.normal(0, spread)) % (2*np.pi)
+                    self.hits += 1
+                    break
+            else:
+                self.misses += 1
+        return params
+
+    def update(self, G, ansatz, P, init_state, mixer_order, params, param_lim=None):
+        """
+        Add the optimized params of one inner round to the store
+        """
+        layers, num_params = ansatz_layers(G, ansatz, P, init_state, mixer_order, param_lim)
+        keys = _motif_keys(G, ansatz, P, init_state, layers, num_params)
+        for idx, idx_keys in enumerate(keys):
+            if idx_keys is None:
+                continue
+            for key in set(idx_keys):
+                entry = self.angles.setdefault(key, [0.0, 0.0, 0])
+                entry[0] += float(np.cos(params[idx]))
+                entry[1] += float(np.sin(params[idx]))
+                entry[2] += 1
+        self.save()
+
+    def save(self):
+        if self.path is None:
+            return
+        tmp_path = self.path + f'.{os.getpid()}.tmp'
+        with open(tmp_path, 'w') as fp:
+            json.dump(self.angles, fp)
+        os.replace(tmp_path, self.path)